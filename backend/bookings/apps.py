@@ -5,3 +5,7 @@ class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
 
     name = 'bookings'
+
+    def ready(self):
+
+        import bookings.signals
@@ -0,0 +1,167 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from bookings.models import Bookings, BookedNight
+from listings.models import Listings
+from users.models import User
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Compare the legacy bookings-join availability search with the BookedNight ledger. '
+        'Seeds synthetic data inside a transaction that is rolled back unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=100_000)
+        parser.add_argument('--bookings', type=int, default=5_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            listing_ids = self.seed_listings(options['listings'], options['batch_size'])
+            self.seed_bookings(rng, listing_ids, options['bookings'], options['batch_size'])
+            self.stdout.write(f'Seeded data in {time.perf_counter() - started:.1f}s')
+
+            today = timezone.localdate()
+            windows = []
+            for _ in range(options['queries']):
+                check_in = today + timedelta(days=rng.randint(1, 300))
+                windows.append((check_in, check_in + timedelta(days=rng.randint(1, 7))))
+
+            legacy = [self.time_query(self.legacy_queryset(*window)) for window in windows]
+            ledger = [self.time_query(Listings.objects.get_available_listings(*window)) for window in windows]
+
+            self.report('legacy bookings join', legacy)
+            self.report('booked night ledger', ledger)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed_listings(self, count, batch_size):
+        host = User.objects.create_user(
+            username=f'bench-host-{time.time_ns()}',
+            email=f'bench-host-{time.time_ns()}@example.com',
+        )
+        prefix = f'bench-{time.time_ns()}'
+        for offset in range(0, count, batch_size):
+            Listings.objects.bulk_create([
+                Listings(
+                    host=host,
+                    title=f'Benchmark listing {i}',
+                    title_slug=f'{prefix}-{i}',
+                    description='Benchmark listing',
+                    address=f'{i} Benchmark Street',
+                    country='India',
+                    city='Mumbai',
+                    property_type='apartment',
+                    max_guests=4,
+                    bedrooms=2,
+                    beds=2,
+                    bathrooms=Decimal('1.0'),
+                    price_per_night=Decimal('100.00'),
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+        return list(
+            Listings.objects.filter(title_slug__startswith=prefix).values_list('id', flat=True)
+        )
+
+    def seed_bookings(self, rng, listing_ids, count, batch_size):
+        prefix = f'bench-guest-{time.time_ns()}'
+        User.objects.bulk_create([
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com', password='!')
+            for i in range(1000)
+        ])
+        guest_ids = list(
+            User.objects.filter(username__startswith=prefix).values_list('id', flat=True)
+        )
+        today = timezone.localdate()
+        now = timezone.now()
+        statuses = (
+            [Bookings.STATUS_CONFIRMED] * 6
+            + [Bookings.STATUS_CANCELLED] * 2
+            + [Bookings.STATUS_FAILED, Bookings.STATUS_PENDING]
+        )
+        claimed = set()
+
+        for offset in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - offset)):
+                start_date = today + timedelta(days=rng.randint(-3 * 365, 365))
+                end_date = start_date + timedelta(days=rng.randint(1, 14))
+                status = rng.choice(statuses)
+                booking = Bookings(
+                    guest_id=rng.choice(guest_ids),
+                    listing_id=rng.choice(listing_ids),
+                    start_date=start_date,
+                    end_date=end_date,
+                    total_price=Decimal('100.00'),
+                    status=status,
+                    hold_expires_at=(
+                        now + timedelta(minutes=rng.randint(-30, 30))
+                        if status == Bookings.STATUS_PENDING else None
+                    ),
+                )
+                if booking.holds_nights() and end_date > today:
+                    # Live reservations never overlap, so a colliding draw becomes a cancellation.
+                    nights = {
+                        (booking.listing_id, night)
+                        for night in BookedNight.nights_between(start_date, end_date)
+                    }
+                    if nights & claimed:
+                        booking.status = Bookings.STATUS_CANCELLED
+                        booking.hold_expires_at = None
+                    else:
+                        claimed |= nights
+                batch.append(booking)
+            created = Bookings.objects.bulk_create(batch)
+
+            # bulk_create skips post_save, so mirror the ledger the way the backfill does.
+            BookedNight.objects.bulk_create([
+                BookedNight(
+                    booking_id=booking.id,
+                    listing_id=booking.listing_id,
+                    night=night,
+                    hold_expires_at=None if booking.status in Bookings.RESERVED_STATUSES else booking.hold_expires_at,
+                )
+                for booking in created
+                if booking.holds_nights() and booking.end_date > today
+                for night in BookedNight.nights_between(booking.start_date, booking.end_date)
+            ], batch_size=batch_size)
+
+    def legacy_queryset(self, check_in, check_out):
+        return Listings.objects.exclude(
+            Q(bookings__start_date__lt=check_out) &
+            Q(bookings__end_date__gt=check_in) &
+            Q(bookings__status__in=['confirmed', 'paid'])
+        ).order_by('-id')
+
+    def time_query(self, queryset):
+        started = time.perf_counter()
+        queryset.count()
+        list(queryset.order_by('-id').values_list('id', flat=True)[:24])
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{label}: median {statistics.median(timings):.1f} ms, '
+            f'p95 {p95:.1f} ms over {len(timings)} searches'
+        )
@@ -1,9 +1,12 @@
 from django.core.management.base import BaseCommand
 
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
 
-from bookings.models import Bookings
+from bookings.models import Bookings, BookedNight
+
+from listings.result_cache import invalidate_booking_results
 
 class Command(BaseCommand):
 
@@ -21,11 +24,24 @@ class Command(BaseCommand):
 
         )
 
-        count = pending_bookings.count()
+        released_nights = BookedNight.objects.filter(
 
-        if count > 0:
+            Q(hold_expires_at__lte=now) | Q(night__lt=timezone.localdate(now))
+
+        )
+
+        with transaction.atomic():
 
-            pending_bookings.update(status=Bookings.STATUS_CANCELLED)
+            BookedNight.objects.filter(booking__in=pending_bookings).delete()
+
+            count = pending_bookings.update(status=Bookings.STATUS_CANCELLED)
+
+            released_nights.delete()
+
+            # Rows change in bulk, without per-booking signals.
+            invalidate_booking_results()
+
+        if count > 0:
 
             self.stdout.write(
 
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:05
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+from django.utils import timezone
+
+
+RESERVED_STATUSES = ["confirmed", "paid", "ongoing"]
+
+
+def backfill_booked_nights(apps, schema_editor):
+    Bookings = apps.get_model("bookings", "Bookings")
+    BookedNight = apps.get_model("bookings", "BookedNight")
+
+    now = timezone.now()
+    bookings = (
+        Bookings.objects
+        .filter(end_date__gt=timezone.localdate(now))
+        .filter(
+            Q(status__in=RESERVED_STATUSES)
+            | Q(status="pending", hold_expires_at__gt=now)
+        )
+        .values_list("id", "listing_id", "start_date", "end_date", "status", "hold_expires_at")
+        .order_by("id")
+    )
+
+    batch = []
+    for booking_id, listing_id, start_date, end_date, status, hold_expires_at in bookings.iterator(chunk_size=2000):
+        for offset in range((end_date - start_date).days):
+            batch.append(BookedNight(
+                booking_id=booking_id,
+                listing_id=listing_id,
+                night=start_date + timedelta(days=offset),
+                hold_expires_at=None if status in RESERVED_STATUSES else hold_expires_at,
+            ))
+        if len(batch) >= 5000:
+            BookedNight.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BookedNight.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_bookings_hold_expires_at'),
+        ('listings', '0011_remove_listings_unique_host_address_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookedNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('hold_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='bookings.bookings')),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='listings.listings')),
+            ],
+            options={
+                'verbose_name': 'Booked Night',
+                'verbose_name_plural': 'Booked Nights',
+                'indexes': [models.Index(fields=['listing', 'night'], name='booked_night_listing_night')],
+                'constraints': [models.UniqueConstraint(fields=('booking', 'night'), name='unique_booking_night')],
+            },
+        ),
+        migrations.RunPython(backfill_booked_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:12
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def drop_expired_holds(apps, schema_editor):
+    # Lapsed holds may overlap newer reservations; they must go before nights become unique.
+    BookedNight = apps.get_model("bookings", "BookedNight")
+    BookedNight.objects.filter(hold_expires_at__lte=timezone.now()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0008_booked_night'),
+        ('listings', '0011_remove_listings_unique_host_address_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_expired_holds, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='bookednight',
+            name='booked_night_listing_night',
+        ),
+        migrations.AddConstraint(
+            model_name='bookednight',
+            constraint=models.UniqueConstraint(fields=('listing', 'night'), name='unique_listing_night'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booked_night_claims'),
+        ('listings', '0024_listing_image_local_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='bookings',
+            name='start_date_before_end_date',
+        ),
+        migrations.AddConstraint(
+            model_name='bookings',
+            constraint=models.CheckConstraint(condition=models.Q(('start_date__lt', models.F('end_date'))), name='start_date_before_end_date'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 from django.conf import settings
 
@@ -10,7 +10,7 @@ from django.db.models import Q
 
 from users.base_models import TimeStampedModel
 
-from datetime import date
+from datetime import date, timedelta
 from django.utils import timezone
 
 class Bookings(TimeStampedModel):
@@ -29,6 +29,8 @@ class Bookings(TimeStampedModel):
 
     STATUS_ONGOING = "ongoing"
 
+    RESERVED_STATUSES = [STATUS_CONFIRMED, STATUS_PAID, STATUS_ONGOING]
+
     guest = models.ForeignKey(
 
         settings.AUTH_USER_MODEL,
@@ -98,7 +100,7 @@ class Bookings(TimeStampedModel):
 
     def clean(self):
 
-        if self.start_date > self.end_date:
+        if self.start_date >= self.end_date:
 
             raise ValidationError("Start date must be before end date")
 
@@ -128,7 +130,7 @@ class Bookings(TimeStampedModel):
     def active_reservation_q(cls, at_time=None):
         at_time = at_time or timezone.now()
         return (
-            Q(status__in=[cls.STATUS_CONFIRMED, cls.STATUS_PAID, cls.STATUS_ONGOING])
+            Q(status__in=cls.RESERVED_STATUSES)
             | Q(status=cls.STATUS_PENDING, hold_expires_at__gt=at_time)
         )
 
@@ -140,6 +142,9 @@ class Bookings(TimeStampedModel):
             end_date__gte=start_date,
         ).filter(cls.active_reservation_q(at_time=at_time))
 
+    def holds_nights(self, at_time=None):
+        return self.status in self.RESERVED_STATUSES or self.is_hold_active(at_time=at_time)
+
     def is_hold_active(self, at_time=None):
         at_time = at_time or timezone.now()
         return (
@@ -158,7 +163,7 @@ class Bookings(TimeStampedModel):
 
             models.CheckConstraint(
 
-                check = Q(start_date__lte = models.F("end_date")) & Q(end_date__gte = models.F("start_date")),
+                check = Q(start_date__lt = models.F("end_date")),
 
                 name = "start_date_before_end_date"
 
@@ -184,6 +189,142 @@ class Bookings(TimeStampedModel):
 
         ]
 
+class NightsTaken(IntegrityError):
+    """Another booking already holds one of the nights being claimed."""
+
+
+class BookedNight(models.Model):
+    """
+    One row per night held by a confirmed booking or a pending hold.
+    Availability search becomes an indexed anti-join on (listing, night)
+    instead of an exclude() over the whole bookings history.
+    """
+
+    listing = models.ForeignKey(
+
+        Listings,
+
+        on_delete=models.CASCADE,
+
+        related_name="booked_nights"
+
+    )
+
+    booking = models.ForeignKey(
+
+        Bookings,
+
+        on_delete=models.CASCADE,
+
+        related_name="booked_nights"
+
+    )
+
+    night = models.DateField()
+
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+
+        return f"{self.listing_id} : {self.night}"
+
+    @staticmethod
+    def nights_between(start_date, end_date):
+        return [start_date + timedelta(days=i) for i in range((end_date - start_date).days)]
+
+    @classmethod
+    def active_q(cls, at_time=None):
+        at_time = at_time or timezone.now()
+        return Q(hold_expires_at__isnull=True) | Q(hold_expires_at__gt=at_time)
+
+    @classmethod
+    def occupied(cls, *, start_date, end_date, at_time=None):
+        return cls.objects.filter(
+            night__gte=start_date,
+            night__lt=end_date,
+        ).filter(cls.active_q(at_time=at_time))
+
+    @classmethod
+    def release_expired(cls, *, listing, start_date, end_date, at_time=None):
+        """Free nights in the range whose pending hold has lapsed so they can be claimed again."""
+        at_time = at_time or timezone.now()
+        return cls.objects.filter(
+            listing=listing,
+            night__gte=start_date,
+            night__lt=end_date,
+            hold_expires_at__lte=at_time,
+        ).delete()
+
+    @classmethod
+    def sync_booking(cls, booking):
+        """
+        Bring the ledger rows of a single booking in line with its status and dates.
+        Rows double as claims: the (listing, night) unique constraint rejects
+        them when another booking already holds one of the nights, which is
+        raised as NightsTaken.
+        """
+        if not booking.holds_nights():
+            cls.objects.filter(booking=booking).delete()
+            return
+
+        hold_expires_at = None if booking.status in Bookings.RESERVED_STATUSES else booking.hold_expires_at
+        # Instances built with ISO strings keep them until reloaded.
+        start_date = Bookings._meta.get_field("start_date").to_python(booking.start_date)
+        end_date = Bookings._meta.get_field("end_date").to_python(booking.end_date)
+        wanted = set(cls.nights_between(start_date, end_date))
+        existing = set(cls.objects.filter(booking=booking).values_list("night", flat=True))
+
+        if existing - wanted:
+            cls.objects.filter(booking=booking, night__in=existing - wanted).delete()
+
+        cls.objects.filter(booking=booking).exclude(
+            hold_expires_at=hold_expires_at
+        ).update(hold_expires_at=hold_expires_at)
+
+        claims = sorted(wanted - existing)
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(
+                        listing_id=booking.listing_id,
+                        booking=booking,
+                        night=night,
+                        hold_expires_at=hold_expires_at,
+                    )
+                    for night in claims
+                ])
+        except IntegrityError as e:
+            # Any other violation is a bug, not a lost race for the dates.
+            if cls.objects.filter(listing_id=booking.listing_id, night__in=claims).exclude(booking=booking).exists():
+                raise NightsTaken(f"Nights of listing {booking.listing_id} are already held") from e
+            raise
+
+    class Meta:
+
+        verbose_name = "Booked Night"
+
+        verbose_name_plural = "Booked Nights"
+
+        constraints = [
+
+            models.UniqueConstraint(
+
+                fields=["booking", "night"],
+
+                name="unique_booking_night"
+
+            ),
+
+            models.UniqueConstraint(
+
+                fields=["listing", "night"],
+
+                name="unique_listing_night"
+
+            ),
+
+        ]
+
 class Payment(models.Model):
 
     INITIATED = "initiated"
@@ -10,10 +10,12 @@ from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
 
-from listings.serializers import ListingSerializer
+from listings.serializers import ListingSerializer, NestedListingCardListSerializer
 
 from users.serializers import UserProfileSerializer
 
+from conf.fieldsets import SparseFieldsetMixin
+
 
 class HostBookingGuestSerializer(serializers.ModelSerializer):
     """The guest details a host needs to manage a reservation."""
@@ -101,7 +103,8 @@ class BookingSerializer(serializers.ModelSerializer):
 
             raise serializers.ValidationError("Start date cannot be in the past")
 
-        if end_date < start_date:
+        # A stay needs at least one night, so checking out on the arrival day is not a booking.
+        if end_date <= start_date:
 
             raise serializers.ValidationError("End date must be after start date")
 
@@ -171,7 +174,9 @@ class BookingSerializer(serializers.ModelSerializer):
 
         return representation
 
-class ViewBookingSerializer(serializers.ModelSerializer):
+class ViewBookingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+
+    expandable_fields = ("guest", "listing")
 
     guest = UserProfileSerializer(read_only=True)
 
@@ -211,6 +216,8 @@ class ViewBookingSerializer(serializers.ModelSerializer):
 
         ]
 
+        list_serializer_class = NestedListingCardListSerializer
+
 
 class HostBookingSerializer(serializers.ModelSerializer):
     guest = HostBookingGuestSerializer(read_only=True)
@@ -233,6 +240,7 @@ class HostBookingSerializer(serializers.ModelSerializer):
             "total_price",
             "status",
         ]
+        list_serializer_class = NestedListingCardListSerializer
 
     def get_duration_nights(self, obj):
         return (obj.end_date - obj.start_date).days
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+
+from django.dispatch import receiver
+
+from bookings.models import Bookings, BookedNight
+
+from listings.result_cache import invalidate_booking_results
+
+@receiver(post_save, sender=Bookings)
+
+def sync_booked_nights(sender, instance, **kwargs):
+
+    BookedNight.sync_booking(instance)
+
+@receiver(post_save, sender=Bookings)
+
+def invalidate_availability_results(sender, instance, **kwargs):
+
+    invalidate_booking_results()
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bookings.models import Bookings, BookedNight
+from listings.models import Listings
+from users.models import User
+
+
+CREATE_BOOKING_URL = reverse("bookings:booking-create")
+PUBLIC_LISTING_URL = reverse("listing:public-listings")
+
+
+class BookedNightLedgerTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.host = User.objects.create_host(
+            email="host@example.com",
+            password="hostpass123",
+            username="hostuser",
+            phone="1234567890",
+        )
+        self.guest = User.objects.create_user(
+            email="guest@example.com",
+            password="guestpass123",
+            username="guestuser",
+            phone="1234567890",
+        )
+        self.listing = Listings.objects.create(
+            host=self.host,
+            title="Ledger Listing",
+            description="Ledger test listing",
+            address="1 Ledger Street",
+            country="India",
+            city="Goa",
+            property_type="villa",
+            max_guests=4,
+            bedrooms=2,
+            beds=2,
+            bathrooms=1.0,
+            price_per_night=Decimal("80.00"),
+        )
+        self.other_listing = Listings.objects.create(
+            host=self.host,
+            title="Free Listing",
+            description="Never booked",
+            address="2 Ledger Street",
+            country="India",
+            city="Goa",
+            property_type="villa",
+            max_guests=4,
+            bedrooms=2,
+            beds=2,
+            bathrooms=1.0,
+            price_per_night=Decimal("80.00"),
+        )
+        self.start_date = timezone.localdate() + timedelta(days=10)
+        self.end_date = self.start_date + timedelta(days=3)
+
+    def create_booking(self, **kwargs):
+        defaults = {
+            "guest": self.guest,
+            "listing": self.listing,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "total_price": Decimal("240.00"),
+            "status": Bookings.STATUS_CONFIRMED,
+        }
+        defaults.update(kwargs)
+        return Bookings.objects.create(**defaults)
+
+    def search_ids(self, check_in, check_out):
+        res = self.client.get(
+            PUBLIC_LISTING_URL,
+            {"check_in": check_in.isoformat(), "check_out": check_out.isoformat()},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {item["id"] for item in res.data["results"]}
+
+    def test_confirmed_booking_writes_one_row_per_night(self):
+        booking = self.create_booking()
+
+        nights = list(booking.booked_nights.order_by("night").values_list("night", flat=True))
+        self.assertEqual(nights, BookedNight.nights_between(self.start_date, self.end_date))
+        self.assertFalse(booking.booked_nights.filter(hold_expires_at__isnull=False).exists())
+
+    def test_pending_hold_created_through_api_blocks_search(self):
+        self.client.force_authenticate(self.guest)
+        res = self.client.post(
+            CREATE_BOOKING_URL,
+            {
+                "listing": self.listing.id,
+                "start_date": self.start_date.isoformat(),
+                "end_date": self.end_date.isoformat(),
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(None)
+
+        self.assertEqual(BookedNight.objects.filter(listing=self.listing).count(), 3)
+        self.assertEqual(
+            self.search_ids(self.start_date, self.end_date),
+            {self.other_listing.id},
+        )
+
+    def test_expired_hold_does_not_block_search(self):
+        self.create_booking(
+            status=Bookings.STATUS_PENDING,
+            hold_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        self.assertEqual(
+            self.search_ids(self.start_date, self.end_date),
+            {self.listing.id, self.other_listing.id},
+        )
+
+    def test_checkout_day_is_bookable(self):
+        self.create_booking()
+
+        self.assertIn(
+            self.listing.id,
+            self.search_ids(self.end_date, self.end_date + timedelta(days=2)),
+        )
+
+    def test_cancel_and_fail_release_nights(self):
+        booking = self.create_booking()
+
+        booking.status = Bookings.STATUS_CANCELLED
+        booking.save(update_fields=["status"])
+        self.assertFalse(BookedNight.objects.filter(booking=booking).exists())
+
+        other = self.create_booking(
+            status=Bookings.STATUS_PENDING,
+            hold_expires_at=timezone.now() + timedelta(minutes=10),
+        )
+        other.status = Bookings.STATUS_FAILED
+        other.hold_expires_at = None
+        other.save(update_fields=["status", "hold_expires_at"])
+        self.assertFalse(BookedNight.objects.filter(booking=other).exists())
+
+    def test_payment_clears_hold_expiry_on_nights(self):
+        booking = self.create_booking(
+            status=Bookings.STATUS_PENDING,
+            hold_expires_at=timezone.now() + timedelta(minutes=10),
+        )
+
+        booking.status = Bookings.STATUS_CONFIRMED
+        booking.hold_expires_at = None
+        booking.save(update_fields=["status", "hold_expires_at"])
+
+        self.assertEqual(booking.booked_nights.filter(hold_expires_at__isnull=True).count(), 3)
+
+    def test_cleanup_command_drops_expired_hold_nights(self):
+        booking = self.create_booking(
+            status=Bookings.STATUS_PENDING,
+            hold_expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        call_command("cleanup_pending_bookings", stdout=StringIO())
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, Bookings.STATUS_CANCELLED)
+        self.assertFalse(BookedNight.objects.filter(booking=booking).exists())
@@ -0,0 +1,148 @@
+import threading
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from bookings.models import Bookings, BookedNight
+from listings.models import Listings
+from users.models import User
+
+
+CREATE_BOOKING_URL = reverse("bookings:booking-create")
+
+
+class ConcurrentBookingStressTests(TransactionTestCase):
+    """Hammer one listing from many threads; committed nights must never overlap."""
+
+    workers = 8
+    attempts_per_worker = 5
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a test database that threads can share (file-backed SQLite or Postgres)")
+        self.host = User.objects.create_host(
+            email="host@example.com",
+            password="hostpass123",
+            username="hostuser",
+            phone="1234567890",
+        )
+        self.guests = [
+            User.objects.create_user(
+                email=f"guest{i}@example.com",
+                password="guestpass123",
+                username=f"guest{i}",
+                phone="1234567890",
+            )
+            for i in range(self.workers)
+        ]
+        self.listing = Listings.objects.create(
+            host=self.host,
+            title="Popular Listing",
+            description="Everyone wants it",
+            address="1 Busy Street",
+            country="India",
+            city="Goa",
+            property_type="villa",
+            max_guests=4,
+            bedrooms=2,
+            beds=2,
+            bathrooms=1.0,
+            price_per_night=Decimal("80.00"),
+        )
+        self.base_date = timezone.localdate() + timedelta(days=30)
+
+    def run_workers(self, ranges_for_worker):
+        results = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.workers)
+
+        def worker(index):
+            client = APIClient()
+            client.force_authenticate(self.guests[index])
+            barrier.wait()
+            try:
+                for start_date, end_date in ranges_for_worker(index):
+                    try:
+                        res = client.post(
+                            CREATE_BOOKING_URL,
+                            {
+                                "listing": self.listing.id,
+                                "start_date": start_date.isoformat(),
+                                "end_date": end_date.isoformat(),
+                            },
+                        )
+                        outcome = res.status_code
+                    except OperationalError:
+                        # SQLite serialises writers; a busy timeout is a lost race, not a booking.
+                        outcome = "locked"
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def assert_no_double_booking(self):
+        nights = Counter(
+            BookedNight.objects.filter(listing=self.listing).values_list("night", flat=True)
+        )
+        self.assertTrue(all(count == 1 for count in nights.values()))
+
+        live = list(
+            Bookings.objects.filter(listing=self.listing).filter(Bookings.active_reservation_q())
+        )
+        for booking in live:
+            self.assertEqual(
+                booking.booked_nights.count(),
+                (booking.end_date - booking.start_date).days,
+            )
+        for i, first in enumerate(live):
+            for second in live[i + 1:]:
+                overlaps = first.start_date < second.end_date and second.start_date < first.end_date
+                self.assertFalse(overlaps, f"{first.id} overlaps {second.id}")
+
+    def test_overlapping_requests_yield_single_winner(self):
+        start_date = self.base_date
+        end_date = start_date + timedelta(days=3)
+
+        results = self.run_workers(
+            lambda index: [(start_date, end_date)] * self.attempts_per_worker
+        )
+
+        self.assertEqual(results[status.HTTP_201_CREATED], 1)
+        self.assertEqual(
+            Bookings.objects.filter(listing=self.listing).count(),
+            1,
+        )
+        self.assert_no_double_booking()
+
+    def test_disjoint_requests_do_not_block_each_other(self):
+        def ranges(index):
+            first = self.base_date + timedelta(days=index * self.attempts_per_worker * 2)
+            return [
+                (first + timedelta(days=2 * n), first + timedelta(days=2 * n + 1))
+                for n in range(self.attempts_per_worker)
+            ]
+
+        results = self.run_workers(ranges)
+
+        # Every attempt must succeed; a lost writer lock would block a booking that takes no taken night.
+        self.assertEqual(results, Counter({status.HTTP_201_CREATED: self.workers * self.attempts_per_worker}))
+        self.assertEqual(
+            BookedNight.objects.filter(listing=self.listing).count(),
+            results[status.HTTP_201_CREATED],
+        )
+        self.assert_no_double_booking()
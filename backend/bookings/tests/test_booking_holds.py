@@ -1,5 +1,8 @@
 from datetime import timedelta
 from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import IntegrityError
 
 from django.test import TestCase
 from django.urls import reverse
@@ -7,7 +10,7 @@ from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from bookings.models import Bookings
+from bookings.models import BookedNight, Bookings
 from listings.models import Listings
 from users.models import User
 
@@ -82,6 +85,25 @@ class BookingHoldTests(TestCase):
         )
         self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_losing_the_race_for_nights_is_a_conflict(self):
+        self.client.force_authenticate(self.guest_one)
+        payload = {"listing": self.listing.id, "start_date": self.start_date, "end_date": self.end_date}
+        self.assertEqual(self.client.post(CREATE_BOOKING_URL, payload).status_code, status.HTTP_201_CREATED)
+
+        # Both requests pass validation; the second one's night claims then fail.
+        self.client.force_authenticate(self.guest_two)
+        with patch.object(Bookings, "conflicting_reservations", return_value=Bookings.objects.none()):
+            res = self.client.post(CREATE_BOOKING_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Bookings.objects.filter(listing=self.listing).count(), 1)
+
+    def test_other_integrity_errors_are_not_conflicts(self):
+        self.client.force_authenticate(self.guest_one)
+        payload = {"listing": self.listing.id, "start_date": self.start_date, "end_date": self.end_date}
+        with patch.object(BookedNight, "release_expired", side_effect=IntegrityError("FOREIGN KEY constraint failed")):
+            with self.assertRaises(IntegrityError):
+                self.client.post(CREATE_BOOKING_URL, payload)
+
     def test_expired_pending_hold_does_not_block(self):
         Bookings.objects.create(
             guest=self.guest_one,
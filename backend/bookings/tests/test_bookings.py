@@ -2,6 +2,8 @@ from decimal import Decimal
 
 from django.test import TestCase
 
+from django.core.cache import cache
+
 from listings.models import Listings
 
 from bookings.models import Bookings
@@ -168,6 +170,26 @@ class BookingTest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_booking_rejects_zero_nights(self):
+
+        listing = self.create_sample_listing(self.host)
+
+        payload = {
+
+                "listing": listing.id,
+
+                "start_date": d1,
+
+                "end_date": d1,
+
+        }
+
+        res = self.client.post(CREATE_BOOKING_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertIn("End date must be after start date", str(res.data))
+
     def test_no_creation_without_phone_number(self):
 
         user_no_phone = User.objects.create_user(
@@ -343,6 +365,55 @@ class BookingTest(TestCase):
 
         self.assertEqual(res.data["results"][0]['id'], booking1.id)
 
+    def test_booking_list_sparse_fields_and_expand(self):
+
+        # Cards are cached by listing id, which the test database reuses.
+        cache.clear()
+
+        listing = self.create_sample_listing(self.host, "Sparse")
+
+        booking = Bookings.objects.create(
+
+            guest=self.user,
+
+            listing=listing,
+
+            start_date=d1,
+
+            end_date=d2,
+
+            total_price=Decimal("500.00"),
+
+            status=Bookings.STATUS_CONFIRMED,
+
+        )
+
+        res = self.client.get(RETRIVE_BOOKINGS_LIST, {"fields": "id,listing.title,listing.host"})
+
+        self.assertEqual(res.data["results"], [
+
+            {"id": booking.id, "listing": {"title": listing.title, "host": {"username": "hostuser", "avatar": None}}},
+
+        ])
+
+        res = self.client.get(RETRIVE_BOOKINGS_LIST, {"fields": "id,guest,listing,status", "expand": ""})
+
+        self.assertEqual(res.data["results"], [
+
+            {"id": booking.id, "guest": self.user.id, "listing": listing.id, "status": Bookings.STATUS_CONFIRMED},
+
+        ])
+
+        res = self.client.get(RETRIVE_BOOKINGS_LIST, {"expand": "listing"})
+
+        self.assertEqual(res.data["results"][0]["listing"]["host"], self.host.id)
+
+        self.assertEqual(res.data["results"][0]["guest"], self.user.id)
+
+        res = self.client.get(RETRIVE_BOOKINGS_LIST)
+
+        self.assertEqual(res.data["results"][0]["listing"]["host"]["username"], "hostuser")
+
     def test_host_can_only_view_reservations_for_own_listings(self):
         own_listing = self.create_sample_listing(self.host, "Host Reservation")
         other_host = User.objects.create_host(
@@ -23,21 +23,21 @@ from django.utils.decorators import method_decorator
 from rest_framework import generics, status
 
 from rest_framework.views import APIView
-from rest_framework.throttling import ScopedRateThrottle
 
 from rest_framework.response import Response
 
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
 from cashfree_pg.api_client import Cashfree
 
 from cashfree_pg.models.create_order_request import CreateOrderRequest
 
 from users.base_views import AuthAPIView
+from conf.fieldsets import SPARSE_PARAMETERS, field_selection
 from conf.pagination import BookingsPagination
-from listings.models import Listings
+from conf.throttling import ScopedRateThrottle
 
-from .models import Bookings, Payment
+from .models import Bookings, BookedNight, NightsTaken, Payment
 
 from .serializers import (
     BookingSerializer,
@@ -88,28 +88,31 @@ class BookingCreateView(AuthAPIView, generics.CreateAPIView):
         start_date = serializer.validated_data["start_date"]
         end_date = serializer.validated_data["end_date"]
 
-        with transaction.atomic():
-            Listings.objects.select_for_update().get(id=listing.id)
-            if Bookings.conflicting_reservations(
-                listing=listing,
-                start_date=start_date,
-                end_date=end_date,
-                at_time=timezone.now(),
-            ).exists():
-                return Response(
-                    {"error": "Listing is temporarily unavailable for this period"},
-                    status=status.HTTP_409_CONFLICT,
+        # Nights are claimed through the BookedNight (listing, night) unique
+        # constraint, so only requests for overlapping dates contend.
+        try:
+            with transaction.atomic():
+                BookedNight.release_expired(
+                    listing=listing,
+                    start_date=start_date,
+                    end_date=end_date,
+                    at_time=timezone.now(),
                 )
-
-            booking = serializer.save(
-                guest=request.user,
-                status=Bookings.STATUS_PENDING,
+                booking = serializer.save(
+                    guest=request.user,
+                    status=Bookings.STATUS_PENDING,
+                )
+        except NightsTaken:
+            return Response(
+                {"error": "Listing is temporarily unavailable for this period"},
+                status=status.HTTP_409_CONFLICT,
             )
 
         output = self.get_serializer(booking)
         headers = self.get_success_headers(output.data)
         return Response(output.data, status=status.HTTP_201_CREATED, headers=headers)
 
+@extend_schema_view(get=extend_schema(parameters=SPARSE_PARAMETERS))
 class BookingListView(AuthAPIView, generics.ListAPIView):
 
     serializer_class = ViewBookingSerializer
@@ -123,14 +126,14 @@ class BookingListView(AuthAPIView, generics.ListAPIView):
 
              return Bookings.objects.none()
 
-        return Bookings.objects.filter(
+        queryset = Bookings.objects.filter(
             guest=self.request.user,
             status__in=[Bookings.STATUS_CONFIRMED],
-        ).select_related(
-            "guest",
-            "listing",
-            "listing__host",
-        ).prefetch_related("listing__listingimages")
+        )
+
+        # Join only the relations the requested fields render.
+        related = field_selection(self.request).relations("guest", "listing")
+        return queryset.select_related(*related) if related else queryset
 
 
 class HostBookingListView(AuthAPIView, generics.ListAPIView):
@@ -154,8 +157,7 @@ class HostBookingListView(AuthAPIView, generics.ListAPIView):
                     Bookings.STATUS_ONGOING,
                 ],
             )
-            .select_related("guest", "listing", "listing__host")
-            .prefetch_related("listing__listingimages")
+            .select_related("guest", "listing")
             .order_by("start_date", "-created_at")
         )
 
@@ -5,6 +5,8 @@ from channels.db import database_sync_to_async
 from django.db.models import Q
 from redis.exceptions import RedisError
 
+from conf.db_router import pin_to_primary
+
 from .models import Message, Room
 
 
@@ -83,3 +85,5 @@ class ChatConsumer(AsyncWebsocketConsumer):
             id=room_id,
         ).get()
         Message.objects.create(room=room, user=user, content=content)
+        # Both members may reload the history right away; read it from the primary.
+        pin_to_primary(room.host_id, room.guest_id)
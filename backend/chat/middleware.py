@@ -1,18 +1,14 @@
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
 from urllib.parse import parse_qs
 
-User = get_user_model()
+from users.authentication import cached_user
 
 
 @database_sync_to_async
 def get_user(validated_token):
-    try:
-        return User.objects.get(id=validated_token["user_id"])
-    except User.DoesNotExist:
-        return AnonymousUser()
+    return cached_user(validated_token["user_id"]) or AnonymousUser()
 
 
 class JWTAuthMiddleware:
@@ -2,9 +2,11 @@ from rest_framework import serializers
 
 from .models import Room, Message
 
-from listings.serializers import ListingSerializer
+from listings.serializers import ListingSerializer, NestedListingCardListSerializer
 from users.serializers import UserSerializer
 
+from conf.fieldsets import SparseFieldsetMixin
+
 
 class MessageSerializer(serializers.ModelSerializer):
 
@@ -16,7 +18,9 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ("room", "user", "created_at", "updated_at")
 
 
-class RoomSerializer(serializers.ModelSerializer):
+class RoomSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+
+    expandable_fields = ("listing", "host", "guest")
 
     host = UserSerializer(read_only=True)
     guest = UserSerializer(read_only=True)
@@ -38,6 +42,7 @@ class RoomSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = fields
+        list_serializer_class = NestedListingCardListSerializer
 
     def get_last_message(self, obj):
         last_message_id = getattr(obj, "last_message_id", None)
@@ -1,7 +1,9 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from chat.models import Message, Room
 from listings.models import Listings
@@ -142,6 +144,26 @@ class PrivateChatRoomTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"][0]["last_message"]["content"], "Latest msg")
 
+    def test_room_list_sparse_fields_skip_unused_work(self):
+        room = Room.objects.create(
+            listing=self.listing,
+            host=self.host,
+            guest=self.guest,
+        )
+        Message.objects.create(room=room, user=self.host, content="Hello")
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ROOM_LIST_URL, {"fields": "id,listing,host.username", "expand": ""})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"][0],
+            {"id": room.id, "listing": self.listing.id, "host": {"username": self.host.username}},
+        )
+        room_query = next(q["sql"] for q in queries if 'FROM "chat_room"' in q["sql"] and "COUNT" not in q["sql"])
+        self.assertNotIn("chat_message", room_query)
+        self.assertNotIn("listings_listings", room_query)
+
 
 class PrivateChatMessageTests(TestCase):
 
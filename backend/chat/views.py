@@ -1,12 +1,14 @@
 from django.db.models import Q, OuterRef, Subquery
 from rest_framework import generics, permissions, status
-from rest_framework.throttling import ScopedRateThrottle
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import CachedJWTAuthentication
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
 from listings.models import Listings
+from conf.fieldsets import SPARSE_PARAMETERS, field_selection
 from conf.pagination import ChatRoomsPagination, ChatMessagesPagination
+from conf.throttling import ScopedRateThrottle
 
 from .models import Room, Message
 
@@ -15,7 +17,7 @@ from .serializers import RoomSerializer, MessageSerializer
 
 class BaseAuthenticatedView:
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     permission_classes = [permissions.IsAuthenticated]
 
@@ -50,22 +52,30 @@ class ListingRoomCreateView(BaseAuthenticatedView, generics.GenericAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@extend_schema_view(get=extend_schema(parameters=SPARSE_PARAMETERS))
 class RoomListView(BaseAuthenticatedView, generics.ListAPIView):
 
     serializer_class = RoomSerializer
     pagination_class = ChatRoomsPagination
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = "chat_rooms_list"
+    read_from_replica = True
 
     def get_queryset(self):
         if getattr(self, "swagger_fake_view", False) or self.request.user.is_anonymous:
             return Room.objects.none()
-        last_message_queryset = Message.objects.filter(room_id=OuterRef("pk")).order_by("-created_at")
-        return (
-            Room.objects
-            .select_related("listing", "listing__host", "host", "guest")
-            .prefetch_related("listing__listingimages")
-            .annotate(
+
+        # Only join and annotate what the requested fields render.
+        selection = field_selection(self.request)
+        related = set(selection.relations("listing", "host", "guest"))
+        if selection.includes("other_user"):
+            related |= {"host", "guest"}
+        # select_related() without names would follow every relation.
+        queryset = Room.objects.select_related(*sorted(related)) if related else Room.objects.all()
+
+        if selection.includes("last_message"):
+            last_message_queryset = Message.objects.filter(room_id=OuterRef("pk")).order_by("-created_at")
+            queryset = queryset.annotate(
                 last_message_id=Subquery(last_message_queryset.values("id")[:1]),
                 last_message_content=Subquery(last_message_queryset.values("content")[:1]),
                 last_message_created_at=Subquery(last_message_queryset.values("created_at")[:1]),
@@ -74,8 +84,7 @@ class RoomListView(BaseAuthenticatedView, generics.ListAPIView):
                 last_message_username=Subquery(last_message_queryset.values("user__username")[:1]),
                 last_message_user_email=Subquery(last_message_queryset.values("user__email")[:1]),
             )
-            .filter(Q(host=self.request.user) | Q(guest=self.request.user))
-        )
+        return queryset.filter(Q(host=self.request.user) | Q(guest=self.request.user))
 
 
 class MessageListView(BaseAuthenticatedView, generics.ListAPIView):
@@ -84,6 +93,7 @@ class MessageListView(BaseAuthenticatedView, generics.ListAPIView):
     pagination_class = ChatMessagesPagination
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = "chat_messages_list"
+    read_from_replica = True
 
     def get_queryset(self):
         room_id = self.kwargs.get("room_id")
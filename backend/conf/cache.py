@@ -0,0 +1,374 @@
+"""
+Two-tier cache: a bounded in-process LRU in front of a shared cache.
+
+``TieredCache`` is a Django cache backend. Reads are answered from a small
+per-process LRU when possible and otherwise from the shared alias named by
+``LOCATION`` (Redis in production, local memory in tests and development);
+shared hits are kept locally for at most ``LOCAL_TIMEOUT`` seconds. Writes go
+to both tiers, and ``add``/``incr``/``decr`` go straight to the shared tier
+and drop the local copy. Other processes therefore see a change within
+``LOCAL_TIMEOUT``; key prefixes listed in ``LOCAL_BYPASS`` are never kept
+locally. Local values are pickled like the local-memory backend does, so
+callers never share mutable objects.
+
+``remember`` builds cached values on top of any backend: keys carry the
+generations of their tags (``invalidate`` bumps them), entries are refreshed
+early with probability rising towards their expiry (XFetch), and only the
+worker holding a key's lock recomputes it while the others serve the stale
+copy or, for a cold key, wait briefly for it. Values are computed from the
+primary database and tags are bumped once the current transaction commits,
+so a lagging replica or an uncommitted write never ends up cached under the
+new generation.
+
+Hit and miss counts per key namespace are flushed to the shared tier every
+``STATS_INTERVAL`` seconds; ``manage.py cache_stats`` reports them.
+"""
+
+import hashlib
+import logging
+import math
+import pickle
+import random
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import transaction
+
+from conf.db_router import primary_reads
+from conf.generations import bump_generation, get_generations
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TIMEOUT = 5
+
+STATS_INTERVAL = 10
+
+STATS_PREFIX = "cache:stats"
+
+STATS_NAMESPACES = f"{STATS_PREFIX}:namespaces"
+
+STATS_METRICS = ("local_hits", "shared_hits", "misses", "recomputes", "early_refreshes")
+
+STALE_GRACE = 30
+
+LOCK_TTL = 10
+
+LOCK_WAIT = 2.0
+
+EARLY_REFRESH_BETA = 1.0
+
+NAMESPACE = re.compile(r"[a-z]+")
+
+# Process-wide state per LOCATION: Django builds a backend instance per thread and context.
+_stores = {}
+
+_stores_lock = threading.Lock()
+
+
+def namespace(key):
+    match = NAMESPACE.match(key)
+    return match.group() if match else "other"
+
+
+class LocalStore:
+    """Thread-safe LRU of pickled values with per-entry expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, pickled, timeout):
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class Stats:
+    """Per-process hit counters, added to shared totals now and then."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.flushed_at = time.monotonic()
+        self.namespaces = set()
+
+    def record(self, key, metric, shared):
+        with self.lock:
+            self.counts[namespace(key), metric] += 1
+            if time.monotonic() - self.flushed_at < STATS_INTERVAL:
+                return
+            counts, self.counts = self.counts, Counter()
+            self.flushed_at = time.monotonic()
+            self.namespaces.update(space for space, _ in counts)
+            namespaces = set(self.namespaces)
+
+        try:
+            for (space, name), count in counts.items():
+                stats_key = f"{STATS_PREFIX}:{space}:{name}"
+                shared.add(stats_key, 0, None)
+                shared.incr(stats_key, count)
+            # Read-modify-write; a lost update is repaired by the next flush.
+            known = shared.get(STATS_NAMESPACES, set())
+            if not namespaces <= known:
+                shared.set(STATS_NAMESPACES, known | namespaces, None)
+        except Exception as e:
+            # Metrics must never fail the request that happened to flush them.
+            logger.warning(f"Could not flush cache stats: {e}")
+
+
+def _store(location, max_entries):
+    with _stores_lock:
+        if location not in _stores:
+            _stores[location] = (LocalStore(max_entries), Stats())
+        return _stores[location]
+
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend; ``LOCATION`` names the shared cache alias.
+
+    OPTIONS: ``MAX_ENTRIES`` bounds the local LRU, ``LOCAL_TIMEOUT`` caps how
+    long a value is served locally and ``LOCAL_BYPASS`` lists key prefixes
+    that are never kept locally.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = location
+        self.local_timeout = options.get("LOCAL_TIMEOUT", LOCAL_TIMEOUT)
+        self.local_bypass = tuple(options.get("LOCAL_BYPASS", ()))
+        self.local, self.stats = _store(location, self._max_entries)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def is_local(self, key):
+        return self.local_timeout > 0 and not key.startswith(self.local_bypass)
+
+    def remember_locally(self, key, value, version, timeout):
+        if timeout is None or timeout is DEFAULT_TIMEOUT:
+            timeout = self.local_timeout
+        timeout = min(timeout, self.local_timeout)
+        local_key = self.make_and_validate_key(key, version)
+        if timeout > 0:
+            self.local.set(local_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), timeout)
+        else:
+            self.local.discard(local_key)
+
+    def forget_locally(self, key, version):
+        self.local.discard(self.make_and_validate_key(key, version))
+
+    def get(self, key, default=None, version=None):
+        if self.is_local(key):
+            pickled = self.local.get(self.make_and_validate_key(key, version))
+            if pickled is not None:
+                self.stats.record(key, "local_hits", self.shared)
+                return pickle.loads(pickled)
+
+        # Tells a missing key from a stored None.
+        missing = object()
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            self.stats.record(key, "misses", self.shared)
+            return default
+
+        self.stats.record(key, "shared_hits", self.shared)
+        if self.is_local(key):
+            self.remember_locally(key, value, version, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remaining = []
+        for key in keys:
+            pickled = self.local.get(self.make_and_validate_key(key, version)) if self.is_local(key) else None
+            if pickled is None:
+                remaining.append(key)
+            else:
+                self.stats.record(key, "local_hits", self.shared)
+                found[key] = pickle.loads(pickled)
+
+        if remaining:
+            shared = self.shared.get_many(remaining, version=version)
+            for key in remaining:
+                if key in shared:
+                    self.stats.record(key, "shared_hits", self.shared)
+                    if self.is_local(key):
+                        self.remember_locally(key, shared[key], version, self.local_timeout)
+                else:
+                    self.stats.record(key, "misses", self.shared)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        if self.is_local(key):
+            self.remember_locally(key, value, version, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key in failed or not self.is_local(key):
+                self.forget_locally(key, version)
+            else:
+                self.remember_locally(key, value, version, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.forget_locally(key, version)
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.forget_locally(key, version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.forget_locally(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.forget_locally(key, version)
+        return self.shared.decr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        if self.is_local(key) and self.local.get(self.make_and_validate_key(key, version)) is not None:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self.forget_locally(key, version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.forget_locally(key, version)
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+def tagged_key(key, tags):
+    if not tags:
+        return key
+    generations = get_generations(list(tags))
+    return f"{key}:{hashlib.sha1(repr(generations).encode()).hexdigest()[:16]}"
+
+
+def record(key, metric):
+    """Count ``metric`` for ``key`` when the default cache keeps stats."""
+    backend = caches["default"]
+    if isinstance(backend, TieredCache):
+        backend.stats.record(key, metric, backend.shared)
+
+
+def expired(entry, now, beta):
+    """XFetch: expire early, more likely the closer and the slower to compute the entry is."""
+    return now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["expires"]
+
+
+def remember(key, compute, timeout, tags=(), stale=STALE_GRACE, beta=EARLY_REFRESH_BETA):
+    """
+    Cached result of ``compute()``, fresh for ``timeout`` seconds.
+
+    ``tags`` name generation counters the value depends on; ``invalidate``
+    bumps them. Past ``timeout`` the entry is still served for ``stale``
+    seconds while one worker recomputes it.
+    """
+    key = tagged_key(key, tags)
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None and not expired(entry, now, beta):
+        return entry["value"]
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, LOCK_TTL):
+        try:
+            record(key, "early_refreshes" if entry is not None and entry["expires"] > now else "recomputes")
+            started = time.time()
+            with primary_reads():
+                value = compute()
+            finished = time.time()
+            cache.set(
+                key,
+                {"value": value, "expires": finished + timeout, "delta": finished - started},
+                timeout + stale,
+            )
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    if entry is not None:
+        return entry["value"]
+
+    deadline = now + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+
+    # The lock holder is slow or gone; answer this request without caching.
+    return compute()
+
+
+def invalidate(*tags):
+    """Bump ``tags`` once the current transaction (if any) commits."""
+    def bump():
+        for tag in tags:
+            bump_generation(tag)
+
+    transaction.on_commit(bump)
+
+
+def shared_backend():
+    backend = caches["default"]
+    return backend.shared if isinstance(backend, TieredCache) else backend
+
+
+def cache_stats():
+    """Shared totals as ``{namespace: {metric: count}}``."""
+    shared = shared_backend()
+    namespaces = sorted(shared.get(STATS_NAMESPACES, set()))
+    keys = [f"{STATS_PREFIX}:{space}:{metric}" for space in namespaces for metric in STATS_METRICS]
+    counts = shared.get_many(keys)
+    return {
+        space: {metric: counts.get(f"{STATS_PREFIX}:{space}:{metric}", 0) for metric in STATS_METRICS}
+        for space in namespaces
+    }
+
+
+def reset_cache_stats():
+    shared = shared_backend()
+    namespaces = shared.get(STATS_NAMESPACES, set())
+    shared.delete_many([f"{STATS_PREFIX}:{space}:{metric}" for space in namespaces for metric in STATS_METRICS])
+    shared.delete(STATS_NAMESPACES)
@@ -3,48 +3,57 @@ import os
 
 logger = logging.getLogger(__name__)
 
-def delete_cloudinary_asset(image_field_or_url):
+def cloudinary_public_id(image_field_or_url):
     """
-    Safely deletes an asset from Cloudinary storage if configured.
+    Public id of a Cloudinary asset, or None.
     Accepts a CloudinaryResource object, an ImageFieldFile, or a URL string.
     """
     if not image_field_or_url:
+        return None
+
+    # 1. Check if the object has a public_id attribute (CloudinaryResource)
+    if hasattr(image_field_or_url, 'public_id') and image_field_or_url.public_id:
+        return str(image_field_or_url.public_id)
+
+    if isinstance(image_field_or_url, str):
+        # 2. Extract public_id from Cloudinary URL
+        if 'cloudinary.com' in image_field_or_url:
+            parts = image_field_or_url.split('/upload/')
+            if len(parts) > 1:
+                path_after_upload = parts[1]
+                segments = path_after_upload.split('/')
+                # Ignore Cloudinary transformation parameters / version (e.g. v1234567)
+                valid_segments = []
+                for seg in segments:
+                    if seg.startswith('v') and seg[1:].isdigit():
+                        continue
+                    if '=' in seg or ',' in seg:
+                        continue  # skip transformation params like c_fill,w_300
+                    valid_segments.append(seg)
+
+                file_with_ext = '/'.join(valid_segments)
+                return os.path.splitext(file_with_ext)[0]
+            return None
+
+        # Direct public_id string without URL prefix
+        return os.path.splitext(image_field_or_url)[0]
+
+    return None
+
+
+def queue_cloudinary_deletion(image_field_or_url):
+    """
+    Queue an asset for deletion by users.tasks.drain_cloudinary_deletions.
+
+    The queue row joins the caller's transaction, so the asset is only
+    deleted if the change that orphaned it commits.
+    """
+    public_id = cloudinary_public_id(image_field_or_url)
+    if not public_id:
         return
 
-    try:
-        import cloudinary.uploader
-        
-        public_id = None
-        
-        # 1. Check if the object has a public_id attribute (CloudinaryResource)
-        if hasattr(image_field_or_url, 'public_id') and image_field_or_url.public_id:
-            public_id = str(image_field_or_url.public_id)
-        elif isinstance(image_field_or_url, str):
-            # 2. Extract public_id from Cloudinary URL
-            if 'cloudinary.com' in image_field_or_url:
-                parts = image_field_or_url.split('/upload/')
-                if len(parts) > 1:
-                    path_after_upload = parts[1]
-                    segments = path_after_upload.split('/')
-                    # Ignore Cloudinary transformation parameters / version (e.g. v1234567)
-                    valid_segments = []
-                    for seg in segments:
-                        if seg.startswith('v') and seg[1:].isdigit():
-                            continue
-                        if '=' in seg or ',' in seg:
-                            continue  # skip transformation params like c_fill,w_300
-                        valid_segments.append(seg)
-                    
-                    file_with_ext = '/'.join(valid_segments)
-                    public_id = os.path.splitext(file_with_ext)[0]
-            else:
-                # Direct public_id string without URL prefix
-                public_id = os.path.splitext(image_field_or_url)[0]
-
-        if public_id:
-            res = cloudinary.uploader.destroy(public_id)
-            logger.info(f"Cloudinary asset destroyed: {public_id} (result: {res})")
-            return res
-    except Exception as e:
-        logger.warning(f"Could not delete Cloudinary asset ({image_field_or_url}): {e}")
-        return None
+    from users.models import CloudinaryDeletion
+
+    resource_type = getattr(image_field_or_url, 'resource_type', None) or 'image'
+    CloudinaryDeletion.objects.create(public_id=public_id, resource_type=resource_type)
+    logger.info(f"Cloudinary asset queued for deletion: {public_id}")
@@ -0,0 +1,29 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+
+def make_etag(*parts):
+    """Strong ETag value from the parts that determine a representation."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_get(validators):
+    """
+    Decorate a view's ``get`` with Django's ``condition``.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag, last_modified)``,
+    or ``None`` when the object doesn't exist so the view can answer 404 itself.
+    It is evaluated once per request, so both headers come from one query and a
+    matching ``If-None-Match`` returns 304 before the view body runs.
+    """
+
+    def resolve(request, *args, **kwargs):
+        if not hasattr(request, "_conditional_validators"):
+            request._conditional_validators = validators(request, *args, **kwargs) or (None, None)
+        return request._conditional_validators
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: resolve(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: resolve(request, *args, **kwargs)[1],
+    )
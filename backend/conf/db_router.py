@@ -0,0 +1,125 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only while a view that sets ``read_from_replica = True``
+handles a safe (GET/HEAD/OPTIONS) request; everything else, including Celery
+tasks, management commands and all writes, uses ``default``.
+
+After a write its author reads from the primary for READ_YOUR_WRITES_SECONDS,
+so they see their own writes despite replication lag. Authenticated users are
+pinned through a key in the shared cache under their user id, which the JWT
+of every later request identifies; writes made outside HTTP (chat messages
+over the websocket) call ``pin_to_primary`` themselves. Anonymous clients get
+a short-lived cookie instead.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+PIN_COOKIE = "primary_pin"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def pin_key(user_id):
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(*user_ids):
+    """Send the reads of these users to the primary for READ_YOUR_WRITES_SECONDS."""
+    cache.set_many({pin_key(user_id): 1 for user_id in user_ids}, settings.READ_YOUR_WRITES_SECONDS)
+
+
+def token_user_id(request):
+    """User id in the request's JWT, without loading the user; None if there is no valid token."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    user_id = token_user_id(request)
+    return user_id is not None and cache.get(pin_key(user_id)) is not None
+
+
+@contextmanager
+def primary_reads():
+    """Read from ``default`` inside the block, even in a replica-routed view."""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and replicas():
+            return random.choice(replicas())
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS:
+            # DRF puts the user it authenticated on the underlying request.
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, "read_from_replica", False)
+            and not is_pinned(request)
+        ):
+            _use_replica.set(True)
+        return None
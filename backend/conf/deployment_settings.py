@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'conf.db_router.ReplicaRoutingMiddleware',
 ]
 
 STORAGES = {
@@ -52,6 +53,12 @@ DATABASES = {
     )
 }
 
+# Comma-separated replica URLs, exposed as replica_0, replica_1, ...
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(','))):
+    DATABASES[f"replica_{index}"] = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+
 if os.environ.get("REDIS_URL"):
     CHANNEL_LAYERS = {
         "default": {
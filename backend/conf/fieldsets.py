@@ -0,0 +1,169 @@
+"""
+Sparse fieldsets and expansion control for read endpoints.
+
+``?fields=id,listing.title`` keeps only the named fields; a dotted path selects
+inside a nested object. ``?expand=listing`` renders the named relations of a
+serializer's ``expandable_fields`` as nested objects and the others as their
+primary key. Without either parameter responses are unchanged.
+
+Serializers opt in with ``SparseFieldsetMixin``; views ask ``field_selection``
+which relations the response needs so they only join and prefetch those.
+"""
+
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+SPARSE_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description="Comma-separated fields to return; use dots for nested fields, e.g. id,listing.title",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="expand",
+        description="Comma-separated relations to render as objects; other relations are returned as ids",
+        required=False,
+        type=str,
+    ),
+]
+
+
+def parse_paths(value):
+    """``"a,b.c"`` as the tree ``{"a": {}, "b": {"c": {}}}``."""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for part in path.strip().split("."):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class FieldSelection:
+    """The requested ``fields`` and ``expand`` trees; None means not restricted."""
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields
+        self.expand = expand
+
+    @property
+    def is_default(self):
+        return self.fields is None and self.expand is None
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        # Selecting fields inside a relation implies expanding it.
+        if self.fields and self.fields.get(name):
+            return True
+        return self.expand is None or name in self.expand
+
+    def needs(self, name):
+        """Whether the response renders relation ``name`` as an object."""
+        return self.includes(name) and self.expands(name)
+
+    def relations(self, *names):
+        return [name for name in names if self.needs(name)]
+
+    def child(self, name):
+        fields = (self.fields.get(name) or None) if self.fields is not None else None
+        expand = self.expand.get(name, {}) if self.expand is not None else None
+        return FieldSelection(fields, expand)
+
+
+DEFAULT_SELECTION = FieldSelection()
+
+
+def field_selection(request):
+    """Selection requested by ``request``; only reads are narrowed."""
+    if request is None or request.method not in ("GET", "HEAD"):
+        return DEFAULT_SELECTION
+    if not hasattr(request, "_field_selection"):
+        params = request.query_params
+        request._field_selection = FieldSelection(
+            parse_paths(params["fields"]) if "fields" in params else None,
+            parse_paths(params["expand"]) if "expand" in params else None,
+        )
+    return request._field_selection
+
+
+def project(data, selection):
+    """Apply ``selection``'s fields to already rendered ``data``."""
+    if selection.fields is None:
+        return data
+    if isinstance(data, list):
+        return [project(item, selection) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {name: project(value, selection.child(name)) for name, value in data.items() if name in selection.fields}
+
+
+class SparseFieldsetMixin:
+    """
+    Narrow a serializer to the request's ``fields`` and ``expand``.
+
+    Relations in ``expandable_fields`` collapse to their primary key unless
+    expanded. Serializers that must render every field (a shared cache, say)
+    set ``sparse_by_projection`` and call ``project_representation`` on the
+    finished output instead.
+    """
+
+    expandable_fields = ()
+
+    sparse_by_projection = False
+
+    @property
+    def selection(self):
+        if hasattr(self, "_selection"):
+            return self._selection
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return DEFAULT_SELECTION
+        return field_selection(self.context.get("request"))
+
+    def collapsed(self, name, field):
+        kwargs = {"source": field.source} if field.source and field.source != name else {}
+        return serializers.PrimaryKeyRelatedField(read_only=True, many=isinstance(field, serializers.ListSerializer), **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.selection
+        if selection.is_default or self.sparse_by_projection:
+            return fields
+
+        for name, field in list(fields.items()):
+            if not selection.includes(name):
+                del fields[name]
+            elif name in self.expandable_fields and not selection.expands(name):
+                fields[name] = self.collapsed(name, field)
+            else:
+                nested = field.child if isinstance(field, serializers.ListSerializer) else field
+                if isinstance(nested, SparseFieldsetMixin):
+                    nested._selection = selection.child(name)
+        return fields
+
+    def project_representation(self, data, instance):
+        selection = self.selection
+        if selection.is_default:
+            return data
+        projected = {}
+        for name, value in data.items():
+            if not selection.includes(name):
+                continue
+            if name in self.expandable_fields and not selection.expands(name):
+                value = instance.serializable_value(self.fields[name].source)
+            else:
+                value = project(value, selection.child(name))
+            projected[name] = value
+        return projected
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.sparse_by_projection or self.selection.is_default:
+            return data
+        # Nested serializers without the mixin are narrowed after rendering.
+        return {name: project(value, self.selection.child(name)) for name, value in data.items()}
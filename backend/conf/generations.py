@@ -0,0 +1,33 @@
+"""
+Generation counters for cache invalidation.
+
+A cache key embeds the current generation of whatever it depends on; bumping
+the generation orphans every entry built on the old value, which then simply
+expires. Counters are seeded from the clock so an evicted counter never comes
+back as a generation that is already in use.
+"""
+
+import time
+
+from django.core.cache import cache
+
+
+def get_generation(key):
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def bump_generation(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_generations(keys):
+    """Current generation of each key, read in one round trip."""
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
@@ -0,0 +1,87 @@
+"""
+JSON rendering and parsing with orjson.
+
+Drop-in replacements for DRF's JSONRenderer and JSONParser that produce the
+same bytes: anything orjson does not encode itself (Decimal, lazy strings,
+datetimes, timedeltas, ...) goes through DRF's own encoder, and ``\\u2028`` /
+``\\u2029`` are escaped the same way. Floats keep their value but are written
+in orjson's notation (``0.00001`` rather than ``1e-05``), and NaN or infinite
+floats become ``null`` instead of raising.
+
+Pretty-printed output, non UTF-8 request bodies, integers beyond 64 bits and
+anything orjson rejects fall back to the stdlib implementation, as does
+everything when orjson is not installed.
+"""
+
+import re
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UTF8 = {"utf-8", "utf8"}
+
+# orjson reads integers this long as floats; the stdlib keeps them exact.
+LONG_INTEGER = re.compile(rb"\d{19}")
+
+LINE_SEPARATORS = (("\u2028".encode(), b"\\u2028"), ("\u2029".encode(), b"\\u2029"))
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def __init__(self):
+        super().__init__()
+        self._default = self.encoder_class().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits or types only the stdlib path handles; it also raises the same errors.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
+
+
+class FastJSONParser(JSONParser):
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if not LONG_INTEGER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        # Let the stdlib decide, so errors and edge cases read exactly as before.
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(body.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -67,6 +67,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'conf.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'conf.urls'
@@ -92,9 +93,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # File-backed so threaded tests can share the test database.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # Local stand-in for a read replica. Nothing replicates into it, so it is
+    # only routed to when listed in DATABASE_REPLICAS (the router tests do).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db_replica.sqlite3',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['conf.db_router.ReplicaRouter']
+
+# Aliases that safe reads in views with read_from_replica = True may use.
+DATABASE_REPLICAS = [alias for alias in os.getenv("DATABASE_REPLICAS", "").split(",") if alias]
+
+# How long a client that just wrote keeps reading from the primary.
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
@@ -117,6 +139,28 @@ if os.getenv("REDIS_URL"):
         },
     }
 
+# "default" is a per-process LRU (conf.cache.TieredCache) in front of the "shared" cache:
+# Redis when REDIS_URL is set, otherwise process-local memory, which is also what tests use.
+CACHES = {
+    'default': {
+        'BACKEND': 'conf.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "5000")),
+            'LOCAL_TIMEOUT': int(os.getenv("LOCAL_CACHE_TIMEOUT", "5")),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+if os.getenv("REDIS_URL"):
+    CACHES['shared'] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -146,19 +190,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'users.User'
 
+# JSON goes through orjson (conf.renderers) unless FAST_JSON=0; output matches DRF's own renderer.
+FAST_JSON = os.getenv("FAST_JSON", "1") != "0"
+
+# Throttle counters (conf.throttling) are shared through Redis; without it each process counts alone.
+THROTTLE_REDIS_URL = os.getenv("REDIS_URL")
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'conf.renderers.FastJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'conf.renderers.FastJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'conf.pagination.DefaultPagePagination',
     'PAGE_SIZE': 20,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'conf.throttling.AnonRateThrottle',
+        'conf.throttling.UserRateThrottle',
     ),
     'DEFAULT_THROTTLE_RATES': {
         'anon': '120/min',
@@ -203,6 +262,22 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 MEDIA_URL = '/media/'
 
+# Listing image uploads are staged here until a Celery worker pushes them to
+# Cloudinary, so in production it must be a volume the workers can read.
+PENDING_IMAGE_ROOT = os.getenv("PENDING_IMAGE_ROOT", os.path.join(MEDIA_ROOT, 'pending'))
+
+# Uploads one task runs in parallel; each is a blocking HTTPS call.
+IMAGE_UPLOAD_CONCURRENCY = int(os.getenv("IMAGE_UPLOAD_CONCURRENCY", "4"))
+
+# Signed direct uploads go to Cloudinary when it is configured, otherwise to a
+# local stand-in under DIRECT_UPLOAD_ROOT that speaks the same protocol.
+DIRECT_UPLOAD_BACKEND = os.getenv(
+    "DIRECT_UPLOAD_BACKEND", "cloudinary" if os.getenv("CLOUDINARY_CLOUD_NAME") else "local"
+)
+DIRECT_UPLOAD_ROOT = os.getenv("DIRECT_UPLOAD_ROOT", os.path.join(MEDIA_ROOT, 'direct'))
+DIRECT_UPLOAD_URL = MEDIA_URL + 'direct/'
+DIRECT_UPLOAD_TTL = 60 * 10
+
 CASHFREE_APP_ID = os.getenv("CASHFREE_APP_ID")
 
 CASHFREE_SECRET_KEY = os.getenv("CASHFREE_SECRET_KEY")
@@ -231,4 +306,16 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'users.tasks.ping_health',
         'schedule': 45.0, # Every 45 seconds
     },
+    'refresh_listing_scores': {
+        'task': 'listings.tasks.refresh_listing_scores',
+        'schedule': 60.0 * 60, # Hourly
+    },
+    'retry_stale_image_uploads': {
+        'task': 'listings.tasks.retry_stale_image_uploads',
+        'schedule': 60.0 * 10, # Every 10 minutes
+    },
+    'drain_cloudinary_deletions': {
+        'task': 'users.tasks.drain_cloudinary_deletions',
+        'schedule': 60.0, # Every minute
+    },
 }
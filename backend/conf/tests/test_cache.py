@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from conf import cache as tiered
+from conf.cache import cache_stats, invalidate, remember
+
+CACHES = {
+    "default": {
+        "BACKEND": "conf.cache.TieredCache",
+        "LOCATION": "tests-shared",
+        "OPTIONS": {"MAX_ENTRIES": 3, "LOCAL_TIMEOUT": 60, "LOCAL_BYPASS": ("throttle_",)},
+    },
+    "tests-shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "conf-tests-shared",
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_local_tier_answers_until_the_key_is_written_here(self):
+        cache.set("listings:a", 1)
+        # Another process deleting the key is only seen once the local copy goes.
+        caches["tests-shared"].delete("listings:a")
+        self.assertEqual(cache.get("listings:a"), 1)
+
+        cache.delete("listings:a")
+        self.assertIsNone(cache.get("listings:a"))
+
+        caches["tests-shared"].set("listings:b", 2)
+        self.assertEqual(cache.get_many(["listings:a", "listings:b"]), {"listings:b": 2})
+        caches["tests-shared"].set("listings:b", 3)
+        self.assertEqual(cache.get("listings:b"), 2)
+
+    def test_counters_and_bypassed_keys_read_the_shared_tier(self):
+        cache.set("users:count", 1)
+        cache.incr("users:count")
+        self.assertEqual(cache.get("users:count"), 2)
+
+        cache.set("throttle_user_1", [1])
+        caches["tests-shared"].set("throttle_user_1", [1, 2])
+        self.assertEqual(cache.get("throttle_user_1"), [1, 2])
+
+    def test_local_values_are_copies_and_bounded(self):
+        cache.set("listings:card", {"title": "Flat"})
+        cache.get("listings:card")["title"] = "Changed"
+        self.assertEqual(cache.get("listings:card"), {"title": "Flat"})
+
+        for name in "abcd":
+            cache.set(f"listings:{name}", name)
+        self.assertEqual(len(caches["default"].local.entries), 3)
+
+
+@override_settings(CACHES=CACHES)
+class RememberTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tags_invalidate_entries(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(remember("listings:thing", compute, 60, tags=["listings:tag"]), 1)
+        self.assertEqual(remember("listings:thing", compute, 60, tags=["listings:tag"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate("listings:tag")
+            # Nothing changes for readers until the transaction commits.
+            self.assertEqual(remember("listings:thing", compute, 60, tags=["listings:tag"]), 1)
+        self.assertEqual(remember("listings:thing", compute, 60, tags=["listings:tag"]), 2)
+
+    def test_stale_entry_is_served_while_another_worker_recomputes(self):
+        cache.set("listings:stale", {"value": "old", "expires": 0, "delta": 0})
+        cache.add("listings:stale:lock", 1)
+
+        def fail():
+            raise AssertionError("recomputed while another worker holds the lock")
+
+        self.assertEqual(remember("listings:stale", fail, 60), "old")
+
+        cache.delete("listings:stale:lock")
+        self.assertEqual(remember("listings:stale", lambda: "new", 60), "new")
+
+    def test_slow_entries_are_refreshed_early(self):
+        remember("listings:slow", lambda: "old", 60)
+        entry = cache.get("listings:slow")
+        cache.set("listings:slow", dict(entry, delta=30))
+
+        # The largest draw: refresh as if the entry expired a few computations early.
+        with patch("conf.cache.random.random", return_value=0.999):
+            self.assertEqual(remember("listings:slow", lambda: "new", 60), "new")
+        with patch("conf.cache.random.random", return_value=0.0):
+            self.assertEqual(remember("listings:slow", lambda: "newer", 60), "new")
+
+    def test_hit_rates_are_reported(self):
+        with patch.object(tiered, "STATS_INTERVAL", 0):
+            remember("reviews:thing", lambda: 1, 60)
+            remember("reviews:thing", lambda: 1, 60)
+
+        stats = cache_stats()["reviews"]
+        self.assertGreaterEqual(stats["recomputes"], 1)
+        self.assertGreaterEqual(stats["local_hits"], 1)
+        self.assertGreaterEqual(stats["misses"], 1)
@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+
+from conf.cache import remember
+from conf.db_router import PIN_COOKIE, ReplicaRouter, _use_replica, pin_to_primary
+from listings.models import Listings
+from users.models import User
+
+
+LISTING_FIELDS = {
+    "description": "Routing test listing",
+    "address": "1 Router Road",
+    "country": "India",
+    "city": "Pune",
+    "property_type": "apartment",
+    "max_guests": 2,
+    "bedrooms": 1,
+    "beds": 1,
+    "bathrooms": Decimal("1.0"),
+    "price_per_night": Decimal("50.00"),
+    "title_slug": "routed-listing",
+}
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TestCase):
+    """The replica test database is a separate SQLite file, so reads show where they went."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.host = host = User.objects.create_user(email="primary@example.com", password="pass12345", username="primary")
+        Listings.objects.create(host=host, title="Primary copy", **LISTING_FIELDS)
+
+        replica_host = User.objects.db_manager("replica").create_user(
+            email="replica@example.com", password="pass12345", username="replica"
+        )
+        # bulk_create skips the signals, which would write to the primary.
+        Listings.objects.using("replica").bulk_create([
+            Listings(host=replica_host, title="Replica copy", **LISTING_FIELDS),
+        ])
+        self.url = reverse("listing:property-details", args=["routed-listing"])
+
+    def test_public_reads_use_replica(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["title"], "Replica copy")
+
+    def test_client_is_pinned_to_primary_after_a_write(self):
+        res = self.client.post(reverse("listing:public-listings"), {})
+        self.assertIn(PIN_COOKIE, res.cookies)
+
+        self.assertEqual(self.client.get(self.url).data["title"], "Primary copy")
+
+    def test_jwt_user_is_pinned_without_the_cookie(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.host)}")
+        self.assertEqual(self.client.get(self.url).data["title"], "Replica copy")
+
+        self.client.post(reverse("listing:listings-list"), {})
+        # API clients and cross-origin requests don't keep the cookie.
+        self.client.cookies.clear()
+
+        self.assertEqual(self.client.get(self.url).data["title"], "Primary copy")
+
+        other = User.objects.create_user(email="other@example.com", password="pass12345", username="other")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}")
+        self.assertEqual(self.client.get(self.url).data["title"], "Replica copy")
+
+    def test_writes_outside_requests_pin_their_users(self):
+        pin_to_primary(self.host.pk)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.host)}")
+
+        self.assertEqual(self.client.get(self.url).data["title"], "Primary copy")
+
+    def test_cached_values_are_computed_from_the_primary(self):
+        token = _use_replica.set(True)
+        try:
+            title = remember("tests:routed-title", lambda: Listings.objects.get(title_slug="routed-listing").title, 60)
+            uncached = Listings.objects.get(title_slug="routed-listing").title
+        finally:
+            _use_replica.reset(token)
+
+        self.assertEqual(title, "Primary copy")
+        self.assertEqual(uncached, "Replica copy")
+
+    def test_reads_outside_opted_in_views_use_primary(self):
+        router = ReplicaRouter()
+
+        self.assertEqual(router.db_for_read(Listings), "default")
+        self.assertEqual(router.db_for_write(Listings), "default")
+        self.assertEqual(Listings.objects.get(title_slug="routed-listing").title, "Primary copy")
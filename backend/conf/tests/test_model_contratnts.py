@@ -14,7 +14,7 @@ from listings.models import ListingImages
 
 from listings.models import Amenities
 
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
 from django.core.exceptions import ValidationError
 
@@ -88,7 +88,7 @@ class BookingsConstraintsTest(TestCase):
 
         )
 
-        with self.assertRaises(IntegrityError):
+        with self.assertRaises(IntegrityError), transaction.atomic():
 
             Bookings.objects.create(
 
@@ -104,6 +104,23 @@ class BookingsConstraintsTest(TestCase):
 
             )
 
+        # Zero nights.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+
+            Bookings.objects.create(
+
+                guest=user,
+
+                listing=listing,
+
+                start_date="2026-01-05",
+
+                end_date="2026-01-05",
+
+                total_price=100.00
+
+            )
+
 class WishlistConstraintsTest(TestCase):
 
     def test_unique_wishlist_name_per_user(self):
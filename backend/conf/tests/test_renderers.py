@@ -0,0 +1,71 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from conf.renderers import FastJSONParser, FastJSONRenderer
+
+
+PAYLOAD = ReturnDict(
+    {
+        "price": Decimal("1250.50"),
+        "check_in": datetime.date(2026, 3, 1),
+        "created_at": datetime.datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "local": datetime.datetime(2026, 3, 1, 9, 30, tzinfo=ZoneInfo("Asia/Kolkata")),
+        "naive": datetime.datetime(2026, 3, 1, 9, 30),
+        "at": datetime.time(14, 0),
+        "stay": datetime.timedelta(days=2, hours=3),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "label": gettext_lazy("Apartment"),
+        "text": "Café \u2028 \u2029 \U0001f3e0 \"quoted\"",
+        "counts": {1: "one", 2: [1.5, None, True]},
+        "tags": {"wifi"},
+        "results": ReturnList([{"rating": 4.666666666666667, "images": ()}], serializer=None),
+    },
+    serializer=None,
+)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_output_matches_drf_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_falls_back_for_what_orjson_cannot_encode(self):
+        data = {"big": 2 ** 70, "nested": {"price": Decimal("9.99")}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = "application/json; indent=4"
+        self.assertEqual(FastJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), parser_context={"encoding": "utf-8"})
+
+    def test_parses_like_drf_parser(self):
+        for body in [
+            b'{"name": "Caf\\u00e9", "guests": 2, "price": 12.5, "tags": ["a", null, true]}',
+            b'{"id": 123456789012345678901234567890}',
+            "[\"é\"]".encode(),
+        ]:
+            self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+        self.assertIsInstance(self.parse(FastJSONParser(), b'{"id": 123456789012345678901234567890}')["id"], int)
+
+    def test_invalid_json_raises_the_same_error(self):
+        for body in [b'{"a": ', b'{"a": NaN}']:
+            with self.assertRaises(ParseError) as fast:
+                self.parse(FastJSONParser(), body)
+            with self.assertRaises(ParseError) as drf:
+                self.parse(JSONParser(), body)
+            self.assertEqual(str(fast.exception), str(drf.exception))
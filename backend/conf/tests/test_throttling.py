@@ -0,0 +1,84 @@
+from unittest.mock import Mock, patch
+
+import redis
+from django.test import SimpleTestCase, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from conf import throttling
+from conf.throttling import LocalLimiter, RedisLimiter, ScopedRateThrottle, gcra
+
+
+class GCRATests(SimpleTestCase):
+
+    def test_allows_a_burst_of_the_rate_then_spaces_requests(self):
+        # 3 requests per 60 s: one every 20 s, up to 3 at once.
+        tat = now = 1_000_000
+        for _ in range(3):
+            allowed, tat, wait = gcra(tat, now, 20_000, 60_000)
+            self.assertTrue(allowed)
+
+        allowed, tat, wait = gcra(tat, now, 20_000, 60_000)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 20_000)
+
+        self.assertTrue(gcra(tat, now + 20_000, 20_000, 60_000)[0])
+
+    def test_local_limiter_keeps_keys_apart(self):
+        limiter = LocalLimiter()
+        self.assertEqual([limiter.hit("a", 30_000, 60_000)[0] for _ in range(3)], [True, True, False])
+        self.assertTrue(limiter.hit("b", 30_000, 60_000)[0])
+
+
+@override_settings(THROTTLE_REDIS_URL="redis://throttle.invalid:6379/0")
+class RedisLimiterTests(SimpleTestCase):
+
+    def test_uses_the_script_result(self):
+        limiter = RedisLimiter()
+        script = Mock(return_value=[0, 1500])
+        with patch.object(limiter, "get_script", return_value=script):
+            self.assertEqual(limiter.hit("throttle_user_1", 1000, 60_000), (False, 1500))
+        script.assert_called_once_with(keys=["throttle_user_1"], args=[1000, 60_000])
+
+    def test_falls_back_to_process_counters_while_redis_is_down(self):
+        limiter = RedisLimiter()
+        client = Mock()
+        client.register_script.return_value.side_effect = redis.ConnectionError("refused")
+        with patch.object(throttling.redis.Redis, "from_url", return_value=client):
+            self.assertEqual(limiter.hit("throttle_user_1", 30_000, 60_000), (True, 0))
+            self.assertEqual(limiter.hit("throttle_user_1", 30_000, 60_000), (True, 0))
+            self.assertFalse(limiter.hit("throttle_user_1", 30_000, 60_000)[0])
+
+        # One failed call, then Redis is left alone until REDIS_RETRY_AFTER passes.
+        self.assertEqual(client.register_script.return_value.call_count, 1)
+
+
+class ThrottledView(APIView):
+
+    authentication_classes = []
+
+    permission_classes = []
+
+    throttle_classes = [ScopedRateThrottle]
+
+    throttle_scope = "tests"
+
+    def get(self, request):
+        return Response({})
+
+
+class ScopedRateThrottleTests(SimpleTestCase):
+
+    def test_rejects_over_the_rate_with_retry_after(self):
+        view = ThrottledView.as_view()
+        factory = APIRequestFactory()
+        with patch.object(throttling, "limiter", LocalLimiter()), \
+                patch.dict(ScopedRateThrottle.THROTTLE_RATES, {"tests": "2/min"}):
+            statuses = [view(factory.get("/", REMOTE_ADDR="10.0.0.1")).status_code for _ in range(3)]
+            rejected = view(factory.get("/", REMOTE_ADDR="10.0.0.1"))
+            other = view(factory.get("/", REMOTE_ADDR="10.0.0.2"))
+
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(rejected["Retry-After"], "30")
+        self.assertEqual(other.status_code, 200)
@@ -0,0 +1,147 @@
+"""
+Cluster-wide rate limiting with GCRA.
+
+The throttles here replace DRF's history-list throttles with the generic cell
+rate algorithm: a key stores one number, the theoretical arrival time (TAT) of
+its next request, and a request is allowed while that time is less than one
+period ahead. ``n`` requests per period may arrive back to back, after which
+they are spaced ``period / n`` apart, so limits mean the same as before.
+
+When THROTTLE_REDIS_URL is set, every check is a single Lua script call, so
+it is atomic and costs one round trip, and all workers share the counters.
+The script uses Redis' clock, so worker clocks don't matter. Without Redis,
+or when a call fails, the check runs against an in-process table instead.
+After a failure Redis is skipped for REDIS_RETRY_AFTER seconds, so an outage
+costs one timeout rather than one per request.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework import throttling
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_TIMEOUT = 0.25
+
+REDIS_RETRY_AFTER = 30
+
+# Prune the in-process table once it holds this many keys.
+LOCAL_MAX_KEYS = 10000
+
+# KEYS[1]: the throttle key; ARGV: emission interval and period in milliseconds.
+# Returns {allowed, milliseconds until the next request would be allowed}.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+if new_tat - now > period then
+    return {0, new_tat - now - period}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+def gcra(tat, now, interval, period):
+    """``(allowed, new_tat, wait)`` for a request at ``now``; all in milliseconds."""
+    new_tat = max(tat, now) + interval
+    if new_tat - now > period:
+        return False, tat, new_tat - now - period
+    return True, new_tat, 0
+
+
+class LocalLimiter:
+    """GCRA state for this process only."""
+
+    def __init__(self):
+        self.tats = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key, interval, period):
+        now = int(time.monotonic() * 1000)
+        with self.lock:
+            allowed, tat, wait = gcra(self.tats.get(key, now), now, interval, period)
+            self.tats[key] = tat
+            if len(self.tats) > LOCAL_MAX_KEYS:
+                self.tats = {key: tat for key, tat in self.tats.items() if tat > now}
+        return allowed, wait
+
+
+class RedisLimiter:
+    """GCRA state in Redis, falling back to ``LocalLimiter`` while Redis fails."""
+
+    def __init__(self):
+        self.local = LocalLimiter()
+        self.lock = threading.Lock()
+        self.url = None
+        self.script = None
+        self.down_until = 0.0
+
+    def get_script(self):
+        url = getattr(settings, "THROTTLE_REDIS_URL", None)
+        if redis is None or not url or time.monotonic() < self.down_until:
+            return None
+        with self.lock:
+            if self.script is None or self.url != url:
+                client = redis.Redis.from_url(url, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT)
+                self.url, self.script = url, client.register_script(GCRA_SCRIPT)
+        return self.script
+
+    def hit(self, key, interval, period):
+        script = self.get_script()
+        if script is not None:
+            try:
+                allowed, wait = script(keys=[key], args=[interval, period])
+                return bool(allowed), int(wait)
+            except redis.RedisError as e:
+                self.down_until = time.monotonic() + REDIS_RETRY_AFTER
+                logger.warning(f"Throttling in-process for {REDIS_RETRY_AFTER}s, Redis failed: {e}")
+        return self.local.hit(key, interval, period)
+
+
+limiter = RedisLimiter()
+
+
+class GCRARateThrottle(throttling.SimpleRateThrottle):
+    """``SimpleRateThrottle`` with its history list replaced by ``limiter``."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        period = self.duration * 1000
+        allowed, self.wait_ms = limiter.hit(self.key, max(period // self.num_requests, 1), period)
+        return allowed
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class AnonRateThrottle(throttling.AnonRateThrottle, GCRARateThrottle):
+    pass
+
+
+class UserRateThrottle(throttling.UserRateThrottle, GCRARateThrottle):
+    pass
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, GCRARateThrottle):
+    pass
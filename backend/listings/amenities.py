@@ -0,0 +1,112 @@
+"""
+Process-local registry of amenity ids by name.
+
+Amenities is effectively a fixed enum, so the whole table is loaded once and
+the map reused. The map is tagged with a generation counter that is bumped
+when a change to the table commits, so every process reloads it on its next
+lookup. A thread that changes the table reloads on every lookup until its
+transaction ends, since ids it reads before then could be rolled back; that
+is why the registry is kept per thread, like database connections.
+"""
+
+import threading
+
+from django.db import transaction
+
+from conf.generations import bump_generation, get_generation
+
+from .models import Amenities, Listings
+
+REGISTRY_GENERATION = "listings:amenities:generation"
+
+
+class _Registry(threading.local):
+    generation = None
+    ids = {}
+    pending = False
+
+
+_registry = _Registry()
+
+
+def _load(generation):
+    ids = {}
+    # Older rows may repeat a name; the first one wins, as get_or_create's .get() would.
+    for amenity_id, name in Amenities.objects.order_by("-id").values_list("id", "name"):
+        ids[name] = amenity_id
+    _registry.generation = generation
+    _registry.ids = ids
+
+
+def amenity_ids(names):
+    """``{name: id}`` for ``names``, creating rows for names the table doesn't have yet."""
+    names = set(names)
+    if _registry.pending and not transaction.get_connection().in_atomic_block:
+        # The change committed or rolled back; either way the next load is durable.
+        _registry.pending = False
+        _registry.generation = None
+    generation = get_generation(REGISTRY_GENERATION)
+    if _registry.pending or _registry.generation != generation:
+        _load(generation)
+
+    missing = names - set(_registry.ids)
+    if missing:
+        # Another process may have added them since our last load.
+        _load(generation)
+        missing = names - set(_registry.ids)
+    if missing:
+        with transaction.atomic():
+            Amenities.objects.bulk_create([Amenities(name=name) for name in sorted(missing)])
+            invalidate_amenity_registry()
+        _load(generation)
+
+    return {name: _registry.ids[name] for name in names}
+
+
+def invalidate_amenity_registry():
+    """Call when Amenities rows are added, changed or removed."""
+    _registry.pending = True
+    transaction.on_commit(lambda: bump_generation(REGISTRY_GENERATION))
+
+
+def set_listing_amenities(listing, names, created=False):
+    """
+    Make ``listing``'s amenities exactly ``names``.
+
+    The change is diffed against the current through rows and applied with at
+    most one DELETE and one bulk INSERT. ``created`` skips reading the current
+    rows of a listing that was just inserted.
+    """
+    through = Listings.amenities.through
+    wanted = set(amenity_ids(names).values())
+    current = set() if created else set(
+        through.objects.filter(listings_id=listing.pk).values_list("amenities_id", flat=True)
+    )
+
+    if current - wanted:
+        through.objects.filter(listings_id=listing.pk, amenities_id__in=current - wanted).delete()
+    if wanted - current:
+        through.objects.bulk_create([
+            through(listings_id=listing.pk, amenities_id=amenity_id) for amenity_id in sorted(wanted - current)
+        ])
+
+
+def refresh_amenity_masks(listing_ids):
+    """
+    Recompute ``amenity_mask`` of ``listing_ids`` from their amenity rows.
+
+    Issues one UPDATE per distinct mask and returns ``{listing_id: mask}``.
+    """
+    masks = dict.fromkeys(listing_ids, 0)
+    for listing_id, name in Listings.amenities.through.objects.filter(listings_id__in=masks).values_list(
+        "listings_id", "amenities__name"
+    ):
+        # Names outside AMENITY_CHOICES have no bit, as in backfill_amenity_masks.
+        masks[listing_id] |= Amenities.AMENITY_BITS.get(name, 0)
+
+    by_mask = {}
+    for listing_id, mask in masks.items():
+        by_mask.setdefault(mask, []).append(listing_id)
+    for mask, ids in by_mask.items():
+        Listings.objects.filter(pk__in=ids).exclude(amenity_mask=mask).update(amenity_mask=mask)
+    return masks
@@ -0,0 +1,49 @@
+"""
+Shared cache of serialized listing cards.
+
+A card is the output of a card serializer (``ListingSerializer`` or the
+compact ``ListingCardSerializer``) for one listing, stored under the
+listing id and its ``card_version``. ``listings.signals`` bumps the version
+whenever the listing, its images or its host's public profile change, so a
+stale card is never read again and simply ages out. Cards are fetched for a
+whole page with one ``get_many``; only the misses touch the database.
+"""
+
+from django.core.cache import cache
+from django.db.models import F, prefetch_related_objects
+
+CARD_CACHE_TTL = 60 * 60 * 24
+
+# Part of every key; bump it when the card's shape changes so old cards are not served.
+CARD_FORMAT = 5
+
+# Per-request annotations that must never end up in a shared card.
+VOLATILE_FIELDS = ("distance_km",)
+
+
+def card_key(serializer, listing):
+    return f"listings:card:v{CARD_FORMAT}:{type(serializer).__name__}:{listing.pk}:{listing.card_version}"
+
+
+def fetch_cards(serializer, listings):
+    """Map card key to card, rendering and caching the misses in one batch."""
+    keys = {card_key(serializer, listing): listing for listing in listings}
+    cards = cache.get_many(list(keys))
+
+    misses = [listing for key, listing in keys.items() if key not in cards]
+    if misses:
+        prefetch_related_objects(misses, *serializer.card_prefetch)
+        rendered = {}
+        for listing in misses:
+            card = serializer.render_card(listing)
+            for field in VOLATILE_FIELDS:
+                card.pop(field, None)
+            rendered[card_key(serializer, listing)] = card
+        cache.set_many(rendered, CARD_CACHE_TTL)
+        cards.update(rendered)
+
+    return cards
+
+
+def bump_card_versions(queryset):
+    queryset.update(card_version=F("card_version") + 1)
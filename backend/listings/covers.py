@@ -0,0 +1,49 @@
+"""
+Denormalized cover images.
+
+``Listings.cover_image`` points at the listing's first ready image by
+(position, id), so a card can show its picture from a join instead of loading
+every image. It is refreshed with one UPDATE whenever images are added,
+uploaded, deleted or reordered.
+"""
+
+from django.db.models import Max, OuterRef, Subquery
+
+from .cards import bump_card_versions
+from .models import ListingImages, Listings
+
+
+def cover_candidates():
+    return (
+        ListingImages.objects.filter(status=ListingImages.STATUS_READY, image__isnull=False)
+        .exclude(image="")
+        .order_by("position", "id")
+    )
+
+
+def refresh_covers(listing_ids):
+    """Point each listing in ``listing_ids`` at its current cover image."""
+    Listings.objects.filter(pk__in=listing_ids).update(
+        cover_image=Subquery(cover_candidates().filter(listings=OuterRef("pk")).values("pk")[:1])
+    )
+
+
+def next_position(listing):
+    """Position for an image appended to ``listing``."""
+    last = listing.listingimages.aggregate(last=Max("position"))["last"]
+    return 0 if last is None else last + 1
+
+
+def image_count(listing):
+    """Images counting towards ``listing``'s limit; failed uploads don't."""
+    return listing.listingimages.exclude(status=ListingImages.STATUS_FAILED).count()
+
+
+def reorder_images(listing, image_ids):
+    """Place ``listing``'s images in the order of ``image_ids``, which must name each of them once."""
+    images = listing.listingimages.in_bulk(image_ids)
+    for position, image_id in enumerate(image_ids):
+        images[image_id].position = position
+    ListingImages.objects.bulk_update(images.values(), ["position"])
+    refresh_covers([listing.pk])
+    bump_card_versions(Listings.objects.filter(pk=listing.pk))
@@ -0,0 +1,179 @@
+"""
+Signed direct uploads of listing images.
+
+The client asks for upload parameters signed for one server-chosen public id
+under the listing's folder, posts the file straight to the storage service,
+and then confirms the upload with the public id, version and signature the
+service returned. Nothing in the confirmation is trusted without checking that
+signature, so a host can only register assets that were really uploaded with
+parameters we issued for that listing.
+
+DIRECT_UPLOAD_BACKEND picks Cloudinary or a local stand-in that speaks the
+same protocol (signed with SECRET_KEY, files kept under DIRECT_UPLOAD_ROOT) so
+the flow works without a Cloudinary account.
+"""
+
+import hmac
+import logging
+import os
+import re
+import time
+import uuid
+
+import cloudinary
+from cloudinary.utils import api_sign_request, cloudinary_api_url
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.urls import reverse
+
+from . import image_variants
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = "jpg,jpeg,png,webp"
+
+# Same limit as uploads through the API.
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+
+
+def is_local():
+    return settings.DIRECT_UPLOAD_BACKEND == "local"
+
+
+def _secret():
+    return settings.SECRET_KEY if is_local() else cloudinary.config().api_secret
+
+
+def listing_folder(listing_id):
+    return f"listings/{listing_id}"
+
+
+def sign(params):
+    return api_sign_request(params, _secret())
+
+
+def sign_upload(request, listing):
+    """Parameters for one signed upload into ``listing``'s folder."""
+    params = {
+        "public_id": f"{listing_folder(listing.pk)}/{uuid.uuid4().hex}",
+        "timestamp": int(time.time()),
+        "allowed_formats": ALLOWED_FORMATS,
+    }
+    if is_local():
+        upload_url = request.build_absolute_uri(reverse("listing:property-images-direct-local"))
+        api_key = "local"
+    else:
+        upload_url = cloudinary_api_url("upload", resource_type="image")
+        api_key = cloudinary.config().api_key
+
+    return dict(params, signature=sign(params), api_key=api_key, upload_url=upload_url)
+
+
+def response_signature(public_id, version):
+    # Cloudinary signs upload responses with signature version 1.
+    return api_sign_request({"public_id": public_id, "version": version}, _secret(), signature_version=1)
+
+
+def local_dimensions(public_id, format):
+    """``(width, height, placeholder)`` of a file held by the local stand-in."""
+    try:
+        with local_storage().open(f"{public_id}.{format}") as file:
+            return image_variants.measure(file)
+    except (OSError, ValueError):
+        return None, None, ""
+
+
+def verify_upload(listing, public_id, version, signature):
+    """Whether ``public_id``/``version`` is a genuine upload into ``listing``'s folder."""
+    if not public_id.startswith(f"{listing_folder(listing.pk)}/"):
+        return False
+    return hmac.compare_digest(signature, response_signature(public_id, version))
+
+
+def stored_image_pattern(public_id):
+    """Regex matching how an image field stores ``public_id``, whatever its version and format."""
+    return rf"^image/upload/(v\d+/)?{re.escape(public_id)}(\.[a-z]+)?$"
+
+
+def local_storage():
+    return FileSystemStorage(location=settings.DIRECT_UPLOAD_ROOT, base_url=settings.DIRECT_UPLOAD_URL)
+
+
+def local_url(image):
+    """URL of an image held by the local stand-in."""
+    return local_storage().url(f"{image.public_id}.{image.format}")
+
+
+def local_variant_url(image, variant):
+    return local_storage().url(image_variants.variant_name(image.public_id, variant))
+
+
+def local_variants(public_id):
+    """Names of the variants the local stand-in holds for ``public_id``."""
+    storage = local_storage()
+    return [
+        variant for variant in image_variants.VARIANT_WIDTHS
+        if storage.exists(image_variants.variant_name(public_id, variant))
+    ]
+
+
+def discard_local_image(image):
+    """Remove a file held by the local stand-in, and its variants, once the current transaction commits."""
+    names = [f"{image.public_id}.{image.format}"]
+    names += [image_variants.variant_name(image.public_id, variant) for variant in image_variants.VARIANT_WIDTHS]
+
+    def delete():
+        storage = local_storage()
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError as e:
+                logger.warning(f"Could not remove local upload {name}: {e}")
+
+    transaction.on_commit(delete)
+
+
+def store_local_upload(data, file):
+    """
+    Handle a post to the local stand-in the way Cloudinary handles an upload.
+
+    Returns the response body, or None when the parameters are not signed by
+    us or have expired.
+    """
+    params = {key: data.get(key) for key in ("public_id", "timestamp", "allowed_formats")}
+    if None in params.values() or not hmac.compare_digest(str(data.get("signature", "")), sign(params)):
+        return None
+    if int(params["timestamp"]) < time.time() - settings.DIRECT_UPLOAD_TTL:
+        return None
+
+    extension = os.path.splitext(file.name or "")[1].lstrip(".").lower()
+    if extension not in params["allowed_formats"].split(",") or file.size > MAX_UPLOAD_BYTES:
+        return None
+
+    try:
+        variants = image_variants.render_variants(file)
+    except (OSError, ValueError):
+        return None
+
+    version = int(time.time())
+    storage = local_storage()
+    files = {f"{params['public_id']}.{extension}": file}
+    files.update(
+        (image_variants.variant_name(params["public_id"], variant), ContentFile(content))
+        for variant, content in variants.items()
+    )
+    for name, content in files.items():
+        if storage.exists(name):
+            storage.delete(name)
+        content.seek(0)
+        storage.save(name, content)
+
+    return {
+        "public_id": params["public_id"],
+        "version": version,
+        "format": extension,
+        "resource_type": "image",
+        "signature": response_signature(params["public_id"], version),
+    }
@@ -0,0 +1,92 @@
+"""
+Facet counts for the public listing search.
+
+Every facet is a conditional ``Count`` so a filtered queryset is summarised in
+one aggregate query. Results are cached per normalised filter set; the cache
+key embeds a generation number that ``listings.signals`` bumps on every listing
+change, so stale entries are simply never read again and expire on their own.
+"""
+
+import hashlib
+
+from conf.generations import bump_generation, get_generation
+from django.db.models import Count, F, Q
+from django.db.models.lookups import Exact
+
+from .models import Listings, Amenities
+
+FACETS_CACHE_TTL = 60
+
+GENERATION_KEY = "listings:facets:generation"
+
+# (label, lower bound inclusive, upper bound exclusive or None)
+PRICE_BUCKETS = [
+    ("0-50", 0, 50),
+    ("50-100", 50, 100),
+    ("100-200", 100, 200),
+    ("200-500", 200, 500),
+    ("500+", 500, None),
+]
+
+GUEST_BUCKETS = [
+    ("1-2", 1, 3),
+    ("3-4", 3, 5),
+    ("5-8", 5, 9),
+    ("9+", 9, None),
+]
+
+
+def _range_q(field, low, high):
+    q = Q(**{f"{field}__gte": low})
+    if high is not None:
+        q &= Q(**{f"{field}__lt": high})
+    return q
+
+
+def _aggregates():
+    aggregates = {"total": Count("id")}
+    for value, _ in Listings.PROPERTY_TYPES:
+        aggregates[f"property_type:{value}"] = Count("id", filter=Q(property_type=value))
+    for label, low, high in PRICE_BUCKETS:
+        aggregates[f"price:{label}"] = Count("id", filter=_range_q("price_per_night", low, high))
+    for label, low, high in GUEST_BUCKETS:
+        aggregates[f"guests:{label}"] = Count("id", filter=_range_q("max_guests", low, high))
+    aggregates["allows_pets"] = Count("id", filter=Q(allows_pets=True))
+    aggregates["allows_children"] = Count("id", filter=Q(allows_children=True))
+    for name, bit in Amenities.AMENITY_BITS.items():
+        aggregates[f"amenity:{name}"] = Count(
+            "id", filter=Q(Exact(F("amenity_mask").bitand(bit), bit))
+        )
+    return aggregates
+
+
+def compute_facets(queryset):
+    row = queryset.order_by().aggregate(**_aggregates())
+
+    def bucket(prefix, labels):
+        return [{"value": label, "count": row[f"{prefix}:{label}"]} for label in labels]
+
+    return {
+        "total": row["total"],
+        "property_type": bucket("property_type", [value for value, _ in Listings.PROPERTY_TYPES]),
+        "price": bucket("price", [label for label, _, _ in PRICE_BUCKETS]),
+        "guests": bucket("guests", [label for label, _, _ in GUEST_BUCKETS]),
+        "allows_pets": row["allows_pets"],
+        "allows_children": row["allows_children"],
+        "amenities": bucket("amenity", list(Amenities.AMENITY_BITS)),
+    }
+
+
+def facets_cache_key(params, filter_names):
+    """Cache key for the filter parameters only, ignoring order, blanks and paging params."""
+    normalised = sorted(
+        (name, ",".join(sorted(v.strip() for v in params.getlist(name) if v.strip())))
+        for name in params
+        if name in filter_names
+    )
+    digest = hashlib.sha1(repr([item for item in normalised if item[1]]).encode()).hexdigest()
+    return f"listings:facets:{get_generation(GENERATION_KEY)}:{digest}"
+
+
+def invalidate_facets():
+    bump_generation(GENERATION_KEY)
@@ -1,11 +1,67 @@
 import django_filters as df
 
-from .models import Listings
+from rest_framework.exceptions import ValidationError
 
-from django.db.models import Q
+from django.db.models import F
+
+from .models import Listings, Amenities
+
+from .search import search_listings
+
+from . import geo
+
+class FloatCSVFilter(df.BaseCSVFilter, df.NumberFilter):
+
+    pass
+
+class CharCSVFilter(df.BaseCSVFilter, df.CharFilter):
+
+    pass
+
+class ListingOrderingFilter(df.OrderingFilter):
+
+    """
+    Appends id as a tie-breaker in the same direction, so each sort is served
+    by its (field, id) index. Params in BEST_FIRST read highest-first, with a
+    leading '-' reversing that.
+    """
+
+    BEST_FIRST = {"popularity", "recommended"}
+
+    def get_ordering_value(self, param):
+
+        descending = param.startswith("-")
+
+        name = param[1:] if descending else param
+
+        if name in self.BEST_FIRST:
+
+            descending = not descending
+
+        field = self.param_map.get(name, name)
+
+        return f"-{field}" if descending else field
+
+    def filter(self, qs, value):
+
+        if not value:
+
+            return qs
+
+        ordering = [self.get_ordering_value(param) for param in value]
+
+        if ordering[-1].lstrip("-") != "id":
+
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+
+        return qs.order_by(*ordering)
 
 class ListingFilter(df.FilterSet):
 
+    DEFAULT_RADIUS_KM = 10
+
+    MAX_RADIUS_KM = 500
+
     country = df.CharFilter(
 
         field_name="country",
@@ -78,6 +134,44 @@ class ListingFilter(df.FilterSet):
 
     has_children = df.BooleanFilter(method="filter_allows_children")
 
+    amenities = CharCSVFilter(method="filter_amenities")
+
+    min_rating = df.NumberFilter(
+
+        field_name="rating",
+
+        lookup_expr="gte"
+
+    )
+
+    q = df.CharFilter(method="filter_search")
+
+    bbox = FloatCSVFilter(method="filter_bbox")
+
+    near = FloatCSVFilter(method="filter_near")
+
+    radius_km = df.NumberFilter(method="filter_near")
+
+    ordering = ListingOrderingFilter(
+
+        fields=(
+
+            ("id", "id"),
+
+            ("price_per_night", "price"),
+
+            ("created_at", "created_at"),
+
+            ("rating", "rating"),
+
+            ("popularity", "popularity"),
+
+            ("recommended_score", "recommended"),
+
+        )
+
+    )
+
     class Meta:
 
         model = Listings
@@ -102,27 +196,110 @@ class ListingFilter(df.FilterSet):
 
             "has_children",
 
+            "amenities",
+
+            "min_rating",
+
+            "q",
+
+            "bbox",
+
+            "near",
+
+            "radius_km",
+
         ]
 
     def filter_available_listings(self, queryset, name, value):
 
-        check_in = self.data.get("check_in")
+        check_in = self.form.cleaned_data.get("check_in")
 
-        check_out = self.data.get("check_out")
+        check_out = self.form.cleaned_data.get("check_out")
 
-        if not check_in or not check_out:
+        # Both date filters route here; apply the anti-join only once.
+        if not check_in or not check_out or name == "check_out":
 
             return queryset
 
-        return queryset.exclude(
+        return queryset.get_available_listings(check_in, check_out)
 
-            Q(bookings__start_date__lt=check_out) &
+    def filter_amenities(self, queryset, name, value):
 
-            Q(bookings__end_date__gt=check_in) &
+        names = [v.strip() for v in value if v.strip()]
 
-            Q(bookings__status__in=["confirmed", "paid"])
+        unknown = [n for n in names if n not in Amenities.AMENITY_BITS]
 
-        )
+        if unknown:
+
+            raise ValidationError({"amenities": f"Unknown amenities: {', '.join(unknown)}."})
+
+        mask = Amenities.mask_for(names)
+
+        if not mask:
+
+            return queryset
+
+        # Single predicate: (amenity_mask & mask) = mask.
+        return queryset.alias(
+
+            amenity_hits=F("amenity_mask").bitand(mask)
+
+        ).filter(amenity_hits=mask)
+
+    def filter_search(self, queryset, name, value):
+
+        return search_listings(queryset, value)
+
+    def filter_bbox(self, queryset, name, value):
+
+        if len(value) != 4:
+
+            raise ValidationError({"bbox": "Expected west,south,east,north."})
+
+        west, south, east, north = (float(v) for v in value)
+
+        if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+
+            raise ValidationError({"bbox": "Coordinates are out of range."})
+
+        return geo.filter_bbox(queryset, south, west, north, east)
+
+    def filter_near(self, queryset, name, value):
+
+        near = self.form.cleaned_data.get("near")
+
+        # near and radius_km both route here; apply the search only once.
+        if not near or name == "radius_km":
+
+            return queryset
+
+        if len(near) != 2:
+
+            raise ValidationError({"near": "Expected lat,lng."})
+
+        latitude, longitude = (float(v) for v in near)
+
+        radius_km = float(self.form.cleaned_data.get("radius_km") or self.DEFAULT_RADIUS_KM)
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+
+            raise ValidationError({"near": "Coordinates are out of range."})
+
+        if not 0 < radius_km <= self.MAX_RADIUS_KM:
+
+            raise ValidationError({"radius_km": f"Must be between 0 and {self.MAX_RADIUS_KM}."})
+
+        queryset = geo.filter_bbox(queryset, *geo.radius_bbox(latitude, longitude, radius_km))
+
+        return queryset.annotate(
+
+            distance_km=geo.distance_km(latitude, longitude)
+
+        ).filter(
+
+            distance_km__lte=radius_km
+
+        ).order_by("distance_km", "id")
 
     def filter_allows_pets(self, queryset, name, value):
 
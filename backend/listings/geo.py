@@ -0,0 +1,125 @@
+"""
+Geohash helpers for map search without PostGIS.
+
+Every listing with coordinates stores a precision-9 geohash (cells of about
+5 m). A bounding box is covered by a handful of coarser cells; since all
+points inside a cell share its prefix, each cell becomes one range scan on the
+``geohash`` b-tree index, and an exact latitude/longitude check trims the edges.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+GEOHASH_PRECISION = 9
+
+MAX_COVER_CELLS = 32
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (target[0] + target[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            target[0] = mid
+        else:
+            target[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def cover(south, west, north, east):
+    """Geohash prefixes that together cover the box, at most MAX_COVER_CELLS of them."""
+    if west > east:
+        # Box crosses the antimeridian.
+        return cover(south, west, north, 180.0) + cover(south, -180.0, north, east)
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        cols = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * cols <= MAX_COVER_CELLS:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    cells = set()
+    for row in range(math.floor(south / height), math.floor(north / height) + 1):
+        lat = min(max((row + 0.5) * height, -90.0), 90.0)
+        for col in range(math.floor(west / width), math.floor(east / width) + 1):
+            lng = min(max((col + 0.5) * width, -180.0), 180.0)
+            cells.add(encode(lat, lng, precision))
+    return sorted(cells)
+
+
+def bbox_q(south, west, north, east):
+    """Index-friendly predicate: one geohash range per covering cell, then exact bounds."""
+    cells = Q()
+    for prefix in cover(south, west, north, east):
+        # "~" sorts after every geohash character, so this is the prefix range.
+        cells |= Q(geohash__gte=prefix, geohash__lt=prefix + "~")
+
+    if west > east:
+        longitude = Q(longitude__gte=west) | Q(longitude__lte=east)
+    else:
+        longitude = Q(longitude__gte=west, longitude__lte=east)
+
+    return cells & Q(latitude__gte=south, latitude__lte=north) & longitude
+
+
+def filter_bbox(queryset, south, west, north, east):
+    """
+    Restrict ``queryset`` to rows inside the box.
+
+    The cell ranges go in a subquery: inline, SQLite prefers walking the primary
+    key to satisfy ``ORDER BY id`` and ends up scanning the whole table.
+    """
+    inside = queryset.model._base_manager.filter(bbox_q(south, west, north, east))
+    return queryset.filter(pk__in=inside.values("pk"))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """(south, west, north, east) of the box enclosing a circle."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    if south == -90.0 or north == 90.0:
+        return south, -180.0, north, 180.0
+
+    lng_delta = math.degrees(radius_km / EARTH_RADIUS_KM / math.cos(math.radians(latitude)))
+    if lng_delta >= 180.0:
+        return south, -180.0, north, 180.0
+    west = (longitude - lng_delta + 540.0) % 360.0 - 180.0
+    east = (longitude + lng_delta + 540.0) % 360.0 - 180.0
+    return south, west, north, east
+
+
+def distance_km(latitude, longitude):
+    """Haversine distance from a point to each row, as a database expression."""
+    lat1, lng1 = math.radians(latitude), math.radians(longitude)
+    lat2, lng2 = Radians(F("latitude")), Radians(F("longitude"))
+    a = (
+        Power(Sin((lat2 - lat1) / 2), 2)
+        + math.cos(lat1) * Cos(lat2) * Power(Sin((lng2 - lng1) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a), output_field=FloatField())
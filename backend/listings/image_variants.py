@@ -0,0 +1,77 @@
+"""
+Responsive variants, dimensions and blur placeholders for listing images.
+
+Each image is offered in VARIANT_WIDTHS sizes (never upscaled). On Cloudinary
+a variant is a transformation URL, so nothing is stored. The local direct-upload
+stand-in has no transformation service, so the variants are rendered with
+Pillow when the file arrives and stored next to the original.
+
+Width, height and a tiny inline placeholder are measured from the original
+whenever we hold the bytes: staged uploads before they are pushed to
+Cloudinary, and local direct uploads. Clients can then reserve the right box
+and paint the placeholder before any image request completes.
+"""
+
+import base64
+import io
+
+from PIL import Image, ImageFilter, ImageOps
+
+VARIANT_WIDTHS = {"thumbnail": 160, "card": 480, "hero": 1280}
+
+PLACEHOLDER_WIDTH = 16
+
+VARIANT_QUALITY = 80
+
+
+def _open(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+    image = Image.open(file)
+    # Phone photos are often stored sideways with an EXIF rotation.
+    return ImageOps.exif_transpose(image).convert("RGB")
+
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _resized(image, width):
+    if image.width <= width:
+        return image
+    return image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+
+
+def measure(file):
+    """``(width, height, placeholder)`` of an image file; the placeholder is a JPEG data URI."""
+    image = _open(file)
+    tiny = _resized(image, PLACEHOLDER_WIDTH).filter(ImageFilter.GaussianBlur(1))
+    placeholder = "data:image/jpeg;base64," + base64.b64encode(_encode(tiny, 40)).decode()
+    return image.width, image.height, placeholder
+
+
+def variant_name(public_id, variant):
+    return f"{public_id}_{variant}.jpg"
+
+
+def render_variants(file):
+    """``{variant: jpeg bytes}`` for the local stand-in."""
+    image = _open(file)
+    return {variant: _encode(_resized(image, width), VARIANT_QUALITY) for variant, width in VARIANT_WIDTHS.items()}
+
+
+def variant_width(image, variant):
+    target = VARIANT_WIDTHS[variant]
+    return min(target, image.width) if image.width else target
+
+
+def cloudinary_variant_url(resource, width):
+    return resource.build_url(width=width, crop="limit", quality="auto", fetch_format="auto", secure=True)
+
+
+def cloudinary_placeholder_url(resource):
+    return resource.build_url(
+        width=PLACEHOLDER_WIDTH * 2, crop="limit", effect="blur:1000", quality=1, fetch_format="auto", secure=True
+    )
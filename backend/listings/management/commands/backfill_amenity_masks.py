@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+
+from django.db import transaction
+
+from listings.models import Listings, Amenities
+
+class Command(BaseCommand):
+
+    help = 'Recompute Listings.amenity_mask from the amenities relation, in primary key batches'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+
+        batch_size = options['batch_size']
+
+        through = Listings.amenities.through
+
+        last_id = 0
+
+        updated = 0
+
+        while True:
+
+            batch = list(
+
+                Listings.objects.filter(id__gt=last_id)
+
+                .order_by('id')
+
+                .only('id', 'amenity_mask')[:batch_size]
+
+            )
+
+            if not batch:
+
+                break
+
+            last_id = batch[-1].id
+
+            names = {}
+
+            for listing_id, name in through.objects.filter(
+
+                listings_id__in=[listing.id for listing in batch]
+
+            ).values_list('listings_id', 'amenities__name'):
+
+                names.setdefault(listing_id, []).append(name)
+
+            changed = []
+
+            for listing in batch:
+
+                mask = Amenities.mask_for(
+
+                    n for n in names.get(listing.id, []) if n in Amenities.AMENITY_BITS
+
+                )
+
+                if listing.amenity_mask != mask:
+
+                    listing.amenity_mask = mask
+
+                    changed.append(listing)
+
+            with transaction.atomic():
+
+                Listings.objects.bulk_update(changed, ['amenity_mask'])
+
+            updated += len(changed)
+
+        self.stdout.write(
+
+            self.style.SUCCESS(f'Updated amenity mask on {updated} listing(s)')
+
+        )
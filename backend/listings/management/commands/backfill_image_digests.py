@@ -0,0 +1,201 @@
+import hashlib
+
+import requests
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from django.db import transaction
+
+from django.db.models import F
+
+from conf.cloudinary_utils import queue_cloudinary_deletion
+
+from listings import direct_uploads
+
+from listings.cards import bump_card_versions
+
+from listings.models import ImageAsset, ListingImages, Listings
+
+DOWNLOAD_TIMEOUT = 30
+
+class Command(BaseCommand):
+
+    help = 'Hash stored listing images, point identical ones at a single asset and report the storage saved'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--batch-size', type=int, default=200)
+
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be merged')
+
+    def fetch(self, row):
+
+        image = row.image
+
+        if row.storage == ListingImages.STORAGE_LOCAL:
+
+            with direct_uploads.local_storage().open(f'{image.public_id}.{image.format}') as file:
+
+                return file.read()
+
+        response = requests.get(image.build_url(secure=True), timeout=DOWNLOAD_TIMEOUT)
+
+        response.raise_for_status()
+
+        return response.content
+
+    def handle(self, *args, **options):
+
+        batch_size = options['batch_size']
+
+        dry_run = options['dry_run']
+
+        # digest -> public id of the copy that is kept, for digests seen during a dry run.
+        kept = {}
+
+        # digest -> storage of the kept copy; duplicates take it along with the image.
+        kept_storage = {}
+
+        last_id = 0
+
+        hashed = merged = skipped = saved = 0
+
+        while True:
+
+            batch = list(
+
+                ListingImages.objects.filter(
+
+                    id__gt=last_id,
+
+                    asset__isnull=True,
+
+                    status=ListingImages.STATUS_READY,
+
+                    image__isnull=False,
+
+                )
+
+                .exclude(image='')
+
+                .order_by('id')[:batch_size]
+
+            )
+
+            if not batch:
+
+                break
+
+            last_id = batch[-1].id
+
+            digests = {}
+
+            for row in batch:
+
+                try:
+
+                    content = self.fetch(row)
+
+                except (OSError, requests.RequestException) as e:
+
+                    self.stderr.write(f'image {row.id}: {e}')
+
+                    skipped += 1
+
+                    continue
+
+                digests[row.id] = (hashlib.sha256(content).hexdigest(), len(content))
+
+            hashed += len(digests)
+
+            with transaction.atomic():
+
+                assets = ImageAsset.objects.in_bulk({digest for digest, _ in digests.values()}, field_name='digest')
+
+                for digest, asset in assets.items():
+
+                    kept.setdefault(digest, asset.image.public_id if asset.image else None)
+
+                kept_storage.update(
+
+                    ListingImages.objects.filter(asset__in=assets.values()).values_list('asset__digest', 'storage')
+
+                )
+
+                changed = []
+
+                merged_listings = set()
+
+                for row in batch:
+
+                    if row.id not in digests:
+
+                        continue
+
+                    digest, size = digests[row.id]
+
+                    if kept.get(digest) is None:
+
+                        kept[digest] = row.image.public_id
+
+                        kept_storage[digest] = row.storage
+
+                        if not dry_run:
+
+                            if digest in assets:
+
+                                assets[digest].image = row.image
+
+                                assets[digest].save(update_fields=['image', 'updated_at'])
+
+                            else:
+
+                                assets[digest] = ImageAsset.objects.create(digest=digest, image=row.image, size=size)
+
+                    elif kept[digest] != row.image.public_id:
+
+                        merged += 1
+
+                        saved += size
+
+                        if not dry_run:
+
+                            queue_cloudinary_deletion(row.image)
+
+                            row.image = assets[digest].image
+
+                            row.storage = kept_storage.get(digest, ListingImages.STORAGE_CLOUDINARY)
+
+                            merged_listings.add(row.listings_id)
+
+                    if not dry_run:
+
+                        row.asset = assets[digest]
+
+                        changed.append(row)
+
+                if not dry_run:
+
+                    ListingImages.objects.bulk_update(changed, ['asset', 'image', 'storage'])
+
+                    for asset_id, references in Counter(row.asset_id for row in changed).items():
+
+                        ImageAsset.objects.filter(pk=asset_id).update(ref_count=F('ref_count') + references)
+
+                    bump_card_versions(Listings.objects.filter(pk__in=merged_listings))
+
+        verb = 'Would merge' if dry_run else 'Merged'
+
+        self.stdout.write(
+
+            self.style.SUCCESS(
+
+                f'Hashed {hashed} image(s), skipped {skipped}. {verb} {merged} duplicate(s), '
+
+                f'saving {saved / (1024 * 1024):.2f} MB'
+
+            )
+
+        )
@@ -0,0 +1,144 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from cloudinary import CloudinaryResource
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from bookings.models import Bookings
+from bookings.views import HostBookingListView
+from chat.models import Message, Room
+from chat.views import MessageListView
+from conf.renderers import FastJSONParser, FastJSONRenderer
+from listings.models import ListingImages, Listings
+from listings.views import PublicListingView
+from users.models import User
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Compare CPU time per request of the stdlib and orjson JSON renderers on large list pages. '
+        'Seeds synthetic data inside a transaction that is always rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page (the views allow up to 100 for listings and bookings).')
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+
+        with transaction.atomic():
+            host, guest, room = self.seed(rows)
+            # Any name from ALLOWED_HOSTS; the pages build absolute next/previous links.
+            factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+            cases = [
+                ('PublicListingView', PublicListingView, {}, factory.get('/', {'page_size': rows}), None),
+                ('HostBookingListView', HostBookingListView, {}, factory.get('/', {'page_size': rows}), host),
+                ('MessageListView', MessageListView, {'room_id': room.id}, factory.get('/', {'page_size': rows}), guest),
+            ]
+
+            for label, view_class, kwargs, request, user in cases:
+                if user is not None:
+                    force_authenticate(request, user=user)
+                before, before_body = self.measure(view_class, JSONRenderer, JSONParser, request, kwargs, options['requests'])
+                after, after_body = self.measure(view_class, FastJSONRenderer, FastJSONParser, request, kwargs, options['requests'])
+                self.report(label, before, after, before_body == after_body, len(before_body))
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        stamp = time.time_ns()
+        host = User.objects.create_user(username=f'bench-host-{stamp}', email=f'bench-host-{stamp}@example.com')
+        guest = User.objects.create_user(username=f'bench-guest-{stamp}', email=f'bench-guest-{stamp}@example.com')
+
+        listings = Listings.objects.bulk_create([
+            Listings(
+                host=host,
+                title=f'Benchmark listing {i}',
+                title_slug=f'bench-{stamp}-{i}',
+                description='Benchmark listing',
+                address=f'{i} Benchmark Street',
+                country='India',
+                city='Mumbai',
+                property_type='apartment',
+                max_guests=4,
+                bedrooms=2,
+                beds=2,
+                bathrooms=Decimal('1.5'),
+                price_per_night=Decimal('1234.50') + i,
+                latitude=19.07 + i / 1000,
+                longitude=72.87 + i / 1000,
+                rating=4.666666666666667,
+                review_count=3,
+            )
+            for i in range(rows)
+        ])
+        ListingImages.objects.bulk_create([
+            ListingImages(
+                listings=listing,
+                name=f'photo {n}',
+                position=n,
+                width=1600,
+                height=1067,
+                image=CloudinaryResource(f'listings/{listing.id}/{n}', format='jpg', version='1', type='upload', resource_type='image'),
+            )
+            for listing in listings
+            for n in range(3)
+        ])
+
+        today = timezone.localdate()
+        Bookings.objects.bulk_create([
+            Bookings(
+                guest=guest,
+                listing=listing,
+                start_date=today + timedelta(days=10),
+                end_date=today + timedelta(days=14),
+                adults=2,
+                total_price=Decimal('4938.00'),
+                status=Bookings.STATUS_CONFIRMED,
+            )
+            for listing in listings
+        ])
+
+        room = Room.objects.create(listing=listings[0], host=host, guest=guest, name='Benchmark chat')
+        Message.objects.bulk_create([
+            Message(room=room, user=guest if i % 2 else host, content=f'Message {i}: is the flat free next week?')
+            for i in range(rows)
+        ])
+        return host, guest, room
+
+    def measure(self, view_class, renderer, parser, request, kwargs, count):
+        view = view_class.as_view(renderer_classes=[renderer], parser_classes=[parser, FormParser, MultiPartParser], throttle_classes=[])
+
+        # Warm the result and card caches so both renderers see the same work.
+        body = view(request, **kwargs).render().content
+
+        totals = []
+        renders = []
+        for _ in range(count):
+            started = time.process_time()
+            response = view(request, **kwargs)
+            rendering = time.process_time()
+            response.render()
+            finished = time.process_time()
+            totals.append((finished - started) * 1000)
+            renders.append((finished - rendering) * 1000)
+        return (totals, renders), body
+
+    def report(self, label, before, after, identical, size):
+        (before_total, before_render), (after_total, after_render) = before, after
+        self.stdout.write(
+            f'{label} ({size / 1024:.0f} KB): '
+            f'stdlib {statistics.median(before_total):.2f} ms CPU/request ({statistics.median(before_render):.2f} ms rendering), '
+            f'orjson {statistics.median(after_total):.2f} ms CPU/request ({statistics.median(after_render):.2f} ms rendering), '
+            f'identical output: {"yes" if identical else "NO"}'
+        )
@@ -0,0 +1,366 @@
+import csv
+
+import json
+
+import re
+
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django.db import transaction
+
+from django.db.models import Q
+
+from django.utils.text import slugify
+
+from rest_framework import serializers
+
+from listings import geo
+
+from listings.amenities import amenity_ids
+
+from listings.facets import invalidate_facets
+
+from listings.models import Listings, Amenities
+
+from listings.result_cache import invalidate_listing_results
+
+from listings.search import index_listings
+
+from listings.serializers import CreateUpdateListSerializer
+
+from users.authentication import invalidate_users
+
+User = get_user_model()
+
+# Leaves room for a "-N" suffix within the 255 characters of title_slug.
+SLUG_BASE_LENGTH = 240
+
+AMENITY_SEPARATORS = re.compile(r"[,|]")
+
+class Command(BaseCommand):
+
+    help = (
+        'Import listings from a CSV or JSON Lines file. Rows are validated like the '
+        'create endpoint and written in batches; images are not imported'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('path')
+
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+
+        parser.add_argument('--host', help='Email of the host for rows without a host_email column')
+
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+
+        path = Path(options['path'])
+
+        file_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'jsonl')
+
+        self.default_host = options['host']
+
+        self.hosts = {}
+
+        self.host_ids = set()
+
+        self.slug_state = {}
+
+        self.serializer = CreateUpdateListSerializer()
+
+        imported = 0
+
+        invalid = 0
+
+        batch = []
+
+        try:
+
+            source = path.open(newline='', encoding='utf-8')
+
+        except OSError as e:
+
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        with source:
+
+            rows = self.read_csv(source) if file_format == 'csv' else self.read_jsonl(source)
+
+            for line, row in rows:
+
+                entry = self.validate(line, row)
+
+                if entry is None:
+
+                    invalid += 1
+
+                    continue
+
+                batch.append(entry)
+
+                if len(batch) >= options['batch_size']:
+
+                    imported += self.write_batch(batch)
+
+                    batch = []
+
+        if batch:
+
+            imported += self.write_batch(batch)
+
+        if imported:
+
+            # The per-listing post_save handlers don't run for bulk_create, so
+            # their side effects are applied once for the whole import.
+            User.objects.filter(id__in=self.host_ids, is_host=False).update(is_host=True)
+
+            invalidate_users(self.host_ids)
+
+            invalidate_facets()
+
+            invalidate_listing_results()
+
+        self.stdout.write(
+
+            self.style.SUCCESS(f'Imported {imported} listing(s), skipped {invalid} invalid row(s)')
+
+        )
+
+    def read_csv(self, source):
+
+        reader = csv.DictReader(source)
+
+        for row in reader:
+
+            # Empty cells mean "not given", so optional fields fall back to their defaults.
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+
+    def read_jsonl(self, source):
+
+        for line, text in enumerate(source, start=1):
+
+            if not text.strip():
+
+                continue
+
+            try:
+
+                row = json.loads(text)
+
+            except json.JSONDecodeError as e:
+
+                yield line, e
+
+                continue
+
+            yield line, row
+
+    def report(self, line, errors):
+
+        self.stderr.write(f'line {line}: {errors}')
+
+    def validate(self, line, row):
+
+        if not isinstance(row, dict):
+
+            self.report(line, row if isinstance(row, Exception) else 'expected an object')
+
+            return None
+
+        row = dict(row)
+
+        row.pop('images', None)
+
+        host_email = row.pop('host_email', None) or self.default_host
+
+        if not host_email:
+
+            self.report(line, 'no host_email and no --host given')
+
+            return None
+
+        if isinstance(row.get('amenities'), str):
+
+            row['amenities'] = [name.strip() for name in AMENITY_SEPARATORS.split(row['amenities']) if name.strip()]
+
+        # One serializer validates every row, so its fields are only built once.
+        try:
+
+            data = self.serializer.run_validation(row)
+
+        except serializers.ValidationError as e:
+
+            self.report(line, e.detail)
+
+            return None
+
+        return line, host_email.strip().lower(), data
+
+    def resolve_hosts(self, emails):
+
+        missing = set(emails) - set(self.hosts)
+
+        if missing:
+
+            for user_id, email, phone in User.objects.filter(email__in=missing).values_list('id', 'email', 'phone'):
+
+                self.hosts[email.lower()] = (user_id, phone)
+
+            for email in missing:
+
+                self.hosts.setdefault(email, None)
+
+    def load_slug_state(self, bases):
+
+        """Which of ``base`` and ``base-N`` are taken, for bases not already tracked, with one query."""
+
+        new_bases = set(bases) - set(self.slug_state)
+
+        if not new_bases:
+
+            return
+
+        # Ranges rather than startswith so the lookup can use the unique index.
+        taken_filter = Q()
+
+        for base in new_bases:
+
+            self.slug_state[base] = {'base_taken': False, 'next': 1, 'suffixes': set()}
+
+            taken_filter |= Q(title_slug=base) | Q(title_slug__gt=f'{base}-', title_slug__lt=f'{base}.')
+
+        for slug in Listings.objects.filter(taken_filter).values_list('title_slug', flat=True).iterator():
+
+            self.mark_slug_taken(slug)
+
+    def mark_slug_taken(self, slug):
+
+        if slug in self.slug_state:
+
+            self.slug_state[slug]['base_taken'] = True
+
+        prefix, _, suffix = slug.rpartition('-')
+
+        if prefix in self.slug_state and suffix.isdigit():
+
+            self.slug_state[prefix]['suffixes'].add(int(suffix))
+
+    def allocate_slugs(self, titles):
+
+        """
+        Unique slugs for ``titles`` in Listings.save's ``base``, ``base-1``, ... scheme.
+
+        Bases seen in the previous batch are tracked in memory, so a title that
+        recurs across the file costs one query in total rather than one per batch.
+        """
+
+        bases = [slugify(title)[:SLUG_BASE_LENGTH].strip('-') or 'listing' for title in titles]
+
+        self.load_slug_state(bases)
+
+        slugs = []
+
+        for base in bases:
+
+            state = self.slug_state[base]
+
+            if not state['base_taken']:
+
+                slug = base
+
+            else:
+
+                while state['next'] in state['suffixes']:
+
+                    state['suffixes'].discard(state['next'])
+
+                    state['next'] += 1
+
+                slug = f"{base}-{state['next']}"
+
+            self.mark_slug_taken(slug)
+
+            slugs.append(slug)
+
+        # Only keep what the next batch is likely to need.
+        self.slug_state = {base: self.slug_state[base] for base in bases}
+
+        return slugs
+
+    def write_batch(self, batch):
+
+        self.resolve_hosts(email for _, email, _ in batch)
+
+        entries = []
+
+        for line, email, data in batch:
+
+            host = self.hosts.get(email)
+
+            if host is None:
+
+                self.report(line, f'no user with email {email}')
+
+            elif not host[1]:
+
+                self.report(line, f'{email} must have a phone number to list a property')
+
+            else:
+
+                entries.append((host[0], data))
+
+        if not entries:
+
+            return 0
+
+        ids = amenity_ids(name for _, data in entries for name in data.get('amenities', []))
+
+        slugs = self.allocate_slugs([data['title'] for _, data in entries])
+
+        listings = []
+
+        amenity_names = []
+
+        for (host_id, data), slug in zip(entries, slugs):
+
+            data = dict(data)
+
+            names = list(dict.fromkeys(data.pop('amenities', [])))
+
+            listing = Listings(host_id=host_id, title_slug=slug, amenity_mask=Amenities.mask_for(names), **data)
+
+            if listing.latitude is not None and listing.longitude is not None:
+
+                listing.geohash = geo.encode(listing.latitude, listing.longitude)
+
+            listings.append(listing)
+
+            amenity_names.append(names)
+
+        through = Listings.amenities.through
+
+        with transaction.atomic():
+
+            Listings.objects.bulk_create(listings)
+
+            through.objects.bulk_create([
+
+                through(listings_id=listing.id, amenities_id=ids[name])
+
+                for listing, names in zip(listings, amenity_names)
+
+                for name in names
+
+            ])
+
+            index_listings(listings)
+
+        self.host_ids.update(host_id for host_id, _ in entries)
+
+        return len(listings)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_remove_listings_unique_host_address_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['price_per_night', 'id'], name='listing_price_id'),
+        ),
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['created_at', 'id'], name='listing_created_id'),
+        ),
+    ]
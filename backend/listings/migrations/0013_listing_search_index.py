@@ -0,0 +1,43 @@
+from django.db import migrations
+
+from listings.search import POSTGRES_DOCUMENT, SEARCH_COLUMNS, SEARCH_TABLE
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    columns = ", ".join(SEARCH_COLUMNS)
+
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM listings_listings"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS listings_search_gin ON listings_listings "
+            f"USING GIN ({POSTGRES_DOCUMENT.format(table='')})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS listings_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0012_listing_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
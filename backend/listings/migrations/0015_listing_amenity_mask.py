@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0014_listing_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listings',
+            name='amenity_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
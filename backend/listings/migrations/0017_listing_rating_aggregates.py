@@ -0,0 +1,83 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+CATEGORIES = ("accuracy", "communication", "cleanliness", "location", "check_in", "value")
+
+
+def backfill_ratings(apps, schema_editor):
+    Listings = apps.get_model("listings", "Listings")
+    Review = apps.get_model("reviews", "Review")
+    db = schema_editor.connection.alias
+
+    rows = (
+        Review.objects.using(db)
+        .values("listing_id")
+        .annotate(count=Count("id"), **{c: Sum(c) for c in CATEGORIES})
+    )
+    for row in rows:
+        sums = {f"{c}_score_sum": row[c] for c in CATEGORIES}
+        Listings.objects.using(db).filter(pk=row["listing_id"]).update(
+            review_count=row["count"],
+            rating=sum(sums.values()) / (row["count"] * len(CATEGORIES)),
+            **sums,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0016_listing_card_version'),
+        ('reviews', '0003_alter_review_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listings',
+            name='accuracy_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='check_in_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='cleanliness_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='communication_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='location_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='value_score_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['rating', 'id'], name='listing_rating_id'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
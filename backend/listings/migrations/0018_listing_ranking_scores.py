@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0017_listing_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listings',
+            name='popularity',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='recommended_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['popularity', 'id'], name='listing_popularity_id'),
+        ),
+        migrations.AddIndex(
+            model_name='listings',
+            index=models.Index(fields=['recommended_score', 'id'], name='listing_recommended_id'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0018_listing_ranking_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimages',
+            name='pending_file',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='listingimages',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='ready', max_length=10),
+        ),
+    ]
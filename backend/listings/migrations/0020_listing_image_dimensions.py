@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0019_listing_image_upload_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimages',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='listingimages',
+            name='placeholder',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='listingimages',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_covers(apps, schema_editor):
+    Listings = apps.get_model("listings", "Listings")
+    ListingImages = apps.get_model("listings", "ListingImages")
+    db = schema_editor.connection.alias
+
+    covers = (
+        ListingImages.objects.using(db)
+        .filter(listings=OuterRef("pk"), status="ready", image__isnull=False)
+        .exclude(image="")
+        .order_by("position", "id")
+    )
+    Listings.objects.using(db).update(cover_image=Subquery(covers.values("pk")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0021_image_assets'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='listingimages',
+            options={'ordering': ['position', 'id'], 'verbose_name_plural': 'Listing Images'},
+        ),
+        migrations.AddField(
+            model_name='listingimages',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='listings',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listings.listingimages'),
+        ),
+        migrations.AddIndex(
+            model_name='listingimages',
+            index=models.Index(fields=['listings', 'position', 'id'], name='listing_image_position'),
+        ),
+        migrations.RunPython(backfill_covers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:53
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+
+
+def mark_local_images(apps, schema_editor):
+    # Direct uploads confirmed against the local stand-in have their file under DIRECT_UPLOAD_ROOT.
+    ListingImages = apps.get_model("listings", "ListingImages")
+    db = schema_editor.connection.alias
+    storage = FileSystemStorage(location=settings.DIRECT_UPLOAD_ROOT)
+
+    local = []
+    for image in ListingImages.objects.using(db).filter(image__isnull=False).exclude(image="").iterator():
+        if image.image.public_id and storage.exists(f"{image.image.public_id}.{image.image.format}"):
+            local.append(image.pk)
+    ListingImages.objects.using(db).filter(pk__in=local).update(storage="local")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0022_listing_cover_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimages',
+            name='storage',
+            field=models.CharField(choices=[('cloudinary', 'Cloudinary'), ('local', 'Local')], default='cloudinary', max_length=10),
+        ),
+        migrations.RunPython(mark_local_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:07
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import migrations, models
+
+VARIANTS = ("thumbnail", "card", "hero")
+
+
+def record_local_variants(apps, schema_editor):
+    # Only uploads made since the stand-in renders variants have them on disk.
+    ListingImages = apps.get_model("listings", "ListingImages")
+    db = schema_editor.connection.alias
+    storage = FileSystemStorage(location=settings.DIRECT_UPLOAD_ROOT)
+
+    images = []
+    local = ListingImages.objects.using(db).filter(storage="local", image__isnull=False).exclude(image="")
+    for image in local.iterator():
+        image.local_variants = [
+            variant for variant in VARIANTS if storage.exists(f"{image.image.public_id}_{variant}.jpg")
+        ]
+        images.append(image)
+    ListingImages.objects.using(db).bulk_update(images, ["local_variants"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0023_listing_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listingimages',
+            name='local_variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(record_local_variants, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 from django.conf import settings
 
@@ -15,8 +15,12 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 from .queryset import ListingsQuerySet
 
+from . import geo
+
 from cloudinary.models import CloudinaryField
 
+from conf.cloudinary_utils import queue_cloudinary_deletion
+
 class Amenities(models.Model):
 
     AMENITY_CHOICES = [
@@ -63,12 +67,29 @@ class Amenities(models.Model):
 
     ]
 
+    # One bit per choice, in AMENITY_CHOICES order; append new choices, never reorder.
+    AMENITY_BITS = {name: 1 << i for i, (name, _) in enumerate(AMENITY_CHOICES)}
+
     name = models.CharField(max_length=100, choices=AMENITY_CHOICES)
 
     def __str__(self):
 
         return self.get_name_display()
 
+    @classmethod
+
+    def mask_for(cls, names):
+
+        """Bitmask for an iterable of amenity names; raises KeyError on unknown names."""
+
+        mask = 0
+
+        for name in names:
+
+            mask |= cls.AMENITY_BITS[name]
+
+        return mask
+
     class Meta:
 
         verbose_name_plural = "Amenities"
@@ -119,6 +140,12 @@ class Listings(TimeStampedModel):
 
     city = models.CharField(max_length=100, db_index=True)
 
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False)
+
     property_type = models.CharField(max_length=15, choices=PROPERTY_TYPES, db_index=True)
 
     max_guests = models.IntegerField(choices=GUEST_COUNT_CHOICES, db_index=True)
@@ -133,6 +160,10 @@ class Listings(TimeStampedModel):
 
     amenities = models.ManyToManyField(Amenities, blank=True)
 
+    # Mirror of `amenities` as Amenities.AMENITY_BITS, so amenity filters need no joins. Changes through the
+    # relation resync it in listings.signals; callers of set_listing_amenities set it themselves.
+    amenity_mask = models.PositiveIntegerField(default=0, editable=False)
+
     allows_children = models.BooleanField(default=True, db_index=True)
 
     allows_infants = models.BooleanField(default=True)
@@ -141,6 +172,49 @@ class Listings(TimeStampedModel):
 
     title_slug = models.SlugField(unique=True, blank=True, max_length=255, null=True)
 
+    # Denormalized from reviews.Review; maintained by ListingsQuerySet.add_review and
+    # recomputed by `manage.py rebuild_listing_ratings`. rating is 0 until reviewed.
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+
+    accuracy_score_sum = models.IntegerField(default=0, editable=False)
+
+    communication_score_sum = models.IntegerField(default=0, editable=False)
+
+    cleanliness_score_sum = models.IntegerField(default=0, editable=False)
+
+    location_score_sum = models.IntegerField(default=0, editable=False)
+
+    check_in_score_sum = models.IntegerField(default=0, editable=False)
+
+    value_score_sum = models.IntegerField(default=0, editable=False)
+
+    rating = models.FloatField(default=0, editable=False)
+
+    # Refreshed periodically by listings.tasks.refresh_listing_scores.
+    popularity = models.PositiveIntegerField(default=0, editable=False)
+
+    recommended_score = models.FloatField(default=0, editable=False)
+
+    # Bumped by listings.signals whenever the serialized card changes; see listings.cards.
+    card_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # First ready image by position; maintained by listings.covers.refresh_covers.
+    cover_image = models.ForeignKey(
+
+        'ListingImages',
+
+        null=True,
+
+        blank=True,
+
+        editable=False,
+
+        on_delete=models.SET_NULL,
+
+        related_name='+'
+
+    )
+
     objects = ListingsQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
@@ -161,6 +235,20 @@ class Listings(TimeStampedModel):
 
             self.title_slug = unique_slug
 
+        if self.latitude is not None and self.longitude is not None:
+
+            self.geohash = geo.encode(self.latitude, self.longitude)
+
+        else:
+
+            self.geohash = None
+
+        update_fields = kwargs.get("update_fields")
+
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -173,6 +261,21 @@ class Listings(TimeStampedModel):
 
         ordering = ["-created_at"]
 
+        indexes = [
+
+            # Keyset pagination sorts on (column, id); see conf.pagination.KeysetCursorPagination.
+            models.Index(fields=["price_per_night", "id"], name="listing_price_id"),
+
+            models.Index(fields=["created_at", "id"], name="listing_created_id"),
+
+            models.Index(fields=["rating", "id"], name="listing_rating_id"),
+
+            models.Index(fields=["popularity", "id"], name="listing_popularity_id"),
+
+            models.Index(fields=["recommended_score", "id"], name="listing_recommended_id"),
+
+        ]
+
         constraints = [
 
             models.CheckConstraint(
@@ -199,8 +302,84 @@ class Listings(TimeStampedModel):
 
         )
 
+class ImageAsset(TimeStampedModel):
+
+    """
+    One stored image, shared by every ListingImages row with the same bytes.
+
+    ``ref_count`` counts those rows; the remote asset is only deleted when the
+    last of them goes away.
+    """
+
+    digest = models.CharField(max_length=64, unique=True)
+
+    image = CloudinaryField('image', blank=True, null=True)
+
+    size = models.PositiveIntegerField(default=0)
+
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+
+        return self.digest
+
+    @classmethod
+
+    def release(cls, asset_id, discard=queue_cloudinary_deletion):
+
+        """Drop one reference, passing the stored image to ``discard`` when it was the last."""
+
+        # The row lock orders this against stage_images, which locks the asset before reusing it.
+        with transaction.atomic():
+
+            asset = cls.objects.select_for_update().filter(pk=asset_id).first()
+
+            if asset is None:
+
+                return
+
+            if asset.ref_count > 1:
+
+                cls.objects.filter(pk=asset_id).update(ref_count=models.F("ref_count") - 1)
+
+                return
+
+            if asset.image:
+
+                discard(asset.image)
+
+            asset.delete()
+
 class ListingImages(TimeStampedModel):
 
+    STATUS_PENDING = "pending"
+
+    STATUS_READY = "ready"
+
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+
+        (STATUS_PENDING, "Pending"),
+
+        (STATUS_READY, "Ready"),
+
+        (STATUS_FAILED, "Failed"),
+
+    ]
+
+    STORAGE_CLOUDINARY = "cloudinary"
+
+    STORAGE_LOCAL = "local"
+
+    STORAGE_CHOICES = [
+
+        (STORAGE_CLOUDINARY, "Cloudinary"),
+
+        (STORAGE_LOCAL, "Local"),
+
+    ]
+
     listings = models.ForeignKey(
 
         Listings,
@@ -215,10 +394,53 @@ class ListingImages(TimeStampedModel):
 
     image = CloudinaryField('image', blank=True, null=True)
 
+    # Where the file lives: Cloudinary, or the local direct-upload stand-in.
+    storage = models.CharField(max_length=10, choices=STORAGE_CHOICES, default=STORAGE_CLOUDINARY)
+
+    # Uploads are staged on local disk and pushed to Cloudinary by a Celery task.
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_READY, db_index=True)
+
+    pending_file = models.CharField(max_length=255, blank=True, default="", editable=False)
+
+    width = models.PositiveIntegerField(null=True, blank=True)
+
+    height = models.PositiveIntegerField(null=True, blank=True)
+
+    # Tiny blurred JPEG as a data URI, shown while the real image loads.
+    placeholder = models.TextField(blank=True, default="")
+
+    # Variants the local stand-in rendered next to the file; Cloudinary renders any on request.
+    local_variants = models.JSONField(default=list, blank=True)
+
+    asset = models.ForeignKey(
+
+        ImageAsset,
+
+        null=True,
+
+        blank=True,
+
+        on_delete=models.SET_NULL,
+
+        related_name='listing_images'
+
+    )
+
+    # Display order within the listing; the first ready image is its cover.
+    position = models.PositiveIntegerField(default=0)
+
     class Meta:
 
         verbose_name_plural = "Listing Images"
 
+        ordering = ["position", "id"]
+
+        indexes = [
+
+            models.Index(fields=["listings", "position", "id"], name="listing_image_position"),
+
+        ]
+
     def __str__(self):
 
         return f"{self.name}"
@@ -226,10 +448,19 @@ class ListingImages(TimeStampedModel):
 
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
-from conf.cloudinary_utils import delete_cloudinary_asset
 
 @receiver(post_delete, sender=ListingImages)
 def delete_listing_image_on_delete(sender, instance, **kwargs):
-    if instance.image:
-        delete_cloudinary_asset(instance.image)
+    if instance.storage == ListingImages.STORAGE_LOCAL:
+        from listings.direct_uploads import discard_local_image
+        discard = discard_local_image
+    else:
+        discard = queue_cloudinary_deletion
+    if instance.asset_id:
+        ImageAsset.release(instance.asset_id, discard)
+    elif instance.image:
+        discard(instance.image)
+    if instance.pending_file:
+        from listings.uploads import discard_staged_file
+        discard_staged_file(instance.pending_file)
 
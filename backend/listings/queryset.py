@@ -1,4 +1,5 @@
-from django.db.models import QuerySet, Q
+from django.db.models import QuerySet, Exists, OuterRef, F, FloatField, Value
+from django.db.models.functions import Cast
 
 class ListingsQuerySet(QuerySet):
 
@@ -8,12 +9,34 @@ class ListingsQuerySet(QuerySet):
     def with_listing_detail_relations(self):
         return self.with_listing_card_relations().prefetch_related("amenities")
 
-    def get_available_listings(self, start_date, end_date):
+    def get_available_listings(self, start_date, end_date, at_time=None):
 
-        return self.exclude(
+        from bookings.models import BookedNight
 
-            Q(bookings__start_date__lt=end_date) & 
-            Q(bookings__end_date__gt=start_date) & 
-            Q(bookings__status__in=["confirmed", "paid"])
+        occupied = BookedNight.occupied(
+            start_date=start_date,
+            end_date=end_date,
+            at_time=at_time,
+        ).filter(listing=OuterRef("pk"))
 
-        ).distinct()
+        return self.filter(~Exists(occupied))
+
+    def add_review(self, review):
+
+        """Fold one new review into the denormalized rating columns with a single UPDATE."""
+
+        from reviews.models import Review
+
+        categories = Review.RATING_CATEGORIES
+        review_total = sum(getattr(review, category) for category in categories)
+        score_total = sum((F(f"{category}_score_sum") for category in categories), Value(review_total))
+
+        return self.update(
+            review_count=F("review_count") + 1,
+            rating=Cast(score_total, FloatField()) / ((F("review_count") + 1) * len(categories)),
+            card_version=F("card_version") + 1,
+            **{
+                f"{category}_score_sum": F(f"{category}_score_sum") + getattr(review, category)
+                for category in categories
+            },
+        )
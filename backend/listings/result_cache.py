@@ -0,0 +1,101 @@
+"""
+Cache of public search results, keyed by the canonical filter values.
+
+An entry holds the ordered ids (plus per-row annotations such as
+``distance_km``) of up to MAX_CACHED_RESULTS matches and the total count;
+cards are hydrated separately through ``listings.cards``. Keys embed
+generation counters: any listing change bumps the global one, and booking
+changes bump a bookings generation, which only keys for date searches
+include. The city filter matches substrings, so a booking can change searches
+for any city; the bookings generation is therefore global, and it is bumped
+once the booking commits so no search caches the state before it.
+
+Entries stay fresh for RESULT_CACHE_TTL and are built through
+``conf.cache.remember``: a single worker holding the key's lock recomputes an
+expiring entry while the others keep serving the stale copy; on a cold key
+they wait briefly for that worker instead of all querying.
+"""
+
+import hashlib
+from decimal import Decimal
+
+from django.db import transaction
+
+from conf.cache import remember
+from conf.generations import bump_generation, get_generation
+
+from .cards import VOLATILE_FIELDS
+
+RESULT_CACHE_TTL = 30
+
+STALE_GRACE = 30
+
+MAX_CACHED_RESULTS = 1000
+
+LISTINGS_GENERATION = "listings:search:generation"
+
+BOOKINGS_GENERATION = "listings:search:bookings-generation"
+
+
+def _canonical(value):
+    if isinstance(value, Decimal):
+        # 2, 2.0 and 2.00 are the same filter.
+        return repr(value.normalize())
+    if isinstance(value, (list, tuple)):
+        return repr([_canonical(item) for item in value])
+    return repr(value)
+
+
+def result_cache_key(filterset):
+    cleaned = filterset.form.cleaned_data
+    params = sorted(
+        (name, _canonical(value))
+        for name, value in cleaned.items()
+        if value is not None and value != "" and value != []
+    )
+
+    generations = [get_generation(LISTINGS_GENERATION)]
+    if cleaned.get("check_in") and cleaned.get("check_out"):
+        generations.append(get_generation(BOOKINGS_GENERATION))
+
+    digest = hashlib.sha1(repr((params, generations)).encode()).hexdigest()
+    return f"listings:search:{digest}"
+
+
+def evaluate(queryset):
+    fields = ["id"] + [field for field in VOLATILE_FIELDS if field in queryset.query.annotations]
+    rows = list(queryset.values_list(*fields)[:MAX_CACHED_RESULTS + 1])
+    count = queryset.count() if len(rows) > MAX_CACHED_RESULTS else len(rows)
+    return {"fields": fields, "rows": rows[:MAX_CACHED_RESULTS], "count": count}
+
+
+def cached_results(key, compute):
+    """Entry for ``key``; at most one worker at a time runs ``compute`` for it."""
+    return remember(key, compute, RESULT_CACHE_TTL, stale=STALE_GRACE)
+
+
+def invalidate_listing_results():
+    bump_generation(LISTINGS_GENERATION)
+
+
+def invalidate_booking_results():
+    transaction.on_commit(lambda: bump_generation(BOOKINGS_GENERATION))
+
+
+class ResultWindow:
+    """Sequence over a cached entry that Django's Paginator can slice and count."""
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def count(self):
+        return self.entry["count"]
+
+    def __len__(self):
+        return self.entry["count"]
+
+    def covers(self, stop):
+        return stop <= len(self.entry["rows"]) or self.entry["count"] == len(self.entry["rows"])
+
+    def __getitem__(self, index):
+        return self.entry["rows"][index]
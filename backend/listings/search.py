@@ -0,0 +1,114 @@
+"""
+Full-text search over listing title, description, city and country.
+
+SQLite keeps an FTS5 table (``listings_search``) whose rowid is the listing id;
+``listings.signals`` refreshes a row on every ``Listings`` save and delete.
+Postgres matches against a GIN expression index over a weighted tsvector, which
+the database maintains itself. Both are created by migration 0013. Other
+backends fall back to ``icontains`` without ranking.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = "listings_search"
+
+SEARCH_COLUMNS = ("title", "description", "city", "country")
+
+# bm25 column weights, in SEARCH_COLUMNS order.
+SQLITE_WEIGHTS = "10.0, 1.0, 4.0, 4.0"
+
+POSTGRES_DOCUMENT = (
+    "(setweight(to_tsvector('english'::regconfig, coalesce({table}title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce({table}city, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce({table}country, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce({table}description, '')), 'C'))"
+)
+
+
+def sqlite_match_expression(query):
+    """Quote each word as an FTS5 prefix term so user input can't inject MATCH syntax."""
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", query))
+
+
+def search_listings(queryset, query):
+    """
+    Restrict ``queryset`` to listings matching ``query`` and annotate a
+    ``search_rank`` (higher is better). Results are ordered by relevance.
+    """
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+
+    if vendor == "sqlite":
+        match = sqlite_match_expression(query)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s",
+                [match],
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({SEARCH_TABLE}, {SQLITE_WEIGHTS}) FROM {SEARCH_TABLE} "
+                f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    elif vendor == "postgresql":
+        document = POSTGRES_DOCUMENT.format(table=f'"{table}".')
+        queryset = queryset.annotate(
+            search_rank=RawSQL(
+                f"ts_rank_cd({document}, websearch_to_tsquery('english'::regconfig, %s))",
+                [query],
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                f"{document} @@ websearch_to_tsquery('english'::regconfig, %s)",
+                [query],
+                output_field=BooleanField(),
+            )
+        )
+
+    else:
+        condition = Q()
+        for column in SEARCH_COLUMNS:
+            condition |= Q(**{f"{column}__icontains": query})
+        queryset = queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    return queryset.order_by("-search_rank", "-id")
+
+
+def index_listing(listing, using="default"):
+    index_listings([listing], using=using)
+
+
+def index_listings(listings, using="default"):
+    connection = connections[using]
+    if connection.vendor != "sqlite" or not listings:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+            [[listing.pk] for listing in listings],
+        )
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [[listing.pk] + [getattr(listing, column) for column in SEARCH_COLUMNS] for listing in listings],
+        )
+
+
+def unindex_listing(listing_id, using="default"):
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [listing_id])
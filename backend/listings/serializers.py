@@ -3,12 +3,24 @@ from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 
 from decimal import Decimal
-from django.db import transaction
+from django.db import models, transaction
 
 from .models import Listings, ListingImages, Amenities
 
+from .amenities import set_listing_amenities
+
+from .cards import VOLATILE_FIELDS, card_key, fetch_cards
+
+from .covers import image_count
+
+from .uploads import file_digest, stage_images
+
+from . import direct_uploads, image_variants
+
 from users.models import User
 
+from conf.fieldsets import SparseFieldsetMixin
+
 class HostSerializer(serializers.ModelSerializer):
 
     avatar = serializers.SerializerMethodField()
@@ -33,11 +45,19 @@ class ListingImageSerializer(serializers.ModelSerializer):
 
     image = serializers.SerializerMethodField()
 
+    placeholder = serializers.SerializerMethodField()
+
+    variants = serializers.SerializerMethodField()
+
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
 
         model = ListingImages
 
-        fields = ["id", "name", "image"]
+        fields = ["id", "name", "image", "status", "position", "width", "height", "placeholder", "variants", "srcset"]
+
+        read_only_fields = ["position"]
 
     @extend_schema_field(serializers.URLField)
 
@@ -45,10 +65,71 @@ class ListingImageSerializer(serializers.ModelSerializer):
 
         if obj.image:
 
+            if obj.storage == ListingImages.STORAGE_LOCAL and getattr(obj.image, 'public_id', None):
+
+                return direct_uploads.local_url(obj.image)
+
             return obj.image.url if hasattr(obj.image, 'url') else str(obj.image)
 
         return None
 
+    def variant_urls(self, obj):
+
+        if not getattr(obj.image, 'public_id', None):
+
+            return {}
+
+        if obj.storage == ListingImages.STORAGE_LOCAL:
+
+            return {variant: direct_uploads.local_variant_url(obj.image, variant) for variant in obj.local_variants}
+
+        return {
+
+            variant: image_variants.cloudinary_variant_url(obj.image, image_variants.variant_width(obj, variant))
+
+            for variant in image_variants.VARIANT_WIDTHS
+
+        }
+
+    @extend_schema_field(serializers.CharField(allow_null=True))
+
+    def get_placeholder(self, obj):
+
+        if obj.placeholder:
+
+            return obj.placeholder
+
+        if getattr(obj.image, 'public_id', None) and obj.storage == ListingImages.STORAGE_CLOUDINARY:
+
+            return image_variants.cloudinary_placeholder_url(obj.image)
+
+        return None
+
+    @extend_schema_field(serializers.DictField(child=serializers.DictField()))
+
+    def get_variants(self, obj):
+
+        return {
+
+            variant: {"url": url, "width": image_variants.variant_width(obj, variant)}
+
+            for variant, url in self.variant_urls(obj).items()
+
+        }
+
+    @extend_schema_field(serializers.CharField(allow_null=True))
+
+    def get_srcset(self, obj):
+
+        urls = self.variant_urls(obj)
+
+        # Without the real width the descriptors could promise sizes the image doesn't have.
+        if not urls or obj.width is None:
+
+            return None
+
+        return ", ".join(f"{url} {image_variants.variant_width(obj, variant)}w" for variant, url in urls.items())
+
 class AmenitySerializer(serializers.ModelSerializer):
 
     display_name = serializers.CharField(source='get_name_display', read_only=True)
@@ -59,14 +140,52 @@ class AmenitySerializer(serializers.ModelSerializer):
 
         fields = ["name", "display_name"]
 
-class ListingSerializer(serializers.ModelSerializer):
+class ListingCardListSerializer(serializers.ListSerializer):
+
+    """Renders a page of listing cards from the shared card cache."""
+
+    def to_representation(self, data):
+
+        listings = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        self.child.prime_cards(listings)
+
+        return [self.child.to_representation(listing) for listing in listings]
+
+class NestedListingCardListSerializer(serializers.ListSerializer):
+
+    """For rows nesting a ListingSerializer as `listing`: primes the page's cards in one batch."""
+
+    def to_representation(self, data):
+
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+
+        listing = self.child.fields.get("listing")
+
+        # Absent or collapsed to an id when the request narrows the fields.
+        if isinstance(listing, ListingSerializer):
+
+            listing.prime_cards([item.listing for item in items])
+
+        return super().to_representation(items)
+
+class ListingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+
+    card_cache = True
+
+    expandable_fields = ("host",)
+
+    # Relations a card cache miss needs; loaded once for all misses on a page.
+    card_prefetch = ("host", "listingimages")
 
     host = HostSerializer(read_only=True)
 
-    images = ListingImageSerializer(many=True, read_only=True, source="listingimages")
+    images = serializers.SerializerMethodField()
 
     property_type_display = serializers.CharField(source='get_property_type_display', read_only=True)
 
+    distance_km = serializers.FloatField(read_only=True)
+
     class Meta:
 
         model = Listings
@@ -110,12 +229,124 @@ class ListingSerializer(serializers.ModelSerializer):
             "created_at",
             "address",
 
+            "latitude",
+
+            "longitude",
+
+            "rating",
+
+            "review_count",
+
+            "distance_km",
+
         ]
 
         read_only_fields = ["created_at"]
 
+        list_serializer_class = ListingCardListSerializer
+
+    @extend_schema_field(ListingImageSerializer(many=True))
+
+    def get_images(self, obj):
+
+        # Filtered here rather than in SQL so the prefetched images are reused.
+        ready = [image for image in obj.listingimages.all() if image.status == ListingImages.STATUS_READY]
+
+        return ListingImageSerializer(ready, many=True, context=self.context).data
+
+    @property
+
+    def sparse_by_projection(self):
+
+        # Cached cards always hold every field; the request's selection is applied to the copy served.
+        return self.card_cache
+
+    def prime_cards(self, listings):
+
+        if self.card_cache:
+
+            self._cards = fetch_cards(self, listings)
+
+    def render_card(self, instance):
+
+        return super().to_representation(instance)
+
+    def to_representation(self, instance):
+
+        if not self.card_cache:
+
+            return super().to_representation(instance)
+
+        key = card_key(self, instance)
+
+        cards = getattr(self, "_cards", {})
+
+        if key not in cards:
+
+            cards = fetch_cards(self, [instance])
+
+        card = dict(cards[key])
+
+        for field in VOLATILE_FIELDS:
+
+            if field in self.fields and hasattr(instance, field):
+
+                card[field] = self.fields[field].to_representation(getattr(instance, field))
+
+        return self.project_representation(card, instance)
+
+class ListingCardSerializer(ListingSerializer):
+
+    """Compact search card: the cover image instead of every image, and no host."""
+
+    card_prefetch = ("cover_image",)
+
+    cover_image = ListingImageSerializer(read_only=True)
+
+    class Meta(ListingSerializer.Meta):
+
+        fields = [
+
+            "id",
+
+            "title",
+
+            "title_slug",
+
+            "country",
+
+            "city",
+
+            "property_type",
+
+            "property_type_display",
+
+            "max_guests",
+
+            "bedrooms",
+
+            "beds",
+
+            "price_per_night",
+
+            "cover_image",
+
+            "latitude",
+
+            "longitude",
+
+            "rating",
+
+            "review_count",
+
+            "distance_km",
+
+        ]
+
 class ListingDetailSerializer(ListingSerializer):
 
+    card_cache = False
+
     amenities = AmenitySerializer(many=True, read_only=True)
 
     class Meta(ListingSerializer.Meta):
@@ -238,6 +469,10 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
 
             "allows_pets",
 
+            "latitude",
+
+            "longitude",
+
         ]
 
     def validate_max_guests(self, value):
@@ -365,12 +600,18 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
                         content_type = getattr(file_obj, 'content_type', '')
                         if content_type and not content_type.startswith('image/'):
                             raise serializers.ValidationError({"images": f"File '{img_info.get('name', 'file')}' is not a valid image type."})
+                        # Hashed once here so staging can reuse identical files.
+                        file_obj.content_digest = file_digest(file_obj)
 
                 if len(images_list) > 5:
                     raise serializers.ValidationError({"images": "Maximum of 5 images allowed per listing."})
 
                 attrs['images'] = images_list
 
+        if ("latitude" in attrs) != ("longitude" in attrs):
+
+            raise serializers.ValidationError("Latitude and longitude must be provided together.")
+
         if request and not request.user.phone:
 
             raise serializers.ValidationError("Must have a phone number to list a property.")
@@ -385,25 +626,16 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             listing = Listings.objects.create(
                 host=request.user,
+                amenity_mask=Amenities.mask_for(amenities_data),
                 **validated_data
             )
 
-            for a in amenities_data:
-                amenity, _ = Amenities.objects.get_or_create(name=a)
-                listing.amenities.add(amenity)
-
-            try:
-                for img_data in images_data:
-                    image_file = img_data.get('image')
-                    image_name = img_data.get('name')
-                    if image_file and image_name:
-                        ListingImages.objects.create(
-                            listings=listing,
-                            name=image_name,
-                            image=image_file
-                        )
-            except Exception as e:
-                raise serializers.ValidationError({"images": f"Failed to upload images: {str(e)}"})
+            set_listing_amenities(listing, amenities_data, created=True)
+
+            stage_images(listing, [
+                (img_data['name'], img_data['image']) for img_data in images_data
+                if img_data.get('image') and img_data.get('name')
+            ])
 
             return listing
 
@@ -415,13 +647,12 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             for attr, value in validated_data.items():
                 setattr(instance, attr, value)
+            if amenities_data is not None:
+                instance.amenity_mask = Amenities.mask_for(amenities_data)
             instance.save()
 
             if amenities_data is not None:
-                instance.amenities.clear()
-                for a in amenities_data:
-                    amenity, _ = Amenities.objects.get_or_create(name=a)
-                    instance.amenities.add(amenity)
+                set_listing_amenities(instance, amenities_data)
 
             if delete_images:
                 for item in delete_images:
@@ -447,22 +678,14 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
                                 img.delete()
 
             if images_data is not None:
-                current_count = instance.listingimages.count()
+                current_count = image_count(instance)
                 if current_count + len(images_data) > 5:
                     raise serializers.ValidationError({"images": f"Cannot add {len(images_data)} images. Listing already has {current_count} images (Max 5)."})
 
-                try:
-                    for img_data in images_data:
-                        image_file = img_data.get('image')
-                        image_name = img_data.get('name')
-                        if image_file and image_name:
-                            ListingImages.objects.create(
-                                listings=instance,
-                                name=image_name,
-                                image=image_file
-                            )
-                except Exception as e:
-                    raise serializers.ValidationError({"images": f"Failed to upload images: {str(e)}"})
+                stage_images(instance, [
+                    (img_data['name'], img_data['image']) for img_data in images_data
+                    if img_data.get('image') and img_data.get('name')
+                ])
 
             return instance
 
@@ -471,6 +694,31 @@ class CreateUpdateListSerializer(serializers.ModelSerializer):
         return ListingDetailSerializer(instance, context=self.context).data
 
 
+class DirectUploadConfirmSerializer(serializers.Serializer):
+    public_id = serializers.CharField(max_length=200)
+    version = serializers.IntegerField()
+    signature = serializers.CharField(max_length=64)
+    # Part of the stored resource and of local file paths, so only the formats uploads may have.
+    format = serializers.ChoiceField(choices=direct_uploads.ALLOWED_FORMATS.split(","))
+    name = serializers.CharField(max_length=100, required=False)
+    # As reported by Cloudinary's upload response; used for layout only.
+    width = serializers.IntegerField(min_value=1, required=False)
+    height = serializers.IntegerField(min_value=1, required=False)
+
+
+class ListingImageOrderSerializer(serializers.Serializer):
+
+    order = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_order(self, value):
+
+        if sorted(value) != sorted(self.context["listing"].listingimages.values_list("id", flat=True)):
+
+            raise serializers.ValidationError("List every image of the listing exactly once.")
+
+        return value
+
+
 class ListingImageUploadSerializer(serializers.Serializer):
     images = serializers.ListField(
         child=serializers.ImageField(allow_empty_file=False),
@@ -488,5 +736,7 @@ class ListingImageUploadSerializer(serializers.Serializer):
             content_type = getattr(img, 'content_type', '')
             if content_type and not content_type.startswith("image/"):
                 raise serializers.ValidationError(f"File '{img.name}' is not a valid image format.")
+            # Hashed once here so staging can reuse identical files.
+            img.content_digest = file_digest(img)
         return value
 
@@ -1,8 +1,26 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, post_delete
 
 from django.dispatch import receiver
 
-from listings.models import Listings
+from django.contrib.auth import get_user_model
+
+from listings.models import Listings, ListingImages, Amenities
+
+from listings.search import SEARCH_COLUMNS, index_listing, unindex_listing
+
+from listings.amenities import invalidate_amenity_registry, refresh_amenity_masks
+
+from listings.facets import invalidate_facets
+
+from listings.result_cache import invalidate_listing_results
+
+from listings.cards import bump_card_versions
+
+from listings.covers import refresh_covers
+
+User = get_user_model()
+
+HOST_CARD_FIELDS = {"username", "avatar"}
 
 @receiver(post_save, sender=Listings)
 
@@ -13,3 +31,104 @@ def update_host_status(sender, instance, created, **kwargs):
         instance.host.is_host = True
 
         instance.host.save()
+
+@receiver(post_save, sender=Listings)
+
+def update_search_index(sender, instance, using, update_fields=None, **kwargs):
+
+    if update_fields and not set(update_fields) & set(SEARCH_COLUMNS):
+
+        return
+
+    index_listing(instance, using=using)
+
+@receiver(post_delete, sender=Listings)
+
+def remove_from_search_index(sender, instance, using, **kwargs):
+
+    unindex_listing(instance.pk, using=using)
+
+@receiver(post_save, sender=Listings)
+
+@receiver(post_delete, sender=Listings)
+
+def invalidate_listing_facets(sender, **kwargs):
+
+    invalidate_facets()
+
+    invalidate_listing_results()
+
+@receiver(post_save, sender=Listings)
+
+def bump_listing_card(sender, instance, **kwargs):
+
+    bump_card_versions(Listings.objects.filter(pk=instance.pk))
+
+    instance.card_version += 1
+
+@receiver(post_save, sender=ListingImages)
+
+@receiver(post_delete, sender=ListingImages)
+
+def bump_listing_card_for_image(sender, instance, **kwargs):
+
+    refresh_covers([instance.listings_id])
+
+    bump_card_versions(Listings.objects.filter(pk=instance.listings_id))
+
+@receiver(post_save, sender=User)
+
+def bump_host_listing_cards(sender, instance, created, update_fields=None, **kwargs):
+
+    if created or (update_fields and not set(update_fields) & HOST_CARD_FIELDS):
+
+        return
+
+    bump_card_versions(Listings.objects.filter(host=instance))
+
+@receiver(post_save, sender=Amenities)
+
+@receiver(post_delete, sender=Amenities)
+
+def refresh_amenity_registry(sender, **kwargs):
+
+    invalidate_amenity_registry()
+
+@receiver(m2m_changed, sender=Listings.amenities.through)
+
+def sync_amenity_mask(sender, instance, action, reverse, pk_set, **kwargs):
+
+    # Changes through the relation (admin forms, .add()/.set()); set_listing_amenities writes rows directly.
+    if reverse and action == "pre_clear":
+
+        # A clear from the amenity's side doesn't say which listings lose it.
+        instance._cleared_listing_ids = list(instance.listings_set.values_list("pk", flat=True))
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+
+        return
+
+    if not reverse:
+
+        listing_ids = [instance.pk]
+
+    elif action == "post_clear":
+
+        listing_ids = instance.__dict__.pop("_cleared_listing_ids", [])
+
+    else:
+
+        listing_ids = list(pk_set)
+
+    if listing_ids:
+
+        masks = refresh_amenity_masks(listing_ids)
+
+        if not reverse:
+
+            # So a later save of this instance doesn't write the old mask back.
+            instance.amenity_mask = masks[instance.pk]
+
+        invalidate_facets()
+
+        invalidate_listing_results()
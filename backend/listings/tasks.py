@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from celery import shared_task
+
+from django.conf import settings
+from django.db.models import Case, Count, FloatField, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Ln
+from django.utils import timezone
+
+from .models import ListingImages, Listings
+from .uploads import fail_pending_images, push_pending_images, queue_uploads
+
+POPULARITY_WINDOW = timedelta(days=90)
+
+# Pending images older than this are assumed to have lost their upload task.
+STALE_UPLOAD_AGE = timedelta(minutes=10)
+
+# Weights of the "recommended" score components, each roughly on a 0-5 scale.
+BOOKING_WEIGHT = 0.4
+RATING_WEIGHT = 0.3
+WISHLIST_WEIGHT = 0.2
+RECENCY_WEIGHT = 0.1
+
+# Reviews needed before a listing's average counts at full weight.
+RATING_CONFIDENCE_REVIEWS = 5
+
+
+def _count(queryset, field):
+    """Correlated COUNT(*) subquery per listing, 0 when there are no rows."""
+    counted = queryset.filter(**{field: OuterRef("pk")}).order_by().values(field).annotate(n=Count("*")).values("n")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+@shared_task
+def refresh_listing_scores():
+    """
+    Recompute popularity and recommended_score for every listing in one UPDATE.
+
+    The database evaluates the whole formula set-wise, so the job costs one
+    statement no matter how many listings there are.
+    """
+    from bookings.models import Bookings
+    from wishlist.models import Wishlist
+
+    now = timezone.now()
+
+    bookings = _count(
+        Bookings.objects.filter(
+            status__in=Bookings.RESERVED_STATUSES,
+            created_at__gte=now - POPULARITY_WINDOW,
+        ),
+        "listing",
+    )
+    saves = _count(Wishlist.listings.through.objects.all(), "listings")
+
+    confidence = Cast("review_count", FloatField()) / (Cast("review_count", FloatField()) + RATING_CONFIDENCE_REVIEWS)
+    recency = Case(
+        When(created_at__gte=now - timedelta(days=7), then=Value(5.0)),
+        When(created_at__gte=now - timedelta(days=30), then=Value(3.0)),
+        When(created_at__gte=now - timedelta(days=90), then=Value(1.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    score = (
+        BOOKING_WEIGHT * Ln(Cast(bookings, FloatField()) + 1.0)
+        + RATING_WEIGHT * Cast("rating", FloatField()) * confidence
+        + WISHLIST_WEIGHT * Ln(Cast(saves, FloatField()) + 1.0)
+        + RECENCY_WEIGHT * recency
+    )
+
+    return Listings.objects.update(popularity=bookings, recommended_score=score)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def upload_listing_images(self, image_ids):
+    """Push staged listing images to Cloudinary, retrying the ones that fail."""
+    failed = push_pending_images(image_ids)
+    if not failed:
+        return
+    if self.request.retries < self.max_retries:
+        raise self.retry(args=[failed])
+    fail_pending_images(failed)
+
+
+@shared_task
+def retry_stale_image_uploads():
+    """Queue uploads for pending images whose task never ran, e.g. because the broker was down."""
+    stale = list(
+        ListingImages.objects.filter(
+            status=ListingImages.STATUS_PENDING,
+            created_at__lt=timezone.now() - STALE_UPLOAD_AGE,
+        ).values_list("pk", flat=True)
+    )
+    batch_size = settings.IMAGE_UPLOAD_CONCURRENCY * 5
+    for start in range(0, len(stale), batch_size):
+        queue_uploads(stale[start:start + batch_size])
+    return len(stale)
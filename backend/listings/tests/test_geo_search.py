@@ -0,0 +1,119 @@
+from django.test import SimpleTestCase, TestCase
+
+from django.urls import reverse
+
+from rest_framework import status
+
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from listings import geo
+
+from listings.tests.test_listings import create_estate
+
+PUBLIC_LISTING_URL = reverse('listing:public-listings')
+
+class GeohashTest(SimpleTestCase):
+
+    def test_encode_matches_reference(self):
+
+        self.assertEqual(geo.encode(57.64911, 10.40744), "u4pruydqq")
+
+    def test_cover_contains_points_inside_box(self):
+
+        cells = geo.cover(18.9, 72.8, 19.3, 73.0)
+
+        self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+
+        for lat, lng in [(18.9, 72.8), (19.3, 73.0), (19.07, 72.87)]:
+
+            point = geo.encode(lat, lng)
+
+            self.assertTrue(any(point.startswith(cell) for cell in cells))
+
+    def test_cover_splits_at_antimeridian(self):
+
+        cells = geo.cover(-20, 170, -10, -170)
+
+        self.assertTrue(any(geo.encode(-15, 179.5).startswith(cell) for cell in cells))
+
+        self.assertTrue(any(geo.encode(-15, -179.5).startswith(cell) for cell in cells))
+
+class ListingGeoSearchTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='geo@example.com',
+
+            password='testpass123',
+
+            username='geouser',
+
+        )
+
+        self.colaba = create_estate(user=self.host, params={"latitude": 18.9067, "longitude": 72.8147})
+
+        self.bandra = create_estate(user=self.host, params={"latitude": 19.0596, "longitude": 72.8295})
+
+        self.pune = create_estate(user=self.host, params={"latitude": 18.5204, "longitude": 73.8567})
+
+        self.no_coordinates = create_estate(user=self.host)
+
+    def result_ids(self, params):
+
+        res = self.client.get(PUBLIC_LISTING_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_save_stores_geohash(self):
+
+        self.assertEqual(self.colaba.geohash, geo.encode(18.9067, 72.8147))
+
+        self.assertIsNone(self.no_coordinates.geohash)
+
+    def test_bbox_returns_listings_inside_viewport(self):
+
+        ids = self.result_ids({"bbox": "72.7,18.8,73.0,19.2"})
+
+        self.assertCountEqual(ids, [self.colaba.id, self.bandra.id])
+
+    def test_near_filters_by_radius_and_sorts_by_distance(self):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"near": "19.07,72.83", "radius_km": 25})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        ids = [item["id"] for item in res.data["results"]]
+
+        self.assertEqual(ids, [self.bandra.id, self.colaba.id])
+
+        self.assertLess(res.data["results"][0]["distance_km"], 2)
+
+    def test_radius_reaches_farther_listings(self):
+
+        ids = self.result_ids({"near": "19.07,72.83", "radius_km": 200})
+
+        self.assertEqual(ids, [self.bandra.id, self.colaba.id, self.pune.id])
+
+    def test_invalid_bbox_is_rejected(self):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"bbox": "72.7,18.8,73.0"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_moving_listing_updates_geohash(self):
+
+        self.pune.latitude, self.pune.longitude = 19.0, 72.85
+
+        self.pune.save(update_fields=["latitude", "longitude"])
+
+        self.pune.refresh_from_db()
+
+        self.assertEqual(self.pune.geohash, geo.encode(19.0, 72.85))
@@ -0,0 +1,833 @@
+import io
+
+import os
+
+import shutil
+
+import tempfile
+
+from decimal import Decimal
+
+from unittest.mock import patch
+
+import cloudinary
+
+import requests
+
+from cloudinary import CloudinaryResource
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from django.core.management import call_command
+
+from django.core.cache import cache
+
+from django.db import connection, transaction
+
+from django.test import TestCase, override_settings
+
+from django.test.utils import CaptureQueriesContext
+
+from django.urls import reverse
+
+from PIL import Image
+
+from rest_framework import status
+
+from rest_framework.test import APIClient
+
+from users.models import CloudinaryDeletion, User
+
+from listings.models import ImageAsset, Listings, ListingImages
+
+from listings.serializers import ListingImageSerializer
+
+from listings.tasks import upload_listing_images
+
+from listings.uploads import push_pending_images, stage_images
+
+STAGING_ROOT = tempfile.mkdtemp(prefix="pending-images-")
+
+DIRECT_ROOT = tempfile.mkdtemp(prefix="direct-images-")
+
+def make_listing(host, title):
+
+    return Listings.objects.create(
+
+        host=host,
+
+        title=title,
+
+        description="Lots of pictures.",
+
+        address=f"{title} Lens Lane",
+
+        country="India",
+
+        city="Ooty",
+
+        property_type="cottage",
+
+        max_guests=2,
+
+        bedrooms=1,
+
+        beds=1,
+
+        bathrooms=Decimal("1.0"),
+
+        price_per_night=Decimal("70.00"),
+
+    )
+
+def jpeg_file(name="room.jpg", size=(40, 30)):
+
+    buffer = io.BytesIO()
+
+    Image.new("RGB", size).save(buffer, format="JPEG")
+
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+def uploaded_resource(public_id="listings/room"):
+
+    return CloudinaryResource(public_id, format="jpg", version="1", type="upload", resource_type="image")
+
+@override_settings(PENDING_IMAGE_ROOT=STAGING_ROOT)
+class ListingImageUploadPipelineTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+
+        super().tearDownClass()
+
+        shutil.rmtree(STAGING_ROOT, ignore_errors=True)
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email="photos@example.com",
+
+            password="testpass123",
+
+            username="photohost",
+
+        )
+
+        self.client.force_authenticate(user=self.host)
+
+        self.listing = make_listing(self.host, "Photo Cottage")
+
+        self.url = reverse("listing:property-images-upload", args=[self.listing.id])
+
+    def upload(self, *files):
+
+        with patch("listings.tasks.upload_listing_images.delay") as delay:
+
+            with self.captureOnCommitCallbacks(execute=True):
+
+                res = self.client.post(self.url, {"images": list(files)}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return res, delay
+
+    def test_upload_is_staged_and_queued_after_commit(self):
+
+        with patch("cloudinary.uploader.upload_resource") as upload:
+
+            res, delay = self.upload(jpeg_file("front.jpg"), jpeg_file("garden.jpg"))
+
+        upload.assert_not_called()
+
+        ids = [item["id"] for item in res.data]
+
+        delay.assert_called_once_with(ids)
+
+        self.assertEqual([item["status"] for item in res.data], ["pending", "pending"])
+
+        self.assertEqual([item["image"] for item in res.data], [None, None])
+
+        for image in ListingImages.objects.filter(id__in=ids):
+
+            self.assertTrue(os.path.exists(os.path.join(STAGING_ROOT, image.pending_file)))
+
+        listed = self.client.get(self.url)
+
+        self.assertEqual([item["status"] for item in listed.data], ["pending", "pending"])
+
+    def test_worker_uploads_and_marks_ready(self):
+
+        res, _ = self.upload(jpeg_file())
+
+        image = ListingImages.objects.get(id=res.data[0]["id"])
+
+        staged = os.path.join(STAGING_ROOT, image.pending_file)
+
+        card_version = Listings.objects.get(id=self.listing.id).card_version
+
+        with patch("cloudinary.uploader.upload_resource", return_value=uploaded_resource()):
+
+            self.assertEqual(push_pending_images([image.id]), [])
+
+        image.refresh_from_db()
+
+        self.assertEqual(image.status, ListingImages.STATUS_READY)
+
+        self.assertEqual(image.image.public_id, "listings/room")
+
+        self.assertEqual((image.width, image.height), (40, 30))
+
+        self.assertTrue(image.placeholder.startswith("data:image/jpeg;base64,"))
+
+        self.assertEqual(image.pending_file, "")
+
+        self.assertFalse(os.path.exists(staged))
+
+        self.assertGreater(Listings.objects.get(id=self.listing.id).card_version, card_version)
+
+    def test_upload_is_marked_failed_after_retries(self):
+
+        res, _ = self.upload(jpeg_file())
+
+        image_id = res.data[0]["id"]
+
+        with patch("cloudinary.uploader.upload_resource", side_effect=OSError("timed out")) as upload:
+
+            with self.assertLogs("listings.uploads", "WARNING"):
+
+                upload_listing_images.apply(args=[[image_id]])
+
+        self.assertEqual(upload.call_count, upload_listing_images.max_retries + 1)
+
+        image = ListingImages.objects.get(id=image_id)
+
+        self.assertEqual(image.status, ListingImages.STATUS_FAILED)
+
+        self.assertEqual(image.pending_file, "")
+
+    def test_rolled_back_upload_leaves_no_staged_file(self):
+
+        before = set(os.listdir(STAGING_ROOT))
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+
+            with self.assertRaises(RuntimeError), transaction.atomic():
+
+                stage_images(self.listing, [("front", jpeg_file())])
+
+                raise RuntimeError("rolled back")
+
+        self.assertEqual(callbacks, [])
+
+        self.assertEqual(set(os.listdir(STAGING_ROOT)), before)
+
+        self.assertFalse(self.listing.listingimages.exists())
+
+    def test_only_ready_images_are_public_and_failed_ones_free_their_slot(self):
+
+        ListingImages.objects.create(listings=self.listing, name="front", image=uploaded_resource("listings/front"))
+
+        for n in range(4):
+
+            ListingImages.objects.create(listings=self.listing, name=f"lost {n}", status=ListingImages.STATUS_FAILED)
+
+        self.upload(jpeg_file("garden.jpg"))
+
+        cache.clear()
+
+        with patch.object(cloudinary.config(), "cloud_name", "demo", create=True):
+
+            res = self.client.get(reverse("listing:property-details", args=[self.listing.title_slug]))
+
+            cards = self.client.get(reverse("listing:public-listings")).data["results"]
+
+        self.assertEqual([image["name"] for image in res.data["images"]], ["front"])
+
+        self.assertEqual([image["name"] for image in cards[0]["images"]], ["front"])
+
+        res = self.client.post(self.url, {"images": [jpeg_file("more.jpg") for _ in range(4)]}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleting_pending_image_removes_staged_file(self):
+
+        res, _ = self.upload(jpeg_file())
+
+        image = ListingImages.objects.get(id=res.data[0]["id"])
+
+        staged = os.path.join(STAGING_ROOT, image.pending_file)
+
+        res = self.client.delete(reverse("listing:property-images-delete", args=[image.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(os.path.exists(staged))
+
+@override_settings(DIRECT_UPLOAD_BACKEND="local", DIRECT_UPLOAD_ROOT=DIRECT_ROOT)
+class ListingImageDirectUploadTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+
+        super().tearDownClass()
+
+        shutil.rmtree(DIRECT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email="direct@example.com",
+
+            password="testpass123",
+
+            username="directhost",
+
+        )
+
+        self.client.force_authenticate(user=self.host)
+
+        self.listing = make_listing(self.host, "Direct Cottage")
+
+        self.other_listing = make_listing(self.host, "Other Cottage")
+
+    def signed_upload(self, listing):
+
+        signed = self.client.post(reverse("listing:property-images-sign", args=[listing.id])).data
+
+        form = {key: signed[key] for key in ("public_id", "timestamp", "allowed_formats", "signature", "api_key")}
+
+        # The client posts to storage directly, without our credentials.
+        res = APIClient().post(signed["upload_url"], dict(form, file=jpeg_file("sunrise.jpg", (2000, 1000))), format="multipart")
+
+        return signed, res
+
+    def confirm(self, listing, uploaded, **overrides):
+
+        payload = {key: uploaded[key] for key in ("public_id", "version", "signature", "format")}
+
+        payload.update(overrides)
+
+        return self.client.post(reverse("listing:property-images-confirm", args=[listing.id]), payload, format="json")
+
+    def test_signed_upload_is_registered_after_confirm(self):
+
+        signed, res = self.signed_upload(self.listing)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertTrue(signed["public_id"].startswith(f"listings/{self.listing.id}/"))
+
+        self.assertTrue(os.path.exists(os.path.join(DIRECT_ROOT, f"{signed['public_id']}.jpg")))
+
+        res = self.confirm(self.listing, res.data, name="Sunrise")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(res.data["image"], f"/media/direct/{signed['public_id']}.jpg")
+
+        image = ListingImages.objects.get(listings=self.listing)
+
+        self.assertEqual((image.name, image.status), ("Sunrise", ListingImages.STATUS_READY))
+
+        self.assertEqual(image.image.public_id, signed["public_id"])
+
+        res = self.confirm(self.listing, self.signed_upload(self.listing)[1].data)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.listing.listingimages.count(), 2)
+
+    def test_confirm_rejects_forged_or_foreign_uploads(self):
+
+        _, res = self.signed_upload(self.listing)
+
+        uploaded = res.data
+
+        self.assertEqual(self.confirm(self.listing, uploaded, version=uploaded["version"] + 1).status_code, 400)
+
+        self.assertEqual(self.confirm(self.other_listing, uploaded).status_code, 400)
+
+        res = self.confirm(self.listing, uploaded, format="../../x")
+
+        self.assertEqual(res.status_code, 400)
+
+        self.assertIn("format", res.data)
+
+        self.assertEqual(self.confirm(self.listing, uploaded).status_code, 201)
+
+        self.assertEqual(self.confirm(self.listing, uploaded).status_code, 400)
+
+    def test_duplicate_check_matches_the_whole_public_id(self):
+
+        _, res = self.signed_upload(self.listing)
+
+        uploaded = res.data
+
+        # Another image whose public id merely contains this one's.
+        ListingImages.objects.create(
+
+            listings=self.listing, name="copy", image=uploaded_resource(f"{uploaded['public_id']}-copy")
+
+        )
+
+        res = self.confirm(self.listing, uploaded)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(ListingImages.objects.get(pk=res.data["id"]).storage, ListingImages.STORAGE_LOCAL)
+
+        self.assertEqual(self.confirm(self.listing, uploaded).status_code, 400)
+
+    def test_stand_in_rejects_bad_signatures(self):
+
+        signed = self.client.post(reverse("listing:property-images-sign", args=[self.listing.id])).data
+
+        form = {key: signed[key] for key in ("public_id", "timestamp", "allowed_formats", "signature")}
+
+        form["public_id"] = f"listings/{self.other_listing.id}/stolen"
+
+        res = APIClient().post(signed["upload_url"], dict(form, file=jpeg_file()), format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_the_host_can_sign(self):
+
+        stranger = User.objects.create_user(email="stranger@example.com", password="testpass123", username="stranger")
+
+        self.client.force_authenticate(user=stranger)
+
+        res = self.client.post(reverse("listing:property-images-sign", args=[self.listing.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_variants_are_rendered_and_exposed(self):
+
+        signed, res = self.signed_upload(self.listing)
+
+        res = self.confirm(self.listing, res.data)
+
+        self.assertEqual((res.data["width"], res.data["height"]), (2000, 1000))
+
+        self.assertTrue(res.data["placeholder"].startswith("data:image/jpeg;base64,"))
+
+        self.assertEqual(
+
+            {name: variant["width"] for name, variant in res.data["variants"].items()},
+
+            {"thumbnail": 160, "card": 480, "hero": 1280},
+
+        )
+
+        self.assertEqual(res.data["variants"]["card"]["url"], f"/media/direct/{signed['public_id']}_card.jpg")
+
+        self.assertIn(f"/media/direct/{signed['public_id']}_hero.jpg 1280w", res.data["srcset"])
+
+        with Image.open(os.path.join(DIRECT_ROOT, f"{signed['public_id']}_hero.jpg")) as hero:
+
+            self.assertEqual(hero.size, (1280, 640))
+
+        card = self.client.get(reverse("listing:public-listings")).data["results"]
+
+        listing_card = next(item for item in card if item["id"] == self.listing.id)
+
+        self.assertEqual(listing_card["images"][0]["srcset"], res.data["srcset"])
+
+    def test_deleting_local_image_removes_its_files(self):
+
+        signed, res = self.signed_upload(self.listing)
+
+        image_id = self.confirm(self.listing, res.data).data["id"]
+
+        names = [f"{signed['public_id']}.jpg"] + [f"{signed['public_id']}_{variant}.jpg" for variant in ("thumbnail", "card", "hero")]
+
+        self.assertTrue(all(os.path.exists(os.path.join(DIRECT_ROOT, name)) for name in names))
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            res = self.client.delete(reverse("listing:property-images-delete", args=[image_id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(CloudinaryDeletion.objects.exists())
+
+        self.assertFalse(any(os.path.exists(os.path.join(DIRECT_ROOT, name)) for name in names))
+
+    def test_only_rendered_variants_are_offered(self):
+
+        # Stored before the stand-in rendered variants, and never measured.
+        image = ListingImages.objects.create(
+
+            listings=self.listing,
+
+            name="old",
+
+            storage=ListingImages.STORAGE_LOCAL,
+
+            image=uploaded_resource(f"listings/{self.listing.id}/old"),
+
+        )
+
+        data = ListingImageSerializer(image).data
+
+        self.assertEqual(data["image"], f"/media/direct/listings/{self.listing.id}/old.jpg")
+
+        self.assertEqual((data["variants"], data["srcset"]), ({}, None))
+
+        image.local_variants = ["thumbnail"]
+
+        self.assertEqual(list(ListingImageSerializer(image).data["variants"]), ["thumbnail"])
+
+        self.assertIsNone(ListingImageSerializer(image).data["srcset"])
+
+        image.width = 100
+
+        self.assertEqual(
+
+            ListingImageSerializer(image).data["srcset"], f"/media/direct/listings/{self.listing.id}/old_thumbnail.jpg 100w"
+
+        )
+
+
+# Images already on Cloudinary keep their URLs while direct uploads go to the stand-in.
+@override_settings(DIRECT_UPLOAD_BACKEND="local")
+class CloudinaryImageVariantTest(TestCase):
+
+    def test_variants_are_transformation_urls(self):
+
+        host = User.objects.create_user(email="cdn@example.com", password="testpass123", username="cdn")
+
+        image = ListingImages.objects.create(
+
+            listings=make_listing(host, "CDN Cottage"),
+
+            name="front",
+
+            image=uploaded_resource("listings/front"),
+
+            width=300,
+
+            height=200,
+
+        )
+
+        config = cloudinary.config()
+
+        with patch.object(config, "cloud_name", "demo", create=True):
+
+            data = ListingImageSerializer(image).data
+
+        self.assertEqual(data["variants"]["thumbnail"]["width"], 160)
+
+        self.assertEqual(data["variants"]["hero"]["width"], 300)
+
+        self.assertIn("res.cloudinary.com/demo/image/upload/", data["image"])
+
+        self.assertIn("/c_limit,f_auto,q_auto,w_160/", data["variants"]["thumbnail"]["url"])
+
+        self.assertIn("e_blur:1000", data["placeholder"])
+
+@override_settings(PENDING_IMAGE_ROOT=STAGING_ROOT)
+class ListingImageDedupTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(email="dedup@example.com", password="testpass123", username="dedup")
+
+        self.client.force_authenticate(user=self.host)
+
+        self.listing = make_listing(self.host, "Twin Cottage")
+
+        # These images are stored on Cloudinary, so their URLs need a cloud name.
+        cloud_name = patch.object(cloudinary.config(), "cloud_name", "demo", create=True)
+
+        cloud_name.start()
+
+        self.addCleanup(cloud_name.stop)
+
+        self.other_listing = make_listing(self.host, "Mirror Cottage")
+
+    def upload(self, listing, *files):
+
+        with patch("listings.tasks.upload_listing_images.delay"):
+
+            with self.captureOnCommitCallbacks(execute=True):
+
+                res = self.client.post(
+
+                    reverse("listing:property-images-upload", args=[listing.id]), {"images": list(files)}, format="multipart"
+
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return [item["id"] for item in res.data]
+
+    def test_identical_files_are_uploaded_once(self):
+
+        ids = self.upload(self.listing, jpeg_file("a.jpg"), jpeg_file("b.jpg"))
+
+        with patch("cloudinary.uploader.upload_resource", return_value=uploaded_resource("listings/twin")) as upload:
+
+            self.assertEqual(push_pending_images(ids), [])
+
+        self.assertEqual(upload.call_count, 1)
+
+        asset = ImageAsset.objects.get()
+
+        self.assertEqual((asset.image.public_id, asset.ref_count), ("listings/twin", 2))
+
+        self.assertEqual(
+
+            list(ListingImages.objects.filter(id__in=ids).values_list("status", "asset_id")),
+
+            [(ListingImages.STATUS_READY, asset.id)] * 2,
+
+        )
+
+        with patch("cloudinary.uploader.upload_resource") as upload:
+
+            with patch("listings.tasks.upload_listing_images.delay") as delay:
+
+                with self.captureOnCommitCallbacks(execute=True):
+
+                    res = self.client.post(
+
+                        reverse("listing:property-images-upload", args=[self.other_listing.id]),
+
+                        {"images": [jpeg_file("copy.jpg")]},
+
+                        format="multipart",
+
+                    )
+
+        upload.assert_not_called()
+
+        delay.assert_not_called()
+
+        self.assertEqual(res.data[0]["status"], "ready")
+
+        self.assertEqual((res.data[0]["width"], res.data[0]["height"]), (40, 30))
+
+        asset.refresh_from_db()
+
+        self.assertEqual(asset.ref_count, 3)
+
+    def test_asset_is_deleted_with_its_last_reference(self):
+
+        ids = self.upload(self.listing, jpeg_file())
+
+        with patch("cloudinary.uploader.upload_resource", return_value=uploaded_resource("listings/shared")):
+
+            push_pending_images(ids)
+
+        ids += self.upload(self.other_listing, jpeg_file())
+
+        ListingImages.objects.get(id=ids[0]).delete()
+
+        self.assertFalse(CloudinaryDeletion.objects.exists())
+
+        self.assertEqual(ImageAsset.objects.get().ref_count, 1)
+
+        ListingImages.objects.get(id=ids[1]).delete()
+
+        self.assertEqual(list(CloudinaryDeletion.objects.values_list("public_id", flat=True)), ["listings/shared"])
+
+        self.assertFalse(ImageAsset.objects.exists())
+
+    def test_asset_released_while_staging_is_created_again(self):
+
+        ids = self.upload(self.listing, jpeg_file())
+
+        with patch("cloudinary.uploader.upload_resource", return_value=uploaded_resource("listings/shared")):
+
+            push_pending_images(ids)
+
+        create = ImageAsset.objects.bulk_create
+
+        def release_in_between(objs, **kwargs):
+
+            # The last reference goes away after staging found the asset but before it locked it.
+            created = create(objs, **kwargs)
+
+            if ListingImages.objects.filter(id=ids[0]).exists():
+
+                ListingImages.objects.get(id=ids[0]).delete()
+
+            return created
+
+        with patch.object(ImageAsset.objects, "bulk_create", side_effect=release_in_between):
+
+            ids += self.upload(self.other_listing, jpeg_file())
+
+        image = ListingImages.objects.select_related("asset").get(id=ids[1])
+
+        self.assertEqual((image.status, image.asset.ref_count), (ListingImages.STATUS_PENDING, 1))
+
+        self.assertEqual(list(CloudinaryDeletion.objects.values_list("public_id", flat=True)), ["listings/shared"])
+
+    def test_backfill_merges_existing_duplicates(self):
+
+        content = jpeg_file().read()
+
+        for n, listing in enumerate([self.listing, self.other_listing, self.other_listing]):
+
+            ListingImages.objects.create(listings=listing, name=f"old {n}", image=uploaded_resource(f"listings/old-{n}"))
+
+        def download(url, **kwargs):
+
+            response = requests.Response()
+
+            response.status_code = 200
+
+            response._content = b"different" if "old-2" in url else content
+
+            return response
+
+        out = io.StringIO()
+
+        with patch.object(cloudinary.config(), "cloud_name", "demo", create=True), \
+                patch("requests.get", side_effect=download):
+
+            call_command("backfill_image_digests", "--dry-run", stdout=out)
+
+            self.assertFalse(ImageAsset.objects.exists())
+
+            call_command("backfill_image_digests", stdout=out)
+
+        self.assertIn("Would merge 1 duplicate(s)", out.getvalue())
+
+        self.assertIn("Merged 1 duplicate(s)", out.getvalue())
+
+        images = ListingImages.objects.order_by("id")
+
+        self.assertEqual(
+
+            [image.image.public_id for image in images],
+
+            ["listings/old-0", "listings/old-0", "listings/old-2"],
+
+        )
+
+        self.assertEqual(sorted(ImageAsset.objects.values_list("ref_count", flat=True)), [1, 2])
+
+        self.assertEqual(list(CloudinaryDeletion.objects.values_list("public_id", flat=True)), ["listings/old-1"])
+
+
+@override_settings(DIRECT_UPLOAD_BACKEND="local", DIRECT_UPLOAD_ROOT=DIRECT_ROOT)
+class ListingCoverImageTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(email="cover@example.com", password="testpass123", username="cover")
+
+        self.client.force_authenticate(user=self.host)
+
+        self.listing = make_listing(self.host, "Cover Cottage")
+
+    def add_image(self, listing, name, **fields):
+
+        fields.setdefault("storage", ListingImages.STORAGE_LOCAL)
+
+        return ListingImages.objects.create(listings=listing, name=name, image=uploaded_resource(f"listings/{name}"), **fields)
+
+    def cover_id(self):
+
+        return Listings.objects.get(id=self.listing.id).cover_image_id
+
+    def test_cover_follows_create_delete_and_reorder(self):
+
+        ListingImages.objects.create(listings=self.listing, name="pending", status=ListingImages.STATUS_PENDING)
+
+        self.assertIsNone(self.cover_id())
+
+        front = self.add_image(self.listing, "front", position=1)
+
+        garden = self.add_image(self.listing, "garden", position=2)
+
+        self.assertEqual(self.cover_id(), front.id)
+
+        url = reverse("listing:property-images-order", args=[self.listing.id])
+
+        ids = list(self.listing.listingimages.values_list("id", flat=True))
+
+        res = self.client.post(url, {"order": [garden.id, front.id]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        order = [garden.id, ids[0], front.id]
+
+        res = self.client.post(url, {"order": order}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual([item["id"] for item in res.data], order)
+
+        self.assertEqual(self.cover_id(), garden.id)
+
+        garden.delete()
+
+        self.assertEqual(self.cover_id(), front.id)
+
+    def test_staged_images_are_appended(self):
+
+        self.add_image(self.listing, "first")
+
+        with override_settings(PENDING_IMAGE_ROOT=STAGING_ROOT), patch("listings.tasks.upload_listing_images.delay"):
+
+            res = self.client.post(
+
+                reverse("listing:property-images-upload", args=[self.listing.id]),
+
+                {"images": [jpeg_file("a.jpg", (10, 10)), jpeg_file("b.jpg", (20, 10))]},
+
+                format="multipart",
+
+            )
+
+        self.assertEqual([item["position"] for item in res.data], [1, 2])
+
+    def test_compact_cards_cost_constant_queries(self):
+
+        def page_queries():
+
+            cache.clear()
+
+            with CaptureQueriesContext(connection) as queries:
+
+                res = self.client.get(reverse("listing:public-listings"), {"card": "compact"})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            return len(queries), res.data["results"]
+
+        for n in range(3):
+
+            self.add_image(make_listing(self.host, f"Cottage {n}"), f"cottage-{n}")
+
+        few, cards = page_queries()
+
+        for n in range(3, 9):
+
+            self.add_image(make_listing(self.host, f"Cottage {n}"), f"cottage-{n}")
+
+        many, cards = page_queries()
+
+        self.assertEqual(few, many)
+
+        card = next(card for card in cards if card["title"] == "Cottage 8")
+
+        self.assertNotIn("images", card)
+
+        self.assertNotIn("host", card)
+
+        self.assertEqual(card["cover_image"]["image"], "/media/direct/listings/cottage-8.jpg")
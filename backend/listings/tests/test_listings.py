@@ -1,9 +1,33 @@
+from datetime import timedelta
+
 from decimal import Decimal
 
+import json
+
+import os
+
+import tempfile
+
+import time
+
 import uuid
 
+from io import StringIO
+
+from django.core.cache import cache
+
+from django.core.management import call_command
+
+from django.db import connection
+
+from django.db.models import F
+
 from django.test import TestCase
 
+from django.utils import timezone
+
+from django.utils.http import http_date
+
 from django.urls import reverse
 
 from rest_framework import status
@@ -16,12 +40,26 @@ from listings.models import Listings, ListingImages, Amenities
 
 from listings.serializers import ListingSerializer, ListingDetailSerializer
 
+from listings import amenities as amenity_registry
+
+from listings.amenities import amenity_ids, set_listing_amenities
+
+from listings.filters import ListingFilter
+
+from listings.tasks import refresh_listing_scores
+
+from listings.result_cache import cached_results, evaluate, result_cache_key
+
+from bookings.models import Bookings
+
 from django.core.exceptions import ValidationError
 
 LIST_API_URL = reverse('listing:listings-list')
 
 PUBLIC_LISTING_URL = reverse('listing:public-listings')
 
+FACETS_URL = reverse('listing:listing-facets')
+
 def detailed_list_url(title_slug):
 
     return reverse('listing:property-details', args=[title_slug])
@@ -358,3 +396,1132 @@ class ListingGeolocationFilterTest(TestCase):
         self.assertEqual(self.listing_seattle.listingimages.count(), 0)
 
 
+
+
+class PublicListingCursorPaginationTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='cursor@example.com',
+
+            password='testpass123',
+
+            username='cursoruser',
+
+        )
+
+        self.listings = [
+
+            create_estate(user=self.host, params={"price_per_night": Decimal(price)})
+
+            for price in ["80.00", "50.00", "80.00", "120.00", "50.00"]
+
+        ]
+
+    def walk(self, params):
+
+        ids = []
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"pagination": "cursor", "page_size": 2, **params})
+
+        while True:
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            ids += [item["id"] for item in res.data["results"]]
+
+            if not res.data["next"]:
+
+                return ids, res
+
+            res = self.client.get(res.data["next"])
+
+    def test_cursor_walk_matches_id_ordering(self):
+
+        ids, last_page = self.walk({})
+
+        self.assertEqual(ids, sorted((listing.id for listing in self.listings), reverse=True))
+
+        self.assertNotIn("count", last_page.data)
+
+    def test_cursor_walk_breaks_price_ties_by_id(self):
+
+        ids, _ = self.walk({"ordering": "price"})
+
+        expected = sorted(self.listings, key=lambda listing: (listing.price_per_night, listing.id))
+
+        self.assertEqual(ids, [listing.id for listing in expected])
+
+    def test_previous_cursor_returns_prior_page(self):
+
+        first = self.client.get(PUBLIC_LISTING_URL, {"pagination": "cursor", "page_size": 2, "ordering": "-price"})
+
+        self.assertIsNone(first.data["previous"])
+
+        second = self.client.get(first.data["next"])
+
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_count_only_when_requested(self):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"pagination": "cursor", "with_count": "true"})
+
+        self.assertEqual(res.data["count"], len(self.listings))
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+
+        first = self.client.get(PUBLIC_LISTING_URL, {"pagination": "cursor", "page_size": 2})
+
+        cursor = first.data["next"].split("cursor=")[1].split("&")[0]
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"cursor": cursor, "ordering": "price"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_mode_is_default(self):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"page": 1})
+
+        self.assertEqual(res.data["count"], len(self.listings))
+
+
+class PublicListingSearchTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='search@example.com',
+
+            password='testpass123',
+
+            username='searchuser',
+
+        )
+
+        self.title_match = create_estate(user=self.host, params={
+
+            "title": "Lighthouse Cottage",
+
+            "description": "Quiet home near the harbour.",
+
+            "city": "Kochi",
+
+        })
+
+        self.description_match = create_estate(user=self.host, params={
+
+            "title": "Harbour Flat",
+
+            "description": "Walk to the old lighthouse in five minutes.",
+
+            "city": "Chennai",
+
+        })
+
+        self.unrelated = create_estate(user=self.host, params={
+
+            "title": "Desert Camp",
+
+            "description": "Tents under the stars.",
+
+            "city": "Jaisalmer",
+
+        })
+
+    def search_ids(self, **params):
+
+        res = self.client.get(PUBLIC_LISTING_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_title_matches_rank_above_description_matches(self):
+
+        ids = self.search_ids(q="lighthouse")
+
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+
+    def test_prefix_and_city_terms_match(self):
+
+        self.assertEqual(self.search_ids(q="jaisal"), [self.unrelated.id])
+
+    def test_search_combines_with_filters(self):
+
+        ids = self.search_ids(q="lighthouse", city="Chennai")
+
+        self.assertEqual(ids, [self.description_match.id])
+
+    def test_search_syntax_in_query_is_ignored(self):
+
+        self.assertEqual(self.search_ids(q='"lighthouse(*'), [self.title_match.id, self.description_match.id])
+
+    def test_index_follows_edits_and_deletes(self):
+
+        self.unrelated.title = "Lighthouse Tents"
+
+        self.unrelated.save()
+
+        self.assertIn(self.unrelated.id, self.search_ids(q="lighthouse"))
+
+        self.title_match.delete()
+
+        self.assertNotIn(self.title_match.id, self.search_ids(q="lighthouse"))
+
+    def test_cursor_pagination_follows_relevance(self):
+
+        first = self.client.get(PUBLIC_LISTING_URL, {"q": "lighthouse", "pagination": "cursor", "page_size": 1})
+
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+
+            [first.data["results"][0]["id"], second.data["results"][0]["id"]],
+
+            [self.title_match.id, self.description_match.id],
+
+        )
+
+        self.assertIsNone(second.data["next"])
+
+class ListingAmenityMaskTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='amenity@example.com',
+
+            password='testpass123',
+
+            username='amenityuser',
+
+            phone='1234567890',
+
+        )
+
+        self.client.force_authenticate(user=self.host)
+
+    def create_with_amenities(self, amenities):
+
+        payload = {
+
+            "title": f"Amenity Listing {uuid.uuid4().hex[:8]}",
+
+            "description": "Has some amenities.",
+
+            "address": f"{uuid.uuid4().hex[:8]} Amenity Road",
+
+            "country": "India",
+
+            "city": "Goa",
+
+            "property_type": "villa",
+
+            "max_guests": 4,
+
+            "bedrooms": 2,
+
+            "beds": 2,
+
+            "bathrooms": 1.0,
+
+            "price_per_night": "80.00",
+
+            "amenities": amenities,
+
+        }
+
+        res = self.client.post(LIST_API_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return Listings.objects.get(title=payload["title"])
+
+    def amenity_ids(self, value):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"amenities": value})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_create_and_update_maintain_mask(self):
+
+        listing = self.create_with_amenities(["wifi", "pool"])
+
+        self.assertEqual(listing.amenity_mask, Amenities.mask_for(["wifi", "pool"]))
+
+        res = self.client.patch(
+
+            reverse("listing:property-edit", args=[listing.id]), {"amenities": ["parking"]}, format='json'
+
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        listing.refresh_from_db()
+
+        self.assertEqual(listing.amenity_mask, Amenities.AMENITY_BITS["parking"])
+
+    def test_filter_requires_every_amenity(self):
+
+        both = self.create_with_amenities(["wifi", "pool", "parking"])
+
+        wifi_only = self.create_with_amenities(["wifi"])
+
+        self.assertEqual(self.amenity_ids("wifi,pool"), [both.id])
+
+        self.assertCountEqual(self.amenity_ids("wifi"), [both.id, wifi_only.id])
+
+    def test_unknown_amenity_is_rejected(self):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"amenities": "wifi,moat"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_backfill_command_recomputes_masks(self):
+
+        listing = create_estate(user=self.host)
+
+        listing.amenities.add(
+
+            Amenities.objects.create(name="wifi"),
+
+            Amenities.objects.create(name="gym"),
+
+        )
+
+        # As left by writes that bypass the relation, or by listings older than the mask.
+        Listings.objects.filter(pk=listing.pk).update(amenity_mask=0)
+
+        call_command("backfill_amenity_masks", batch_size=1, stdout=StringIO())
+
+        listing.refresh_from_db()
+
+        self.assertEqual(listing.amenity_mask, Amenities.mask_for(["wifi", "gym"]))
+
+    def test_relation_changes_outside_the_serializer_keep_the_mask(self):
+
+        listing = self.create_with_amenities(["wifi"])
+
+        pool = Amenities.objects.create(name="pool")
+
+        listing.amenities.add(pool)
+
+        self.assertEqual(listing.amenity_mask, Amenities.mask_for(["wifi", "pool"]))
+
+        self.assertEqual(self.amenity_ids("wifi,pool"), [listing.id])
+
+        # From the amenity's side, as an admin inline or a script might.
+        pool.listings_set.clear()
+
+        self.assertEqual(self.amenity_ids("pool"), [])
+
+        listing.amenities.set([])
+
+        listing.refresh_from_db()
+
+        self.assertEqual(listing.amenity_mask, 0)
+
+    def settle_amenity_registry(self):
+
+        # TestCase never leaves its transaction; treat the amenity rows created so far as committed.
+        amenity_registry._registry.pending = False
+
+        self.addCleanup(setattr, amenity_registry._registry, "generation", None)
+
+    def test_update_applies_amenity_diff(self):
+
+        listing = self.create_with_amenities(["wifi", "pool"])
+
+        through = Listings.amenities.through
+
+        pool_row = through.objects.get(listings=listing, amenities__name="pool")
+
+        Amenities.objects.create(name="parking")
+
+        self.settle_amenity_registry()
+
+        amenity_ids(["parking"])
+
+        with self.assertNumQueries(3):
+
+            set_listing_amenities(listing, ["pool", "parking"])
+
+        self.assertCountEqual(listing.amenities.values_list("name", flat=True), ["pool", "parking"])
+
+        self.assertTrue(through.objects.filter(pk=pool_row.pk).exists())
+
+        res = self.client.patch(
+
+            reverse("listing:property-edit", args=[listing.id]), {"amenities": ["wifi"]}, format='json'
+
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(list(listing.amenities.values_list("name", flat=True)), ["wifi"])
+
+    def test_amenity_registry_reloads_only_after_changes(self):
+
+        cache.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            wifi = Amenities.objects.create(name="wifi")
+
+        self.settle_amenity_registry()
+
+        with self.assertNumQueries(1):
+
+            self.assertEqual(amenity_ids(["wifi"]), {"wifi": wifi.id})
+
+        with self.assertNumQueries(0):
+
+            amenity_ids(["wifi"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            gym = Amenities.objects.create(name="gym")
+
+        self.settle_amenity_registry()
+
+        with self.assertNumQueries(1):
+
+            self.assertEqual(amenity_ids(["wifi", "gym"]), {"wifi": wifi.id, "gym": gym.id})
+
+class ListingFacetsTest(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='facets@example.com',
+
+            password='testpass123',
+
+            username='facetsuser',
+
+        )
+
+        create_estate(user=self.host, params={"property_type": "villa", "price_per_night": Decimal("40.00"), "max_guests": 8})
+
+        create_estate(user=self.host, params={"property_type": "villa", "price_per_night": Decimal("150.00"), "allows_pets": False})
+
+        create_estate(user=self.host, params={"property_type": "house", "city": "Delhi", "price_per_night": Decimal("150.00")})
+
+        Listings.objects.filter(property_type="villa").update(amenity_mask=Amenities.mask_for(["wifi", "pool"]))
+
+    def get_facets(self, params=None):
+
+        res = self.client.get(FACETS_URL, params or {})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data
+
+    def counts(self, buckets):
+
+        return {bucket["value"]: bucket["count"] for bucket in buckets if bucket["count"]}
+
+    def test_facets_count_whole_catalogue_in_one_query(self):
+
+        with self.assertNumQueries(1):
+
+            facets = self.get_facets()
+
+        self.assertEqual(facets["total"], 3)
+
+        self.assertEqual(self.counts(facets["property_type"]), {"villa": 2, "house": 1})
+
+        self.assertEqual(self.counts(facets["price"]), {"0-50": 1, "100-200": 2})
+
+        self.assertEqual(self.counts(facets["guests"]), {"3-4": 2, "5-8": 1})
+
+        self.assertEqual(facets["allows_pets"], 2)
+
+        self.assertEqual(self.counts(facets["amenities"]), {"wifi": 2, "pool": 2})
+
+    def test_facets_follow_listing_filters(self):
+
+        facets = self.get_facets({"city": "Mumbai", "price_per_night__gte": 100})
+
+        self.assertEqual(facets["total"], 1)
+
+        self.assertEqual(self.counts(facets["property_type"]), {"villa": 1})
+
+    def test_cached_until_a_listing_changes(self):
+
+        self.get_facets({"city": "Mumbai"})
+
+        with self.assertNumQueries(0):
+
+            self.assertEqual(self.get_facets({"city": "Mumbai", "ordering": "price"})["total"], 2)
+
+        create_estate(user=self.host)
+
+        self.assertEqual(self.get_facets({"city": "Mumbai"})["total"], 3)
+
+    def test_invalid_filters_are_rejected(self):
+
+        res = self.client.get(FACETS_URL, {"amenities": "moat"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ListingCardCacheTest(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='cards@example.com',
+
+            password='testpass123',
+
+            username='cardsuser',
+
+        )
+
+        self.listings = [create_estate(user=self.host) for _ in range(3)]
+
+    def get_cards(self, params=None):
+
+        res = self.client.get(PUBLIC_LISTING_URL, params or {})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return {item["id"]: item for item in res.data["results"]}
+
+    def test_warm_page_skips_card_relations(self):
+
+        self.get_cards()
+
+        # Only the page rows; ids come from the result cache, host and images from the card cache.
+        with self.assertNumQueries(1):
+
+            cards = self.get_cards()
+
+        self.assertEqual(cards[self.listings[0].id]["host"]["username"], "cardsuser")
+
+    def test_listing_save_refreshes_card(self):
+
+        self.get_cards()
+
+        listing = self.listings[0]
+
+        listing.title = "Renamed Listing"
+
+        listing.save()
+
+        self.assertEqual(self.get_cards()[listing.id]["title"], "Renamed Listing")
+
+    def test_image_changes_refresh_card(self):
+
+        self.get_cards()
+
+        listing = self.listings[1]
+
+        image = ListingImages.objects.create(listings=listing, name="front")
+
+        self.assertEqual([img["name"] for img in self.get_cards()[listing.id]["images"]], ["front"])
+
+        image.delete()
+
+        self.assertEqual(self.get_cards()[listing.id]["images"], [])
+
+    def test_host_profile_change_refreshes_cards(self):
+
+        self.get_cards()
+
+        self.host.username = "renamedhost"
+
+        self.host.save()
+
+        cards = self.get_cards()
+
+        self.assertTrue(all(card["host"]["username"] == "renamedhost" for card in cards.values()))
+
+    def test_request_specific_fields_are_not_cached(self):
+
+        listing = self.listings[2]
+
+        listing.latitude, listing.longitude = 19.0, 72.8
+
+        listing.save()
+
+        self.assertIn("distance_km", self.get_cards({"near": "19.0,72.8"})[listing.id])
+
+        self.assertNotIn("distance_km", self.get_cards()[listing.id])
+
+    def test_sparse_fields_are_projected_from_full_cards(self):
+
+        listing = self.listings[0]
+
+        cards = self.get_cards({"fields": "id,title,host,images.name", "expand": ""})
+
+        self.assertEqual(cards[listing.id], {"id": listing.id, "title": listing.title, "host": self.host.id, "images": []})
+
+        # The cached card still holds every field.
+        with self.assertNumQueries(1):
+
+            card = self.get_cards()[listing.id]
+
+        self.assertEqual(card["host"]["username"], "cardsuser")
+
+        self.assertIn("price_per_night", card)
+
+    def test_sparse_fields_on_listing_detail(self):
+
+        listing = self.listings[0]
+
+        res = self.client.get(detailed_list_url(listing.title_slug), {"fields": "title,host.username,amenities"})
+
+        self.assertEqual(res.data, {"title": listing.title, "host": {"username": "cardsuser"}, "amenities": []})
+
+class ListingDetailConditionalGetTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='etag@example.com',
+
+            password='testpass123',
+
+            username='etaguser',
+
+        )
+
+        self.listing = create_estate(user=self.host)
+
+        self.url = detailed_list_url(self.listing.title_slug)
+
+    def test_matching_etag_returns_304_without_serializing(self):
+
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(res["ETag"].startswith("W/"))
+
+        self.assertNotIn("Last-Modified", res)
+
+        with self.assertNumQueries(1):
+
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_with_listing_images_and_amenities(self):
+
+        etags = {self.client.get(self.url)["ETag"]}
+
+        ListingImages.objects.create(listings=self.listing, name="front")
+
+        etags.add(self.client.get(self.url)["ETag"])
+
+        Listings.objects.filter(pk=self.listing.pk).update(amenity_mask=Amenities.mask_for(["wifi"]))
+
+        etags.add(self.client.get(self.url)["ETag"])
+
+        self.listing.refresh_from_db()
+
+        self.listing.title = "Retitled"
+
+        self.listing.save()
+
+        etags.add(self.client.get(self.url)["ETag"])
+
+        self.assertEqual(len(etags), 4)
+
+    def test_host_changes_are_not_hidden_by_if_modified_since(self):
+
+        # A host profile change only bumps the card version.
+        Listings.objects.filter(pk=self.listing.pk).update(card_version=F("card_version") + 1)
+
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_listing_is_404(self):
+
+        res = self.client.get(detailed_list_url("no-such-listing"))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+class ListingRatingSearchTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='rating@example.com',
+
+            password='testpass123',
+
+            username='ratinguser',
+
+        )
+
+        self.good = create_estate(user=self.host)
+
+        self.great = create_estate(user=self.host)
+
+        self.unrated = create_estate(user=self.host)
+
+        Listings.objects.filter(pk=self.good.pk).update(rating=3.9, review_count=4)
+
+        Listings.objects.filter(pk=self.great.pk).update(rating=4.8, review_count=10)
+
+    def result_ids(self, params):
+
+        res = self.client.get(PUBLIC_LISTING_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_min_rating_filter(self):
+
+        self.assertEqual(self.result_ids({"min_rating": 4.5}), [self.great.id])
+
+        self.assertCountEqual(self.result_ids({"min_rating": 3}), [self.good.id, self.great.id])
+
+    def test_ordering_by_rating(self):
+
+        self.assertEqual(
+
+            self.result_ids({"ordering": "-rating"}),
+
+            [self.great.id, self.good.id, self.unrated.id],
+
+        )
+
+    def test_rating_ordering_with_cursor_pagination(self):
+
+        first = self.client.get(PUBLIC_LISTING_URL, {"ordering": "-rating", "pagination": "cursor", "page_size": 2})
+
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(
+
+            [item["id"] for item in first.data["results"] + second.data["results"]],
+
+            [self.great.id, self.good.id, self.unrated.id],
+
+        )
+
+class ListingRankingTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='ranking@example.com',
+
+            password='testpass123',
+
+            username='rankinguser',
+
+        )
+
+        self.cheap = create_estate(user=self.host, params={"price_per_night": Decimal("20.00")})
+
+        self.booked = create_estate(user=self.host, params={"price_per_night": Decimal("90.00")})
+
+        self.quiet = create_estate(user=self.host, params={"price_per_night": Decimal("50.00")})
+
+        guests = [
+
+            User.objects.create_user(email=f'rank{i}@example.com', password='testpass123', username=f'rank{i}')
+
+            for i in range(3)
+
+        ]
+
+        for i, guest in enumerate(guests):
+
+            start = timezone.localdate() + timedelta(days=10 * (i + 1))
+
+            Bookings.objects.create(
+
+                guest=guest,
+
+                listing=self.booked,
+
+                start_date=start,
+
+                end_date=start + timedelta(days=2),
+
+                total_price=Decimal("180.00"),
+
+                status=Bookings.STATUS_CONFIRMED,
+
+            )
+
+        Listings.objects.filter(pk=self.cheap.pk).update(rating=4.9, review_count=20)
+
+        Listings.objects.filter(pk__in=[self.booked.pk, self.quiet.pk]).update(
+
+            created_at=timezone.now() - timedelta(days=365)
+
+        )
+
+        refresh_listing_scores()
+
+    def result_ids(self, ordering):
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"ordering": ordering})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_refresh_computes_popularity_and_score(self):
+
+        self.booked.refresh_from_db()
+
+        self.quiet.refresh_from_db()
+
+        self.assertEqual(self.booked.popularity, 3)
+
+        self.assertEqual(self.quiet.popularity, 0)
+
+        self.assertEqual(self.quiet.recommended_score, 0)
+
+        self.assertGreater(self.booked.recommended_score, 0)
+
+    def test_price_orderings(self):
+
+        self.assertEqual(self.result_ids("price"), [self.cheap.id, self.quiet.id, self.booked.id])
+
+        self.assertEqual(self.result_ids("-price"), [self.booked.id, self.quiet.id, self.cheap.id])
+
+    def test_popularity_and_recommended_are_best_first(self):
+
+        self.assertEqual(self.result_ids("popularity")[0], self.booked.id)
+
+        self.assertEqual(self.result_ids("recommended")[-1], self.quiet.id)
+
+        self.assertEqual(self.result_ids("-popularity")[-1], self.booked.id)
+
+    def test_every_ordering_is_served_by_an_index(self):
+
+        if connection.vendor != "sqlite":
+
+            self.skipTest("checks the SQLite query plan")
+
+        for ordering in ["-id", "price", "-price", "rating", "-rating", "popularity", "recommended"]:
+
+            queryset = ListingFilter({"ordering": ordering}, queryset=Listings.objects.order_by("-id")).qs
+
+            plan = queryset.values_list("id", flat=True)[:20].explain()
+
+            self.assertNotIn("TEMP B-TREE", plan, ordering)
+
+class ListingResultCacheTest(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+
+        self.client = APIClient()
+
+        self.host = User.objects.create_user(
+
+            email='results@example.com',
+
+            password='testpass123',
+
+            username='resultsuser',
+
+        )
+
+        self.guest = User.objects.create_user(
+
+            email='resultsguest@example.com',
+
+            password='testpass123',
+
+            username='resultsguest',
+
+        )
+
+        self.goa = create_estate(user=self.host, params={"city": "Goa"})
+
+        self.check_in = timezone.localdate() + timedelta(days=20)
+
+        self.dates = {"check_in": self.check_in.isoformat(), "check_out": (self.check_in + timedelta(days=2)).isoformat()}
+
+    def result_ids(self, params):
+
+        res = self.client.get(PUBLIC_LISTING_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item["id"] for item in res.data["results"]]
+
+    def test_identical_search_reuses_id_list(self):
+
+        self.result_ids({"city": "Goa", "max_guests__gte": "2"})
+
+        with self.assertNumQueries(1):
+
+            ids = self.result_ids({"max_guests__gte": "2.0", "city": "Goa", "page_size": 5})
+
+        self.assertEqual(ids, [self.goa.id])
+
+    def test_listing_change_invalidates_results(self):
+
+        self.result_ids({"city": "Goa"})
+
+        other = create_estate(user=self.host, params={"city": "Goa"})
+
+        self.assertEqual(self.result_ids({"city": "Goa"}), [other.id, self.goa.id])
+
+    def test_booking_invalidates_date_searches_once_committed(self):
+
+        self.assertEqual(self.result_ids(dict(self.dates, city="Goa")), [self.goa.id])
+
+        self.assertEqual(self.result_ids(dict(self.dates, city="go")), [self.goa.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            Bookings.objects.create(
+
+                guest=self.guest,
+
+                listing=self.goa,
+
+                start_date=self.check_in,
+
+                end_date=self.check_in + timedelta(days=3),
+
+                total_price=Decimal("180.00"),
+
+                status=Bookings.STATUS_CONFIRMED,
+
+            )
+
+            # Searches before the commit must not cache the uncommitted state.
+            self.assertEqual(self.result_ids(dict(self.dates, city="go")), [self.goa.id])
+
+        self.assertEqual(self.result_ids(dict(self.dates, city="Goa")), [])
+
+        self.assertEqual(self.result_ids(dict(self.dates, city="go")), [])
+
+        self.assertEqual(self.result_ids(self.dates), [])
+
+    def test_only_lock_holder_recomputes_stale_entry(self):
+
+        filterset = ListingFilter({"city": "Goa"}, queryset=Listings.objects.order_by("-id"))
+
+        self.assertTrue(filterset.is_valid())
+
+        key = result_cache_key(filterset)
+
+        stale = {"fields": ["id"], "rows": [(self.goa.id,)], "count": 1}
+
+        cache.set(key, {"value": stale, "expires": 0, "delta": 0})
+
+        cache.add(f"{key}:lock", 1)
+
+        def fail():
+
+            raise AssertionError("recomputed while another worker holds the lock")
+
+        self.assertEqual(cached_results(key, fail)["rows"], [(self.goa.id,)])
+
+        cache.delete(f"{key}:lock")
+
+        self.assertEqual(cached_results(key, lambda: evaluate(filterset.qs))["count"], 1)
+
+        self.assertGreater(cache.get(key)["expires"], 0)
+
+class ListingImportTest(TestCase):
+
+    def setUp(self):
+
+        self.client = APIClient()
+
+        cache.clear()
+
+        self.host = User.objects.create_user(
+
+            email='importer@example.com',
+
+            password='testpass123',
+
+            username='importer',
+
+            phone='+919876543210',
+
+        )
+
+        self.row = {
+
+            "title": "Palm Grove Villa",
+
+            "description": "Villa among the palms.",
+
+            "address": "12 Palm Road",
+
+            "country": "India",
+
+            "city": "Goa",
+
+            "property_type": "villa",
+
+            "max_guests": 4,
+
+            "bedrooms": 2,
+
+            "beds": 2,
+
+            "bathrooms": "2.0",
+
+            "price_per_night": "120.00",
+
+        }
+
+    def write_file(self, suffix, content):
+
+        handle, path = tempfile.mkstemp(suffix=suffix)
+
+        with os.fdopen(handle, 'w', newline='') as f:
+
+            f.write(content)
+
+        self.addCleanup(os.remove, path)
+
+        return path
+
+    def run_import(self, path, **options):
+
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command("import_listings", path, stdout=stdout, stderr=stderr, **options)
+
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_csv_rows(self):
+
+        create_estate(user=self.host, params={"title": "Palm Grove Villa"})
+
+        header = list(self.row) + ["amenities", "latitude", "longitude"]
+
+        lines = [",".join(header)]
+
+        for _ in range(3):
+
+            values = dict(self.row, amenities="wifi|pool", latitude="15.5", longitude="73.8")
+
+            lines.append(",".join(f'"{values[name]}"' for name in header))
+
+        path = self.write_file(".csv", "\n".join(lines) + "\n")
+
+        out, err = self.run_import(path, host=self.host.email, batch_size=2)
+
+        self.assertIn("Imported 3 listing(s)", out)
+
+        self.assertEqual(err, "")
+
+        imported = Listings.objects.filter(address="12 Palm Road").order_by("id")
+
+        self.assertEqual(
+
+            [listing.title_slug for listing in imported],
+
+            ["palm-grove-villa-1", "palm-grove-villa-2", "palm-grove-villa-3"],
+
+        )
+
+        listing = imported[0]
+
+        self.assertEqual(set(listing.amenities.values_list("name", flat=True)), {"wifi", "pool"})
+
+        self.assertEqual(listing.amenity_mask, Amenities.mask_for(["wifi", "pool"]))
+
+        self.assertTrue(listing.geohash)
+
+        self.assertFalse(listing.allows_pets)
+
+        res = self.client.get(PUBLIC_LISTING_URL, {"q": "palms", "amenities": "pool"})
+
+        self.assertEqual(res.data["count"], 3)
+
+    def test_imports_jsonl_and_reports_invalid_rows(self):
+
+        new_host = User.objects.create_user(
+
+            email='newhost@example.com',
+
+            password='testpass123',
+
+            username='newhost',
+
+            phone='+919876543211',
+
+        )
+
+        self.assertFalse(new_host.is_host)
+
+        rows = [
+
+            json.dumps(dict(self.row, host_email=new_host.email, amenities=["wifi"])),
+
+            json.dumps(dict(self.row, max_guests=99)),
+
+            "not json",
+
+            json.dumps(dict(self.row, host_email="nobody@example.com")),
+
+        ]
+
+        path = self.write_file(".jsonl", "\n".join(rows) + "\n")
+
+        out, err = self.run_import(path, host=self.host.email)
+
+        self.assertIn("Imported 1 listing(s), skipped 2 invalid row(s)", out)
+
+        self.assertIn("line 2:", err)
+
+        self.assertIn("line 3:", err)
+
+        self.assertIn("line 4: no user with email nobody@example.com", err)
+
+        listing = Listings.objects.get(address="12 Palm Road")
+
+        self.assertEqual(listing.host, new_host)
+
+        self.assertEqual(listing.title_slug, "palm-grove-villa")
+
+        new_host.refresh_from_db()
+
+        self.assertTrue(new_host.is_host)
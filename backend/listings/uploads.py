@@ -0,0 +1,275 @@
+"""
+Asynchronous listing image uploads.
+
+A request only stages its files: each is recorded as a ``pending``
+ListingImages row and written to PENDING_IMAGE_ROOT once the transaction
+commits; until then it is held in an anonymous temporary file, so a rolled
+back request leaves nothing behind. Files are identified by the SHA-256 of
+their bytes (ImageAsset), so content that was stored before is reused instead
+of uploaded again. After the files are written, a Celery task pushes the batch to Cloudinary with up to IMAGE_UPLOAD_CONCURRENCY
+uploads in flight, then marks each row ``ready`` (or ``failed`` after its
+retries). No Cloudinary call happens inside a request or a transaction.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from cloudinary import uploader
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from conf.cloudinary_utils import queue_cloudinary_deletion
+
+from . import image_variants
+from .cards import bump_card_versions
+from .covers import next_position, refresh_covers
+from .models import ImageAsset, ListingImages, Listings
+
+logger = logging.getLogger(__name__)
+
+
+def staging_storage():
+    return FileSystemStorage(location=settings.PENDING_IMAGE_ROOT)
+
+
+def discard_staged_file(name):
+    try:
+        staging_storage().delete(name)
+    except OSError as e:
+        logger.warning(f"Could not remove staged upload {name}: {e}")
+
+
+def file_digest(file):
+    """SHA-256 of an uploaded file's bytes, which identifies its ImageAsset."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def lock_assets(sizes):
+    """
+    Lock the ImageAsset of every digest in ``sizes`` (digest to size), creating missing ones.
+
+    ImageAsset.release takes the same row lock before deleting an asset, so a
+    locked asset stays alive until the references added here commit; one
+    deleted in the meantime is created again.
+    """
+    assets = {}
+    while len(assets) < len(sizes):
+        missing = [digest for digest in sizes if digest not in assets]
+        # Another request may add the same digest concurrently; the unique index sorts that out.
+        ImageAsset.objects.bulk_create(
+            [ImageAsset(digest=digest, size=sizes[digest]) for digest in missing],
+            ignore_conflicts=True,
+        )
+        # Locks in primary key order, so concurrent uploads can't deadlock each other.
+        for asset in ImageAsset.objects.select_for_update().filter(digest__in=missing).order_by("pk"):
+            assets[asset.digest] = asset
+    return assets
+
+
+def stage_images(listing, images):
+    """
+    Stage ``images``, a list of ``(name, file)`` pairs, as images of ``listing``.
+
+    Files whose bytes were stored before reuse that asset and are ready at
+    once; the others are staged as pending rows and the upload task is queued
+    when the surrounding transaction commits. Returns the created rows.
+    """
+    entries = [(name, file, getattr(file, "content_digest", None) or file_digest(file)) for name, file in images]
+    if not entries:
+        return []
+
+    with transaction.atomic():
+        assets = lock_assets({digest: file.size for _, file, digest in entries})
+
+        known = {}
+        for asset_id, width, height, placeholder in ListingImages.objects.filter(
+            asset__in=[asset for asset in assets.values() if asset.image],
+            status=ListingImages.STATUS_READY,
+        ).values_list("asset_id", "width", "height", "placeholder"):
+            known.setdefault(asset_id, dict(width=width, height=height, placeholder=placeholder))
+
+        staged = []
+        held = {}
+        position = next_position(listing)
+        for name, file, digest in entries:
+            asset = assets[digest]
+            if asset.image:
+                staged.append(ListingImages(
+                    listings=listing,
+                    name=name,
+                    asset=asset,
+                    image=asset.image,
+                    status=ListingImages.STATUS_READY,
+                    position=position,
+                    **known.get(asset.pk, {}),
+                ))
+            else:
+                pending_file = f"{uuid.uuid4().hex}{os.path.splitext(file.name or '')[1].lower()}"
+                held[pending_file] = hold(file)
+                staged.append(ListingImages(
+                    listings=listing,
+                    name=name,
+                    asset=asset,
+                    status=ListingImages.STATUS_PENDING,
+                    position=position,
+                    pending_file=pending_file,
+                ))
+            position += 1
+
+        ListingImages.objects.bulk_create(staged)
+        for asset_id, references in Counter(image.asset_id for image in staged).items():
+            ImageAsset.objects.filter(pk=asset_id).update(ref_count=F("ref_count") + references)
+        refresh_covers([listing.pk])
+        bump_card_versions(Listings.objects.filter(pk=listing.pk))
+
+        pending = [image.pk for image in staged if image.status == ListingImages.STATUS_PENDING]
+        if pending:
+            transaction.on_commit(lambda: write_staged_files(pending, held))
+
+    return staged
+
+
+def hold(file):
+    """Copy of ``file`` in an anonymous temporary file, removed when it is closed or collected."""
+    copy = tempfile.TemporaryFile()
+    for chunk in file.chunks():
+        copy.write(chunk)
+    file.seek(0)
+    return copy
+
+
+def write_staged_files(image_ids, held):
+    """Write the held files of the committed rows ``image_ids`` to staging, then queue their upload."""
+    storage = staging_storage()
+    try:
+        # Skips rows deleted before the commit, whose staged file was discarded already.
+        for name in ListingImages.objects.filter(pk__in=image_ids, status=ListingImages.STATUS_PENDING).values_list(
+            "pending_file", flat=True
+        ):
+            copy = held[name]
+            copy.seek(0)
+            storage.save(name, File(copy))
+    except OSError as e:
+        # The upload task fails the rows whose file is missing.
+        logger.warning(f"Could not stage listing images {image_ids}: {e}")
+    finally:
+        for copy in held.values():
+            copy.close()
+    queue_uploads(image_ids)
+
+
+def queue_uploads(image_ids):
+    from .tasks import upload_listing_images
+
+    try:
+        upload_listing_images.delay(image_ids)
+    except Exception as e:
+        # The rows stay pending; retry_stale_image_uploads queues them again.
+        logger.warning(f"Could not queue upload of listing images {image_ids}: {e}")
+
+
+def _measure(file):
+    try:
+        return image_variants.measure(file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read dimensions of staged upload: {e}")
+        return None, None, ""
+    finally:
+        file.seek(0)
+
+
+def _upload(image):
+    try:
+        with staging_storage().open(image.pending_file) as file:
+            width, height, placeholder = _measure(file)
+            # An earlier upload of the same bytes may have finished meanwhile.
+            resource = image.asset.image if image.asset and image.asset.image else uploader.upload_resource(file)
+        return dict(image=resource, width=width, height=height, placeholder=placeholder), None
+    except Exception as e:
+        return None, e
+
+
+def _claim_asset(asset, resource):
+    """The resource ``asset`` ends up with, when ``resource`` was just uploaded for it."""
+    if asset.image:
+        return asset.image
+    if ImageAsset.objects.filter(pk=asset.pk, image__isnull=True).update(image=resource):
+        return resource
+    # Another worker stored these bytes first, or every row using them was deleted.
+    queue_cloudinary_deletion(resource)
+    winner = ImageAsset.objects.filter(pk=asset.pk).first()
+    return winner.image if winner else None
+
+
+def push_pending_images(image_ids):
+    """Upload the still-pending images among ``image_ids``; returns the ids that failed."""
+    images = list(
+        ListingImages.objects.filter(pk__in=image_ids, status=ListingImages.STATUS_PENDING).select_related("asset")
+    )
+    if not images:
+        return []
+
+    # Rows sharing an asset share one upload.
+    uploads = {}
+    for image in images:
+        uploads.setdefault(image.asset_id or f"row:{image.pk}", image)
+
+    # Worker threads only talk to Cloudinary; the rows are updated from this one.
+    with ThreadPoolExecutor(max_workers=min(settings.IMAGE_UPLOAD_CONCURRENCY, len(uploads))) as pool:
+        results = dict(zip(uploads, pool.map(_upload, uploads.values())))
+
+    for key, (uploaded, error) in results.items():
+        asset = uploads[key].asset
+        if error is None and asset is not None:
+            uploaded["image"] = _claim_asset(asset, uploaded["image"])
+
+    failed = []
+    uploaded_listings = set()
+    for image in images:
+        uploaded, error = results[image.asset_id or f"row:{image.pk}"]
+        if error is not None:
+            logger.warning(f"Upload of listing image {image.pk} failed: {error}")
+            failed.append(image.pk)
+            continue
+        if uploaded["image"] is None:
+            continue
+
+        updated = ListingImages.objects.filter(pk=image.pk, status=ListingImages.STATUS_PENDING).update(
+            **uploaded,
+            status=ListingImages.STATUS_READY,
+            pending_file="",
+            updated_at=timezone.now(),
+        )
+        if updated:
+            discard_staged_file(image.pending_file)
+            uploaded_listings.add(image.listings_id)
+        elif image.asset_id is None:
+            # Deleted, or uploaded by another worker, while this upload ran.
+            queue_cloudinary_deletion(uploaded["image"])
+
+    if uploaded_listings:
+        refresh_covers(uploaded_listings)
+        bump_card_versions(Listings.objects.filter(pk__in=uploaded_listings))
+    return failed
+
+
+def fail_pending_images(image_ids):
+    images = ListingImages.objects.filter(pk__in=image_ids, status=ListingImages.STATUS_PENDING)
+    staged = list(images.values_list("listings_id", "pending_file"))
+    images.update(status=ListingImages.STATUS_FAILED, pending_file="", updated_at=timezone.now())
+    for _, name in staged:
+        discard_staged_file(name)
+    bump_card_versions(Listings.objects.filter(pk__in={listing_id for listing_id, _ in staged}))
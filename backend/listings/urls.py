@@ -4,11 +4,16 @@ from .views import (
     ListingView,
     ListingDetailView,
     PublicListingView,
+    ListingFacetsView,
     OptionsView,
     PrivateListingView,
     ListingEditView,
     ListingDeleteView,
     ListingImageUploadView,
+    ListingImageOrderView,
+    ListingImageSignView,
+    ListingImageConfirmView,
+    LocalDirectUploadView,
     ListingImageDeleteView,
 )
 
@@ -22,6 +27,7 @@ urlpatterns = [
 
     path("private/", PrivateListingView.as_view(), name="private-listings"),
 
+    path("facets/", ListingFacetsView.as_view(), name="listing-facets"),
     path("choices/form-option/", OptionsView.as_view(), name="form-options"),
 
     path("<int:id>/edit/", ListingEditView.as_view(), name="property-edit"),
@@ -30,6 +36,14 @@ urlpatterns = [
 
     path("<int:listing_id>/images/", ListingImageUploadView.as_view(), name="property-images-upload"),
 
+    path("<int:listing_id>/images/order/", ListingImageOrderView.as_view(), name="property-images-order"),
+
+    path("<int:listing_id>/images/sign/", ListingImageSignView.as_view(), name="property-images-sign"),
+
+    path("<int:listing_id>/images/confirm/", ListingImageConfirmView.as_view(), name="property-images-confirm"),
+
+    path("images/direct-upload/", LocalDirectUploadView.as_view(), name="property-images-direct-local"),
+
     path("images/<int:image_id>/", ListingImageDeleteView.as_view(), name="property-images-delete"),
 
     path("<slug:title_slug>/", ListingDetailView.as_view(), name="property-details"),
@@ -3,7 +3,7 @@ from rest_framework import generics, permissions, views, status
 
 from rest_framework.response import Response
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import CachedJWTAuthentication
 
 from drf_spectacular.utils import extend_schema, OpenApiParameter, extend_schema_view
 
@@ -13,20 +13,53 @@ from listings.models import Listings, Amenities, ListingImages
 
 from listings.serializers import (
     ListingSerializer,
+    ListingCardSerializer,
     ListingDetailSerializer,
     CreateUpdateListSerializer,
     ListingImageSerializer,
+    ListingImageOrderSerializer,
     ListingImageUploadSerializer,
+    DirectUploadConfirmSerializer,
 )
 
 from listings.filters import ListingFilter
 
+from listings.facets import FACETS_CACHE_TTL, compute_facets, facets_cache_key
+
+from listings.result_cache import ResultWindow, cached_results, evaluate, result_cache_key
+
+from listings.uploads import stage_images
+
+from listings.covers import image_count, next_position, reorder_images
+
+from listings import direct_uploads
+
+from cloudinary import CloudinaryResource
+
+from django_filters.rest_framework import DjangoFilterBackend
+
+from django_filters.utils import translate_validation
+
+from django.db import transaction
+
+from django.db.models import Count, Max
+
+from conf.cache import remember
+
+from conf.conditional import conditional_get, make_etag
+
+from conf.fieldsets import SPARSE_PARAMETERS, field_selection
+
+from conf.pagination import DefaultPagePagination, ListingsCursorPagination
+
+from django.utils.cache import patch_response_headers
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+
+OPTIONS_CACHE_TTL = 60 * 60 * 24
 
 class BaseAuthenticatedView:
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     permission_classes = [permissions.IsAuthenticated]
 
@@ -62,9 +95,31 @@ class ListingView(BaseAuthenticatedView, generics.ListCreateAPIView):
 
         return super().post(request, *args, **kwargs)
 
-class ListingDetailView(generics.RetrieveAPIView):
+def listing_detail_validators(request, title_slug):
 
-    queryset = Listings.objects.all()
+    state = (
+
+        Listings.objects.filter(title_slug=title_slug)
+
+        .annotate(images_updated_at=Max("listingimages__updated_at"), image_count=Count("listingimages"))
+
+        .values("id", "updated_at", "card_version", "amenity_mask", "images_updated_at", "image_count")
+
+        .first()
+
+    )
+
+    if state is None:
+
+        return None
+
+    # card_version also moves on host profile changes; amenity_mask mirrors the amenity set.
+    # No Last-Modified: neither of those has a timestamp, so If-Modified-Since could match a stale copy.
+    return make_etag(*state.values()), None
+
+@method_decorator(conditional_get(listing_detail_validators), name="get")
+@extend_schema_view(get=extend_schema(parameters=SPARSE_PARAMETERS))
+class ListingDetailView(generics.RetrieveAPIView):
 
     serializer_class = ListingDetailSerializer
 
@@ -73,6 +128,18 @@ class ListingDetailView(generics.RetrieveAPIView):
 
     lookup_field = 'title_slug'
 
+    read_from_replica = True
+
+    def get_queryset(self):
+
+        queryset = Listings.objects.all()
+
+        if field_selection(self.request).needs("host"):
+
+            queryset = queryset.select_related("host")
+
+        return queryset
+
 @extend_schema_view(
 
     list = extend_schema(
@@ -127,6 +194,108 @@ class ListingDetailView(generics.RetrieveAPIView):
 
             ),
 
+            OpenApiParameter(
+
+                name="amenities",
+
+                description="Comma-separated amenity values (e.g. wifi,pool); listings must have all of them",
+
+                required=False,
+
+                type=str
+
+            ),
+
+            OpenApiParameter(
+
+                name="min_rating",
+
+                description="Only listings whose average review rating (1-5) is at least this",
+
+                required=False,
+
+                type=float
+
+            ),
+
+            OpenApiParameter(
+
+                name="q",
+
+                description="Full-text search over title, description, city and country, ranked by relevance",
+
+                required=False,
+
+                type=str
+
+            ),
+
+            OpenApiParameter(
+
+                name="bbox",
+
+                description="Map viewport as west,south,east,north in degrees",
+
+                required=False,
+
+                type=str
+
+            ),
+
+            OpenApiParameter(
+
+                name="near",
+
+                description="lat,lng to search around; results are sorted by distance_km",
+
+                required=False,
+
+                type=str
+
+            ),
+
+            OpenApiParameter(
+
+                name="radius_km",
+
+                description="Radius for near (default 10, max 500)",
+
+                required=False,
+
+                type=float
+
+            ),
+
+            OpenApiParameter(
+
+                name="pagination",
+
+                description="Set to 'cursor' for keyset pagination with opaque next/previous cursors",
+
+                required=False,
+
+                type=str,
+
+                enum=["page", "cursor"]
+
+            ),
+
+            OpenApiParameter(
+
+                name="card",
+
+                description="Set to 'compact' for cards with only the cover image and no host",
+
+                required=False,
+
+                type=str,
+
+                enum=["full", "compact"]
+
+            ),
+
+            *SPARSE_PARAMETERS,
+
         ]
 
     )
@@ -144,13 +313,130 @@ class PublicListingView(generics.ListAPIView):
 
     filterset_class = ListingFilter
 
+    read_from_replica = True
+
+    def get_serializer_class(self):
+
+        if self.request is not None and self.request.query_params.get("card") == "compact":
+
+            return ListingCardSerializer
+
+        return ListingSerializer
+
+    @property
+
+    def paginator(self):
+
+        if not hasattr(self, "_paginator"):
+
+            params = self.request.query_params if self.request is not None else {}
+
+            if params.get("pagination") == "cursor" or "cursor" in params:
+
+                self._paginator = ListingsCursorPagination()
+
+            else:
+
+                self._paginator = DefaultPagePagination()
+
+        return self._paginator
+
+    def list(self, request, *args, **kwargs):
+
+        # Keyset cursors filter on the sort key, so they always query.
+        if isinstance(self.paginator, ListingsCursorPagination):
+
+            return super().list(request, *args, **kwargs)
+
+        filterset = DjangoFilterBackend().get_filterset(request, self.get_queryset(), self)
+
+        if not filterset.is_valid():
+
+            raise translate_validation(filterset.errors)
+
+        window = ResultWindow(
+
+            cached_results(result_cache_key(filterset), lambda: evaluate(filterset.qs))
+
+        )
+
+        try:
+
+            page_number = int(request.query_params.get(self.paginator.page_query_param, 1))
+
+        except ValueError:
+
+            return super().list(request, *args, **kwargs)
+
+        # Pages past the cached prefix of a very large result go to the database.
+        if not window.covers(page_number * self.paginator.get_page_size(request)):
+
+            return super().list(request, *args, **kwargs)
+
+        rows = self.paginate_queryset(window)
+
+        fields = window.entry["fields"]
+
+        listings = Listings.objects.order_by().in_bulk([row[0] for row in rows])
+
+        page = []
+
+        for row in rows:
+
+            listing = listings.get(row[0])
+
+            if listing is None:
+
+                continue
+
+            for field, value in zip(fields[1:], row[1:]):
+
+                setattr(listing, field, value)
+
+            page.append(listing)
+
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+class ListingFacetsView(generics.GenericAPIView):
+
+    """Facet counts for the public search, filtered exactly like PublicListingView."""
+
+    queryset = Listings.objects.all()
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    filterset_class = ListingFilter
+
+    pagination_class = None
+
+    read_from_replica = True
+
+    @extend_schema(responses={200: OpenApiTypes.OBJECT})
+    def get(self, request):
+
+        filter_names = set(ListingFilter.base_filters) - {"ordering"}
+
+        key = facets_cache_key(request.query_params, filter_names)
+
+        facets = remember(key, lambda: compute_facets(self.filter_queryset(self.get_queryset())), FACETS_CACHE_TTL)
+
+        return Response(facets)
+
 class OptionsView(BaseAuthenticatedView, views.APIView):
 
     @extend_schema(responses={200: OpenApiTypes.OBJECT})
-    @method_decorator(cache_page(60 * 60 * 24))
     def get(self, request):
 
-        return Response({
+        response = Response(remember("listings:options", self.build_options, OPTIONS_CACHE_TTL))
+
+        patch_response_headers(response, OPTIONS_CACHE_TTL)
+
+        return response
+
+    def build_options(self):
+
+        return {
 
             'property_options' : [
 
@@ -182,8 +468,9 @@ class OptionsView(BaseAuthenticatedView, views.APIView):
 
             ],
 
-        })
+        }
 
+@extend_schema_view(get=extend_schema(parameters=SPARSE_PARAMETERS))
 class PrivateListingView(BaseAuthenticatedView, generics.ListAPIView):
 
     serializer_class = ListingSerializer
@@ -217,7 +504,22 @@ class ListingImageUploadView(BaseAuthenticatedView, views.APIView):
     """
     Dedicated endpoint to upload one or more images directly to a listing.
     POST /api/listings/<listing_id>/images/
+
+    Uploads are accepted as "pending" and pushed to Cloudinary in the
+    background; GET lists the listing's images with their upload status.
     """
+    @extend_schema(responses={200: ListingImageSerializer(many=True)})
+    def get(self, request, listing_id):
+        try:
+            listing = Listings.objects.get(id=listing_id, host=request.user)
+        except Listings.DoesNotExist:
+            return Response(
+                {"detail": "Listing not found or you are not the host."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(ListingImageSerializer(listing.listingimages.all(), many=True).data)
+
     @extend_schema(
         request=ListingImageUploadSerializer,
         responses={201: ListingImageSerializer(many=True)}
@@ -235,22 +537,18 @@ class ListingImageUploadView(BaseAuthenticatedView, views.APIView):
         serializer.is_valid(raise_exception=True)
 
         images = serializer.validated_data["images"]
-        current_count = listing.listingimages.count()
-        if current_count + len(images) > 5:
-            return Response(
-                {"images": f"Listing already has {current_count} images. Maximum 5 images allowed per listing."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        with transaction.atomic():
+            # Concurrent uploads for the listing queue here, so the count holds until the insert.
+            listing = Listings.objects.select_for_update().get(pk=listing.pk)
 
-        created_images = []
-        for img in images:
-            img_name = os.path.splitext(img.name)[0]
-            obj = ListingImages.objects.create(
-                listings=listing,
-                name=img_name,
-                image=img
-            )
-            created_images.append(obj)
+            current_count = image_count(listing)
+            if current_count + len(images) > 5:
+                return Response(
+                    {"images": f"Listing already has {current_count} images. Maximum 5 images allowed per listing."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            created_images = stage_images(listing, [(os.path.splitext(img.name)[0], img) for img in images])
 
         return Response(
             ListingImageSerializer(created_images, many=True).data,
@@ -258,6 +556,138 @@ class ListingImageUploadView(BaseAuthenticatedView, views.APIView):
         )
 
 
+class ListingImageOrderView(BaseAuthenticatedView, views.APIView):
+    """
+    Reorder a listing's images; the first ready one becomes the cover.
+    POST /api/listings/<listing_id>/images/order/
+    """
+    @extend_schema(
+        request=ListingImageOrderSerializer,
+        responses={200: ListingImageSerializer(many=True)}
+    )
+    def post(self, request, listing_id):
+        try:
+            listing = Listings.objects.get(id=listing_id, host=request.user)
+        except Listings.DoesNotExist:
+            return Response(
+                {"detail": "Listing not found or you are not the host."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = ListingImageOrderSerializer(data=request.data, context={"listing": listing})
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            reorder_images(listing, serializer.validated_data["order"])
+
+        return Response(ListingImageSerializer(listing.listingimages.all(), many=True).data)
+
+
+class ListingImageSignView(BaseAuthenticatedView, views.APIView):
+    """
+    Signed parameters for uploading one image straight to storage.
+    POST /api/listings/<listing_id>/images/sign/
+
+    Post the file with these parameters to "upload_url", then register it
+    through the confirm endpoint.
+    """
+    @extend_schema(request=None, responses={200: OpenApiTypes.OBJECT})
+    def post(self, request, listing_id):
+        try:
+            listing = Listings.objects.get(id=listing_id, host=request.user)
+        except Listings.DoesNotExist:
+            return Response(
+                {"detail": "Listing not found or you are not the host."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response(direct_uploads.sign_upload(request, listing))
+
+
+class ListingImageConfirmView(BaseAuthenticatedView, views.APIView):
+    """
+    Register an image uploaded with signed parameters.
+    POST /api/listings/<listing_id>/images/confirm/
+    """
+    @extend_schema(
+        request=DirectUploadConfirmSerializer,
+        responses={201: ListingImageSerializer}
+    )
+    def post(self, request, listing_id):
+        try:
+            listing = Listings.objects.get(id=listing_id, host=request.user)
+        except Listings.DoesNotExist:
+            return Response(
+                {"detail": "Listing not found or you are not the host."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        serializer = DirectUploadConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not direct_uploads.verify_upload(listing, data["public_id"], data["version"], data["signature"]):
+            return Response({"signature": "Upload signature is not valid for this listing."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if direct_uploads.is_local():
+            storage = ListingImages.STORAGE_LOCAL
+            width, height, placeholder = direct_uploads.local_dimensions(data["public_id"], data["format"])
+            local_variants = direct_uploads.local_variants(data["public_id"])
+        else:
+            storage = ListingImages.STORAGE_CLOUDINARY
+            width, height, placeholder = data.get("width"), data.get("height"), ""
+            local_variants = []
+
+        with transaction.atomic():
+            # Concurrent confirms for the listing queue here, so the checks below hold until the insert.
+            listing = Listings.objects.select_for_update().get(pk=listing.pk)
+
+            if listing.listingimages.filter(image__regex=direct_uploads.stored_image_pattern(data["public_id"])).exists():
+                return Response({"public_id": "This upload is already registered."}, status=status.HTTP_400_BAD_REQUEST)
+
+            current_count = image_count(listing)
+            if current_count >= 5:
+                return Response(
+                    {"images": f"Listing already has {current_count} images. Maximum 5 images allowed per listing."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            image = ListingImages.objects.create(
+                listings=listing,
+                name=data.get("name") or data["public_id"].rsplit("/", 1)[-1],
+                storage=storage,
+                width=width,
+                height=height,
+                placeholder=placeholder,
+                local_variants=local_variants,
+                position=next_position(listing),
+                image=CloudinaryResource(
+                    data["public_id"], format=data["format"], version=data["version"], type="upload", resource_type="image"
+                ),
+            )
+        return Response(ListingImageSerializer(image).data, status=status.HTTP_201_CREATED)
+
+
+class LocalDirectUploadView(views.APIView):
+    """
+    Offline stand-in for Cloudinary's upload API, used when
+    DIRECT_UPLOAD_BACKEND is "local". The signed parameters authenticate it.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @extend_schema(exclude=True)
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if not direct_uploads.is_local() or upload is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        result = direct_uploads.store_local_upload(request.data, upload)
+        if result is None:
+            return Response({"error": {"message": "Invalid or expired upload signature"}}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+
 class ListingImageDeleteView(BaseAuthenticatedView, views.APIView):
     """
     Dedicated endpoint to delete a specific image from a listing by image ID.
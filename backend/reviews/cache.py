@@ -0,0 +1,30 @@
+"""
+Cached review lists.
+
+The list page and its conditional-GET validators are cached per listing slug
+through ``conf.cache.remember``. Keys carry the listing's review generation,
+which ``reviews.models`` bumps whenever one of its reviews is saved or
+deleted, and the global listings generation, so a renamed or deleted listing
+is looked up again. Reviewer names and avatars in a cached page may lag by up
+to REVIEWS_CACHE_TTL.
+"""
+
+from conf.cache import invalidate
+from listings.models import Listings
+from listings.result_cache import LISTINGS_GENERATION
+
+REVIEWS_CACHE_TTL = 60 * 5
+
+
+def review_generation_key(title_slug):
+    return f"reviews:listing:{title_slug}:generation"
+
+
+def review_tags(title_slug):
+    return [review_generation_key(title_slug), LISTINGS_GENERATION]
+
+
+def invalidate_listing_reviews(listing_id):
+    title_slug = Listings.objects.filter(pk=listing_id).values_list("title_slug", flat=True).first()
+    if title_slug is not None:
+        invalidate(review_generation_key(title_slug))
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+
+from django.db import transaction
+
+from django.db.models import Count, F, Sum
+
+from listings.models import Listings
+
+from reviews.models import Review
+
+class Command(BaseCommand):
+
+    help = 'Recompute the denormalized rating columns on listings from their reviews, in primary key batches'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+
+        categories = Review.RATING_CATEGORIES
+
+        fields = ['review_count', 'rating'] + [f'{category}_score_sum' for category in categories]
+
+        last_id = 0
+
+        updated = 0
+
+        while True:
+
+            batch = list(
+
+                Listings.objects.filter(id__gt=last_id)
+
+                .order_by('id')
+
+                .only('id', *fields)[:options['batch_size']]
+
+            )
+
+            if not batch:
+
+                break
+
+            last_id = batch[-1].id
+
+            stats = {
+
+                row['listing_id']: row
+
+                for row in Review.objects.filter(listing_id__in=[listing.id for listing in batch])
+
+                .values('listing_id')
+
+                .annotate(count=Count('id'), **{category: Sum(category) for category in categories})
+
+            }
+
+            changed = []
+
+            for listing in batch:
+
+                row = stats.get(listing.id)
+
+                count = row['count'] if row else 0
+
+                sums = {f'{category}_score_sum': row[category] if row else 0 for category in categories}
+
+                rating = sum(sums.values()) / (count * len(categories)) if count else 0
+
+                expected = dict(sums, review_count=count, rating=rating)
+
+                if any(getattr(listing, field) != value for field, value in expected.items()):
+
+                    for field, value in expected.items():
+
+                        setattr(listing, field, value)
+
+                    listing.card_version = F('card_version') + 1
+
+                    changed.append(listing)
+
+            with transaction.atomic():
+
+                Listings.objects.bulk_update(changed, fields + ['card_version'])
+
+            updated += len(changed)
+
+        self.stdout.write(
+
+            self.style.SUCCESS(f'Rebuilt ratings on {updated} listing(s)')
+
+        )
@@ -10,6 +10,9 @@ from django.db.models import Q
 
 class Review(TimeStampedModel):
 
+    # Each category has a running total on Listings (<category>_score_sum).
+    RATING_CATEGORIES = ("accuracy", "communication", "cleanliness", "location", "check_in", "value")
+
     review = models.TextField()
 
     accuracy = models.IntegerField()
@@ -43,3 +46,12 @@ class Review(TimeStampedModel):
         verbose_name_plural = "Reviews"
 
         unique_together = ("listing", "user")
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from reviews.cache import invalidate_listing_reviews
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_cached_reviews(sender, instance, **kwargs):
+    invalidate_listing_reviews(instance.listing_id)
@@ -1,6 +1,11 @@
+import time
+from io import StringIO
+
+from django.core.management import call_command
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from django.utils.http import http_date
 from users.models import User
 from listings.models import Listings
 from bookings.models import Bookings
@@ -106,3 +111,102 @@ class ReviewAPITests(APITestCase):
         }
         res = self.client.post(self.url, payload)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_reviews_conditional_get(self):
+        res = self.client.get(self.url)
+        etag = res["ETag"]
+
+        # The validators come from the review cache.
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                user=self.guest,
+                listing=self.listing,
+                review="Lovely",
+                accuracy=4,
+                communication=4,
+                cleanliness=4,
+                location=4,
+                check_in=4,
+                value=4,
+            )
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertNotIn("Last-Modified", res)
+
+        # Deleting a review leaves the newest review's timestamp as it was.
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.all().delete()
+        res = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 0)
+
+    def test_list_reviews_is_cached_until_reviews_change(self):
+        self.assertEqual(self.client.get(self.url).data["count"], 0)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+        self.assertEqual(res.data["count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                user=self.guest,
+                listing=self.listing,
+                review="Lovely",
+                accuracy=4,
+                communication=4,
+                cleanliness=4,
+                location=4,
+                check_in=4,
+                value=4,
+            )
+        self.assertEqual(self.client.get(self.url).data["count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertEqual(self.client.get(self.url).data["count"], 0)
+
+    def test_create_review_updates_listing_rating(self):
+        self.client.force_authenticate(user=self.guest)
+        payload = {
+            "booking": self.booking.id,
+            "review": "Mostly good",
+            "accuracy": 5,
+            "communication": 4,
+            "cleanliness": 4,
+            "location": 5,
+            "check_in": 3,
+            "value": 3,
+        }
+        res = self.client.post(self.url, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 1)
+        self.assertEqual(self.listing.accuracy_score_sum, 5)
+        self.assertAlmostEqual(self.listing.rating, 4.0)
+
+    def test_rebuild_listing_ratings(self):
+        for user, score in [(self.guest, 5), (self.other_user, 2)]:
+            Review.objects.create(
+                user=user,
+                listing=self.listing,
+                review="Bulk imported",
+                accuracy=score,
+                communication=score,
+                cleanliness=score,
+                location=score,
+                check_in=score,
+                value=score,
+            )
+
+        call_command("rebuild_listing_ratings", batch_size=1, stdout=StringIO())
+
+        self.listing.refresh_from_db()
+        self.assertEqual(self.listing.review_count, 2)
+        self.assertEqual(self.listing.value_score_sum, 7)
+        self.assertAlmostEqual(self.listing.rating, 3.5)
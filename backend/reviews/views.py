@@ -4,18 +4,71 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 from django.shortcuts import get_object_or_404
 
+from django.db import transaction
+
+from django.db.models import Count, Max
+
+from django.utils.decorators import method_decorator
+
+from rest_framework.response import Response
+
+from conf.cache import remember
+
+from conf.conditional import conditional_get, make_etag
+
+from .cache import REVIEWS_CACHE_TTL, review_tags
+
 from .models import Review
 
 from .serializers import ReviewSerializer
 
 from listings.models import Listings
 
+def review_list_state(title_slug):
+
+    return (
+
+        Listings.objects.filter(title_slug=title_slug)
+
+        .annotate(reviews_total=Count("review"), latest_review=Max("review__updated_at"))
+
+        .values("id", "reviews_total", "latest_review")
+
+        .first()
+
+    )
+
+def review_list_validators(request, title_slug):
+
+    state = remember(f"reviews:state:{title_slug}", lambda: review_list_state(title_slug), REVIEWS_CACHE_TTL, tags=review_tags(title_slug))
+
+    if state is None:
+
+        return None
+
+    # No Last-Modified: deleting a review doesn't move the newest updated_at, so If-Modified-Since could match.
+    return make_etag(*state.values()), None
+
+@method_decorator(conditional_get(review_list_validators), name="get")
 class ReviewListCreate(generics.ListCreateAPIView):
 
     serializer_class = ReviewSerializer
 
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    read_from_replica = True
+
+    def list(self, request, *args, **kwargs):
+
+        title_slug = self.kwargs["title_slug"]
+
+        # Keyed by the absolute URL: the page and host appear in the next/previous links.
+        key = f"reviews:page:{make_etag(request.build_absolute_uri())}"
+
+        data = remember(key, lambda: super(ReviewListCreate, self).list(request, *args, **kwargs).data, REVIEWS_CACHE_TTL, tags=review_tags(title_slug))
+
+        return Response(data)
+
     def get_queryset(self):
 
         title_slug = self.kwargs.get("title_slug")
@@ -32,4 +85,8 @@ class ReviewListCreate(generics.ListCreateAPIView):
 
         listing = get_object_or_404(Listings.objects.only("id"), title_slug=self.kwargs["title_slug"])
 
-        serializer.save(user=self.request.user, listing=listing)
+        with transaction.atomic():
+
+            review = serializer.save(user=self.request.user, listing=listing)
+
+            Listings.objects.filter(pk=listing.pk).add_review(review)
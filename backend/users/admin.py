@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import User, CloudinaryDeletion
 
 from listings import models as listing_models
 
@@ -60,6 +60,14 @@ class BookingsAdmin(admin.ModelAdmin):
 
     list_display = ('guest', 'listing', 'start_date', 'end_date', 'status')
 
+class CloudinaryDeletionAdmin(admin.ModelAdmin):
+
+    list_display = ('public_id', 'attempts', 'next_attempt_at', 'dead')
+
+    list_filter = ('dead',)
+
+    search_fields = ('public_id',)
+
 admin.site.register(User, UserAdmin)
 
 admin.site.register(listing_models.Listings, ListingsAdmin)
@@ -67,3 +75,5 @@ admin.site.register(listing_models.Listings, ListingsAdmin)
 admin.site.register(listing_models.ListingImages)
 
 admin.site.register(booking_models.Bookings, BookingsAdmin)
+
+admin.site.register(CloudinaryDeletion, CloudinaryDeletionAdmin)
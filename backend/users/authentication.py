@@ -0,0 +1,60 @@
+"""
+JWT authentication with cached user lookups.
+
+simplejwt loads the token's user from the database on every request. Here the
+user comes from ``conf.cache.remember`` under a per-user generation tag that
+``users.models`` bumps whenever the user is saved or deleted; code that
+updates users with ``QuerySet.update`` calls ``invalidate_users`` itself. The
+password hash is deferred so it never reaches the cache.
+"""
+
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from conf.cache import invalidate, remember
+
+USER_CACHE_TTL = 60 * 5
+
+
+def user_generation_key(user_id):
+    return f"users:user:{user_id}:generation"
+
+
+def cached_user(user_id):
+    """The user with primary key ``user_id``, or None."""
+    User = get_user_model()
+    return remember(
+        f"users:auth:{user_id}",
+        lambda: User.objects.defer("password").filter(pk=user_id).first(),
+        USER_CACHE_TTL,
+        tags=[user_generation_key(user_id)],
+    )
+
+
+def invalidate_users(user_ids):
+    invalidate(*(user_generation_key(user_id) for user_id in user_ids))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_FIELD != "id" or api_settings.CHECK_REVOKE_TOKEN:
+            # Lookups by another field, or checks of the password hash, need the database.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from conf.cache import STATS_INTERVAL, cache_stats, reset_cache_stats
+
+class Command(BaseCommand):
+
+    help = (
+        'Report hit rates of the two-tier cache per key namespace, summed over all processes. '
+        f'Processes add their counts every {STATS_INTERVAL} seconds.'
+    )
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--reset', action='store_true', help='Clear the counters after reporting them.')
+
+    def handle(self, *args, **options):
+
+        stats = cache_stats()
+
+        if not stats:
+
+            self.stdout.write('No cache statistics recorded yet.')
+
+        for space, counts in stats.items():
+
+            lookups = counts['local_hits'] + counts['shared_hits'] + counts['misses']
+
+            hits = counts['local_hits'] + counts['shared_hits']
+
+            rate = f'{hits / lookups:.1%}' if lookups else 'n/a'
+
+            self.stdout.write(
+                f'{space}: {lookups} lookups, hit rate {rate} '
+                f'(local {counts["local_hits"]}, shared {counts["shared_hits"]}, misses {counts["misses"]}), '
+                f'{counts["recomputes"]} recomputes, {counts["early_refreshes"]} early refreshes'
+            )
+
+        if options['reset']:
+
+            reset_cache_stats()
@@ -1,5 +1,7 @@
 from django.db import models
 
+from django.utils import timezone
+
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 from phonenumber_field.modelfields import PhoneNumberField
@@ -80,13 +82,54 @@ class User(AbstractBaseUser, PermissionsMixin):
 
         return self.username
 
+class CloudinaryDeletion(models.Model):
+
+    """
+    Cloudinary asset waiting to be deleted.
+
+    Rows are written in the same transaction as the delete that orphaned the
+    asset, so a rollback keeps the asset, and users.tasks.drain_cloudinary_deletions
+    removes them in batches. Rows that keep failing are dead-lettered.
+    """
+
+    public_id = models.CharField(max_length=255)
+
+    resource_type = models.CharField(max_length=20, default="image")
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    last_error = models.TextField(blank=True, default="")
+
+    dead = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
 
-from django.db.models.signals import post_delete
+    def __str__(self):
+
+        return self.public_id
+
+    class Meta:
+
+        indexes = [
+
+            models.Index(fields=["dead", "next_attempt_at"], name="cloudinary_deletion_due"),
+
+        ]
+
+
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from conf.cloudinary_utils import delete_cloudinary_asset
+from conf.cloudinary_utils import queue_cloudinary_deletion
+from users.authentication import invalidate_users
 
 @receiver(post_delete, sender=User)
 def delete_user_avatar_on_delete(sender, instance, **kwargs):
     if instance.avatar:
-        delete_cloudinary_asset(instance.avatar)
+        queue_cloudinary_deletion(instance.avatar)
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_users([instance.pk])
@@ -34,7 +34,7 @@ class UserSerializer(serializers.ModelSerializer):
 
         return User.objects.create_user(**validated_data)
 
-from conf.cloudinary_utils import delete_cloudinary_asset
+from conf.cloudinary_utils import queue_cloudinary_deletion
 
 class UserProfileSerializer(serializers.ModelSerializer):
 
@@ -80,12 +80,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password', None)
         new_avatar = validated_data.get('avatar', None)
 
-        # If a new avatar is uploaded, delete the old Cloudinary asset
-        if new_avatar is not None and instance.avatar and instance.avatar != new_avatar:
-            delete_cloudinary_asset(instance.avatar)
+        # If a new avatar is uploaded, delete the old Cloudinary asset once the new one is saved
+        old_avatar = instance.avatar if new_avatar is not None and instance.avatar != new_avatar else None
 
         user = super().update(instance, validated_data)
 
+        if old_avatar:
+            queue_cloudinary_deletion(old_avatar)
+
         if password:
 
             user.set_password(password)
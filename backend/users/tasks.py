@@ -1,6 +1,27 @@
+import logging
+from datetime import timedelta
+
 import requests
 from celery import shared_task
 
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary's delete_resources accepts at most 100 public ids per call.
+DELETION_CHUNK_SIZE = 100
+
+# Rows handled by one drain run; the next run picks up the rest.
+DELETION_DRAIN_LIMIT = 2000
+
+# Attempts before a deletion is dead-lettered for manual inspection.
+DELETION_MAX_ATTEMPTS = 6
+
+DELETION_LOCK = "users:cloudinary-deletions:lock"
+
+DELETION_LOCK_TTL = 60 * 10
+
 @shared_task
 def ping_health():
     try:
@@ -8,3 +29,66 @@ def ping_health():
         print(f"Health ping status: {response.status_code}")
     except Exception as e:
         print(f"Health ping failed: {str(e)}")
+
+
+def _deletion_backoff(attempts):
+    return timedelta(minutes=2 ** min(attempts, 8))
+
+
+@shared_task
+def drain_cloudinary_deletions():
+    """
+    Delete queued Cloudinary assets in chunks with the multi-resource API.
+
+    Ids Cloudinary reports as deleted or not found are done. Everything else
+    is retried with exponential backoff and dead-lettered after
+    DELETION_MAX_ATTEMPTS.
+    """
+    import cloudinary.api
+
+    from .models import CloudinaryDeletion
+
+    if not cache.add(DELETION_LOCK, 1, DELETION_LOCK_TTL):
+        return 0
+
+    try:
+        now = timezone.now()
+        due = list(
+            CloudinaryDeletion.objects.filter(dead=False, next_attempt_at__lte=now)
+            .order_by("id")[:DELETION_DRAIN_LIMIT]
+        )
+
+        by_type = {}
+        for row in due:
+            by_type.setdefault(row.resource_type, []).append(row)
+
+        done = 0
+        for resource_type, rows in by_type.items():
+            for start in range(0, len(rows), DELETION_CHUNK_SIZE):
+                chunk = rows[start:start + DELETION_CHUNK_SIZE]
+                public_ids = sorted({row.public_id for row in chunk})
+                try:
+                    result = cloudinary.api.delete_resources(public_ids, resource_type=resource_type)
+                    statuses = result.get("deleted", {})
+                    error = None
+                except Exception as e:
+                    statuses = {}
+                    error = str(e)
+
+                finished = [row.id for row in chunk if statuses.get(row.public_id) in ("deleted", "not_found")]
+                CloudinaryDeletion.objects.filter(id__in=finished).delete()
+                done += len(finished)
+
+                failed = [row for row in chunk if row.id not in set(finished)]
+                for row in failed:
+                    row.attempts += 1
+                    row.last_error = error or f"Cloudinary returned {statuses.get(row.public_id)!r}"
+                    row.next_attempt_at = now + _deletion_backoff(row.attempts)
+                    row.dead = row.attempts >= DELETION_MAX_ATTEMPTS
+                    if row.dead:
+                        logger.error(f"Giving up on deleting Cloudinary asset {row.public_id}: {row.last_error}")
+                CloudinaryDeletion.objects.bulk_update(failed, ["attempts", "last_error", "next_attempt_at", "dead"])
+
+        return done
+    finally:
+        cache.delete(DELETION_LOCK)
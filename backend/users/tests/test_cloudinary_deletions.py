@@ -0,0 +1,161 @@
+from decimal import Decimal
+
+from unittest.mock import patch
+
+from cloudinary import CloudinaryResource
+
+from django.db import transaction
+
+from django.test import TestCase
+
+from django.utils import timezone
+
+from listings.models import Listings, ListingImages
+
+from users.models import CloudinaryDeletion, User
+
+from users.tasks import DELETION_MAX_ATTEMPTS, drain_cloudinary_deletions
+
+
+def cloudinary_image(public_id):
+
+    return CloudinaryResource(public_id, format="jpg", version="1", type="upload", resource_type="image")
+
+
+class CloudinaryDeletionQueueTests(TestCase):
+
+    def setUp(self):
+
+        self.host = User.objects.create_user(
+
+            email="assets@example.com",
+
+            password="testpass123",
+
+            username="assets",
+
+        )
+
+        self.listing = Listings.objects.create(
+
+            host=self.host,
+
+            title="Asset House",
+
+            description="Has pictures.",
+
+            address="9 Asset Street",
+
+            country="India",
+
+            city="Pune",
+
+            property_type="house",
+
+            max_guests=2,
+
+            bedrooms=1,
+
+            beds=1,
+
+            bathrooms=Decimal("1.0"),
+
+            price_per_night=Decimal("40.00"),
+
+        )
+
+        for n in range(3):
+
+            ListingImages.objects.create(listings=self.listing, name=f"photo {n}", image=cloudinary_image(f"listings/photo-{n}"))
+
+    def queued(self):
+
+        return sorted(CloudinaryDeletion.objects.values_list("public_id", flat=True))
+
+    def test_deleting_a_listing_queues_its_assets(self):
+
+        with patch("cloudinary.uploader.destroy") as destroy, patch("cloudinary.api.delete_resources") as delete_resources:
+
+            self.listing.delete()
+
+        destroy.assert_not_called()
+
+        delete_resources.assert_not_called()
+
+        self.assertEqual(self.queued(), ["listings/photo-0", "listings/photo-1", "listings/photo-2"])
+
+    def test_rolled_back_delete_queues_nothing(self):
+
+        try:
+
+            with transaction.atomic():
+
+                self.listing.delete()
+
+                raise RuntimeError("abort")
+
+        except RuntimeError:
+
+            pass
+
+        self.assertEqual(self.queued(), [])
+
+        self.assertEqual(ListingImages.objects.filter(listings__title="Asset House").count(), 3)
+
+    def test_drain_deletes_in_chunks(self):
+
+        CloudinaryDeletion.objects.bulk_create([CloudinaryDeletion(public_id=f"bulk/{n}") for n in range(150)])
+
+        def delete_resources(public_ids, **options):
+
+            return {"deleted": {public_id: "deleted" for public_id in public_ids}}
+
+        with patch("cloudinary.api.delete_resources", side_effect=delete_resources) as api:
+
+            self.assertEqual(drain_cloudinary_deletions(), 150)
+
+        self.assertEqual([len(call.args[0]) for call in api.call_args_list], [100, 50])
+
+        self.assertFalse(CloudinaryDeletion.objects.exists())
+
+    def test_failures_back_off_and_are_dead_lettered(self):
+
+        CloudinaryDeletion.objects.bulk_create([
+
+            CloudinaryDeletion(public_id="gone"),
+
+            CloudinaryDeletion(public_id="stuck"),
+
+        ])
+
+        response = {"deleted": {"gone": "not_found", "stuck": "error"}}
+
+        with patch("cloudinary.api.delete_resources", return_value=response):
+
+            self.assertEqual(drain_cloudinary_deletions(), 1)
+
+        stuck = CloudinaryDeletion.objects.get()
+
+        self.assertEqual((stuck.public_id, stuck.attempts, stuck.dead), ("stuck", 1, False))
+
+        self.assertGreater(stuck.next_attempt_at, timezone.now())
+
+        CloudinaryDeletion.objects.update(attempts=DELETION_MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+
+        with patch("cloudinary.api.delete_resources", side_effect=ConnectionError("down")):
+
+            with self.assertLogs("users.tasks", "ERROR"):
+
+                drain_cloudinary_deletions()
+
+        stuck.refresh_from_db()
+
+        self.assertTrue(stuck.dead)
+
+        self.assertEqual(stuck.last_error, "down")
+
+        with patch("cloudinary.api.delete_resources") as api:
+
+            drain_cloudinary_deletions()
+
+        api.assert_not_called()
@@ -1,3 +1,5 @@
+from django.core.cache import cache
+
 from django.test import TestCase
 
 from django.urls import reverse
@@ -8,6 +10,8 @@ from users.models import User
 
 from rest_framework.test import APIClient
 
+from rest_framework_simplejwt.tokens import AccessToken
+
 USER_API_URL = reverse('users:create')
 
 USER_TOKEN_URL = reverse('users:token_obtain_pair')
@@ -273,3 +277,64 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('avatar', res.data)
 
+
+class CachedAuthenticationTests(TestCase):
+
+    def setUp(self):
+
+        cache.clear()
+
+        self.user = create_user(
+
+            username='cached',
+
+            password='testpass123',
+
+            email='cached@example.com',
+
+        )
+
+        self.client = APIClient()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_user_is_loaded_once(self):
+
+        self.assertEqual(self.client.get(USER_SELF_URL).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+
+            res = self.client.get(USER_SELF_URL)
+
+        self.assertEqual(res.data['username'], 'cached')
+
+    def test_saving_user_invalidates_cached_copy(self):
+
+        self.client.get(USER_SELF_URL)
+
+        self.user.is_active = False
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            self.user.save()
+
+            # The cached copy is only dropped once the change commits.
+            self.assertEqual(self.client.get(USER_SELF_URL).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(USER_SELF_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_update_through_cached_user(self):
+
+        self.client.get(USER_SELF_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+
+            res = self.client.patch(USER_SELF_URL, {'phone': '+14155550123', 'password': 'newpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(USER_SELF_URL).data['phone'], '+14155550123')
+
+        self.user.refresh_from_db()
+
+        self.assertTrue(self.user.check_password('newpass123'))
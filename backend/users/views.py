@@ -1,11 +1,11 @@
 from rest_framework import generics, permissions
-from rest_framework.throttling import ScopedRateThrottle
+from conf.throttling import ScopedRateThrottle
 
 from .serializers import UserSerializer, AuthenticationSerializer, UserProfileSerializer
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import CachedJWTAuthentication
 
 class CreateUserView(generics.CreateAPIView):
 
@@ -28,7 +28,7 @@ class AuthenticatedUserView(generics.RetrieveUpdateAPIView):
 
     serializer_class = UserProfileSerializer
 
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     permission_classes = [permissions.IsAuthenticated]
 
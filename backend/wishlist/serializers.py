@@ -6,7 +6,7 @@ from .models import Wishlist
 
 from listings.serializers import ListingSerializer
 
-from listings.models import Listings
+from listings.models import Listings, ListingImages
 
 class WishlistSerializer(serializers.ModelSerializer):
 
@@ -42,21 +42,21 @@ class WishlistSerializer(serializers.ModelSerializer):
 
     def get_cover_image(self, obj):
 
-        prefetched_listings = getattr(obj, "prefetched_listings_for_cover", None)
-        first_listing = prefetched_listings[0] if prefetched_listings else obj.listings.first()
+        if hasattr(obj, "cover_image_value"):
 
-        if not first_listing:
+            image = ListingImages._meta.get_field("image").to_python(obj.cover_image_value)
 
-            return None
+        else:
+
+            first_listing = obj.listings.select_related("cover_image").first()
 
-        prefetched_images = getattr(first_listing, "_prefetched_objects_cache", {}).get("listingimages")
-        first_image = prefetched_images[0] if prefetched_images else first_listing.listingimages.first()
+            image = first_listing.cover_image.image if first_listing and first_listing.cover_image else None
 
-        if not first_image or not first_image.image:
+        if not image:
 
             return None
 
-        return self.context.get('request').build_absolute_uri(first_image.image.url) if self.context.get('request') else first_image.image.url
+        return self.context.get('request').build_absolute_uri(image.url) if self.context.get('request') else image.url
 
     def validate(self,attrs):
 
@@ -10,7 +10,13 @@ from wishlist.models import Wishlist
 
 from users.models import User
 
-from listings.models import Listings
+from listings.models import Listings, ListingImages
+
+from unittest.mock import patch
+
+import cloudinary
+
+from cloudinary import CloudinaryResource
 
 WISHLIST_URL = reverse("wishlist:wishlist-list")
 
@@ -84,6 +90,26 @@ class WishlistTestCase(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_wishlist_cover_is_the_listing_cover_image(self):
+
+        ListingImages.objects.create(
+
+            listings=self.listing,
+
+            name="front",
+
+            image=CloudinaryResource("listings/front", format="jpg", version="1", type="upload", resource_type="image"),
+
+        )
+
+        self.wishlist.listings.add(self.listing)
+
+        with patch.object(cloudinary.config(), "cloud_name", "demo", create=True):
+
+            response = self.client.get(WISHLIST_URL)
+
+        self.assertIn("listings/front.jpg", response.data["results"][0]["cover_image"])
+
     def test_post_wishlist(self):
 
         response = self.client.post(WISHLIST_URL, {"name": "Test Wishlist-2"})
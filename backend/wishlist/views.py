@@ -15,7 +15,7 @@ from .models import Wishlist
 from listings.models import Listings
 
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Prefetch
+from django.db.models import Count, OuterRef, Subquery
 
 class WishlistListView(AuthAPIView,generics.ListCreateAPIView):
 
@@ -23,20 +23,16 @@ class WishlistListView(AuthAPIView,generics.ListCreateAPIView):
 
     queryset = Wishlist.objects.all()
 
+    read_from_replica = True
+
     def get_queryset(self):
 
-        listing_queryset = Listings.objects.select_related("host").prefetch_related("listingimages")
+        # The newest listing's denormalized cover, read in the same query.
+        cover = Listings.objects.filter(wishlist=OuterRef("pk")).order_by("-created_at").values("cover_image__image")[:1]
         return (
             self.queryset
             .filter(user=self.request.user)
-            .annotate(listings_count=Count("listings", distinct=True))
-            .prefetch_related(
-                Prefetch(
-                    "listings",
-                    queryset=listing_queryset,
-                    to_attr="prefetched_listings_for_cover",
-                )
-            )
+            .annotate(listings_count=Count("listings", distinct=True), cover_image_value=Subquery(cover))
         )
 
     def perform_create(self, serializer):
@@ -49,12 +45,12 @@ class WishlistDetailView(AuthAPIView,generics.RetrieveDestroyAPIView):
 
     lookup_field = "slug"
 
+    read_from_replica = True
+
     def get_queryset(self):
 
-        listing_queryset = Listings.objects.select_related("host").prefetch_related("listingimages")
-        return Wishlist.objects.filter(user=self.request.user).prefetch_related(
-            Prefetch("listings", queryset=listing_queryset)
-        )
+        # Card relations are loaded by ListingSerializer only for card cache misses.
+        return Wishlist.objects.filter(user=self.request.user).prefetch_related("listings")
 
 class DeleteListingFromWishlistView(AuthAPIView,generics.DestroyAPIView):
 